@@ -192,9 +192,12 @@ setup(
             'brightcove-import-playlists = zeit.brightcove.update:import_playlists',
             'dump_references = zeit.cms.relation.migrate:dump_references',
             'load_references = zeit.cms.relation.migrate:load_references',
+            'prerender-image-variants = zeit.content.image.prerender:prerender_existing',
             'refresh-cache = zeit.connector.invalidator:invalidate_whole_cache',
+            'refresh-cache-incremental = zeit.connector.invalidator:invalidate_changed',
             'set-properties = zeit.connector.restore:set_props_from_file',
             'search-elastic=zeit.find.cli:search_elastic',
+            'sweep-connector-cache = zeit.connector.invalidator:sweep_caches',
             'update-topiclist=zeit.retresco.connection:update_topiclist',
             'tms-reindex-object=zeit.retresco.update:reindex',
             'facebook-access-token = zeit.push.facebook:create_access_token',
@@ -1,6 +1,9 @@
 import collections
+import concurrent.futures
 import logging
 import requests
+import requests.adapters
+import time
 import zeit.brightcove.interfaces
 import zeit.content.video.interfaces
 import zope.app.appsetup.product
@@ -20,14 +23,24 @@ class CMSAPI(object):
     """
 
     MAX_RETRIES = 2
+    MAX_RATE_LIMIT_RETRIES = 5
+    PAGE_SIZE = 20
     _access_token = None
 
-    def __init__(self, base_url, oauth_url, client_id, client_secret, timeout):
+    def __init__(self, base_url, oauth_url, client_id, client_secret, timeout,
+                 concurrency=4):
         self.base_url = base_url
         self.oauth_url = oauth_url
         self.client_id = client_id
         self.client_secret = client_secret
         self.timeout = timeout
+        self.concurrency = concurrency
+        # Keep connections alive, shared by the threads of _map().
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=max(concurrency, 10))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def get_video(self, id):
         try:
@@ -41,6 +54,10 @@ class CMSAPI(object):
     def get_video_sources(self, id):
         return self._request('GET /videos/%s/sources' % id)
 
+    def get_many_video_sources(self, ids):
+        ids = list(ids)
+        return dict(zip(ids, self._map(self.get_video_sources, ids)))
+
     def update_video(self, bcvideo):
         self._request('PATCH /videos/%s' % bcvideo.id, body=bcvideo.write_data)
 
@@ -87,17 +104,21 @@ class CMSAPI(object):
         return retrieved.values()
 
     def find_videos(self, query, sort='created_at'):
-        # XXX Structurally very similar to get_all_playlists(), refactor?
-        offset = 0
+        # Dear Brightcove, why don't you return total_hits? Since you don't,
+        # we have to ask separately, so we can retrieve the pages in parallel.
+        total = self._request(
+            'GET /counts/videos', params={'q': query}).get('count', 0)
+        offsets = list(range(0, total, self.PAGE_SIZE))
         retrieved = collections.OrderedDict()
+        for batch in self._map(
+                lambda offset: self._find_videos(query, sort, offset),
+                offsets):
+            for data in batch:
+                retrieved[data['id']] = data
+        # Continue with videos that were added after counting.
+        offset = len(offsets) * self.PAGE_SIZE
         while True:
-            batch = self._request('GET /videos', params={
-                'q': query,
-                'sort': sort,
-                'offset': offset,
-                'limit': 20,
-            })
-            # Dear Brightcove, why don't you return total_hits?
+            batch = self._find_videos(query, sort, offset)
             if not batch:
                 break
             offset += len(batch)
@@ -105,6 +126,24 @@ class CMSAPI(object):
                 retrieved[data['id']] = data
         return retrieved.values()
 
+    def _find_videos(self, query, sort, offset):
+        return self._request('GET /videos', params={
+            'q': query,
+            'sort': sort,
+            'offset': offset,
+            'limit': self.PAGE_SIZE,
+        })
+
+    def _map(self, func, items):
+        """Calls `func` for each of `items`, with up to `concurrency`
+        requests in parallel. Returns the results in order."""
+        if self.concurrency <= 1 or len(items) <= 1:
+            return [func(x) for x in items]
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.concurrency,
+                thread_name_prefix='brightcove') as pool:
+            return list(pool.map(func, items))
+
     # Helper functions to register our notification webhook,
     # see <https://support.brightcove.com/cms-api-notifications>
     def get_subscriptions(self):
@@ -127,11 +166,20 @@ class CMSAPI(object):
         log.info('%s%s', request, ' (retry)' if _retries else '')
 
         try:
-            response = requests.request(
-                verb.lower(), self.base_url + path, json=body, params=params,
-                headers={'Authorization': 'Bearer %s' % self._access_token},
-                timeout=self.timeout)
-            log.debug(dump_request(response))
+            for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+                response = self.session.request(
+                    verb.lower(), self.base_url + path, json=body,
+                    params=params, headers={
+                        'Authorization': 'Bearer %s' % self._access_token},
+                    timeout=self.timeout)
+                log.debug(dump_request(response))
+                if (response.status_code != 429 or
+                        attempt == self.MAX_RATE_LIMIT_RETRIES):
+                    break
+                delay = self._rate_limit_delay(response, attempt)
+                log.warning('%s was rate limited, retrying in %s seconds',
+                            request, delay)
+                time.sleep(delay)
             response.raise_for_status()
         except requests.exceptions.RequestException as err:
             status = getattr(err.response, 'status_code', 510)
@@ -160,10 +208,17 @@ class CMSAPI(object):
             log.error('%s returned invalid json %r', request, response.text)
             raise ValueError('No valid JSON found for %s' % request)
 
+    @staticmethod
+    def _rate_limit_delay(response, attempt):
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, TypeError, ValueError):
+            return 2 ** attempt
+
     def _retrieve_access_token(self):
         # See <http://docs.brightcove.com/en/video-cloud/oauth-api
         #      /getting-started/oauth-api-overview.html>
-        response = requests.post(
+        response = self.session.post(
             self.oauth_url + '/access_token',
             data={'grant_type': 'client_credentials'},
             auth=(self.client_id, self.client_secret),
@@ -180,7 +235,8 @@ def cms_from_product_config():
         config['oauth-url'],
         config['client-id'],
         config['client-secret'],
-        float(config['timeout'])
+        float(config['timeout']),
+        int(config.get('concurrency', 4))
     )
 
 
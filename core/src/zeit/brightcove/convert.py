@@ -78,9 +78,11 @@ class Video(Converter):
     @classmethod
     def find_last_modified(cls, hours):
         api = zope.component.getUtility(zeit.brightcove.interfaces.ICMSAPI)
+        videos = list(api.find_videos('updated_at:-%sh' % hours))
+        sources = api.get_many_video_sources([x['id'] for x in videos])
         result = []
-        for data in api.find_videos('updated_at:-%sh' % hours):
-            data['sources'] = api.get_video_sources(data['id'])
+        for data in videos:
+            data['sources'] = sources[data['id']]
             result.append(cls.from_bc(data))
         return result
 
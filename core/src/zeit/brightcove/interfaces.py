@@ -12,6 +12,14 @@ class ICMSAPI(zope.interface.Interface):
     def get_video_sources(id):
         """Returns a list of dicts with data about video sources/renditions."""
 
+    def get_many_video_sources(ids):
+        """Returns a dict that maps each of the given video ids to its
+        sources (see `get_video_sources`), retrieved in parallel."""
+
+    def find_videos(query, sort='created_at'):
+        """Returns a list of dicts with the metadata of all videos matching
+        the search `query`."""
+
     def update_video(bcvideo):
         """Updates the video metadata."""
 
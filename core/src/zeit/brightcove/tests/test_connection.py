@@ -41,7 +41,7 @@ class CMSAPI(unittest.TestCase):
     def test_auth_failed_retries_request(self):
         api = zeit.brightcove.connection.CMSAPI('', '', '', '', None)
         with mock.patch.object(api, '_retrieve_access_token') as token:
-            with mock.patch('requests.request') as request:
+            with mock.patch('requests.Session.request') as request:
                 token.return_value = 'token'
                 request_calls = []
 
@@ -66,7 +66,7 @@ class CMSAPI(unittest.TestCase):
     def test_aborts_after_max_retries(self):
         api = zeit.brightcove.connection.CMSAPI('', '', '', '', None)
         with mock.patch.object(api, '_retrieve_access_token') as token:
-            with mock.patch('requests.request') as request:
+            with mock.patch('requests.Session.request') as request:
                 token.return_value = ''
                 request.side_effect = requests.exceptions.RequestException()
                 request.side_effect.response = mock.Mock()
@@ -95,6 +95,49 @@ class CMSAPI(unittest.TestCase):
             self.assertEqual(
                 5, request.call_args_list[3][1]['params']['offset'])
 
+    def test_paginates_through_videos_in_parallel(self):
+        api = zeit.brightcove.connection.CMSAPI('', '', '', '', None)
+        api.PAGE_SIZE = 2
+        pages = {
+            0: [{'id': 1}, {'id': 2}],
+            2: [{'id': 2}, {'id': 3}],
+            4: [{'id': 5}],
+            6: [{'id': 6}],
+        }
+
+        def request(path, params):
+            if path == 'GET /counts/videos':
+                return {'count': 5}
+            return pages.get(params['offset'], [])
+        with mock.patch.object(api, '_request') as _request:
+            _request.side_effect = request
+            result = api.find_videos('updated_at:-1h')
+        self.assertEqual([1, 2, 3, 5, 6], [x['id'] for x in result])
+        self.assertEqual(
+            [0, 2, 4, 6, 7], sorted(x[1]['params']['offset'] for x in
+                                    _request.call_args_list[1:]))
+
+    def test_retrieves_sources_of_many_videos(self):
+        api = zeit.brightcove.connection.CMSAPI('', '', '', '', None)
+        with mock.patch.object(api, '_request') as request:
+            request.side_effect = lambda path: [path]
+            self.assertEqual({
+                'one': ['GET /videos/one/sources'],
+                'two': ['GET /videos/two/sources'],
+            }, api.get_many_video_sources(['one', 'two']))
+
+    def test_rate_limit_waits_and_retries_request(self):
+        api = zeit.brightcove.connection.CMSAPI('', '', '', '', None)
+        limited = mock.MagicMock(status_code=429, headers={'Retry-After': '3'})
+        ok = mock.MagicMock(status_code=200)
+        ok.json.return_value = {'ok': True}
+        with mock.patch('requests.Session.request') as request, \
+                mock.patch('time.sleep') as sleep:
+            request.side_effect = [limited, ok]
+            self.assertEqual({'ok': True}, api._request('GET /foo'))
+        sleep.assert_called_with(3.0)
+        self.assertEqual(2, request.call_count)
+
 
 class PlayerAPI(unittest.TestCase):
 
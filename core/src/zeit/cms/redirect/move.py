@@ -35,4 +35,5 @@ def store_redirect(context, event):
     zeit.cms.redirect.interfaces.IRenameInfo(
         context).previous_uniqueIds += (old_id,)
     # We need to update objects referencing the old name.
-    zeit.cms.relation.corehandlers.update_referencing_objects.delay(old_id)
+    zeit.cms.relation.corehandlers.schedule_update_referencing_objects(
+        old_id)
@@ -1,11 +1,15 @@
 from zeit.cms.content.sources import FEATURE_TOGGLES
 import grokcore.component as grok
 import logging
+import pendulum
+import transaction
 import zeit.cms.celery
 import zeit.cms.checkout.helper
 import zeit.cms.checkout.interfaces
 import zeit.cms.interfaces
 import zeit.cms.relation.interfaces
+import zeit.cms.workflow.interfaces
+import zope.app.appsetup.product
 import zope.component
 
 
@@ -44,8 +48,24 @@ class Dummy(object):
     uniqueId = None
 
 
+def config():
+    return zope.app.appsetup.product.getProductConfiguration(
+        'zeit.cms') or {}
+
+
+def schedule_update_referencing_objects(uniqueId):
+    """Updates the objects referencing `uniqueId` after a delay, so repeated
+    changes of the same object within that time are handled together:
+    referencing objects that were already cycled after a change are skipped
+    (see `cycle_referencing_objects`).
+    """
+    update_referencing_objects.apply_async(
+        (uniqueId, pendulum.now('UTC').isoformat()),
+        countdown=int(config().get('update-referencing-delay', 0)))
+
+
 @zeit.cms.celery.task
-def update_referencing_objects(uniqueId):
+def update_referencing_objects(uniqueId, requested=None):
     # As we want to use this function as celery task, we need a serializable
     # argument, i.e. no ICMSContent object. In fact we do not need a complete
     # ICMSContent object at all at this point, only a dummy with an attribute
@@ -55,14 +75,54 @@ def update_referencing_objects(uniqueId):
     # so adapting to ``ICMSContent`` will not do the job.
     context = Dummy()
     context.uniqueId = uniqueId
+    if requested is None:
+        requested = pendulum.now('UTC').isoformat()
 
     relations = zope.component.getUtility(
         zeit.cms.relation.interfaces.IRelations)
-    relating_objects = relations.get_relations(context)
-    for related_object in list(relating_objects):
+    ids = sorted(relations.get_relation_ids(context))
+    if not ids:
+        return
+    # Each task cycles its share of referencing objects one after the other,
+    # so this limits how many are cycled in parallel.
+    workers = min(len(ids), int(config().get('update-referencing-workers', 4)))
+    log.info('Updating %s objects referencing %s in %s tasks',
+             len(ids), uniqueId, workers)
+    for i in range(workers):
+        cycle_referencing_objects.delay(uniqueId, ids[i::workers], requested)
+
+
+@zeit.cms.celery.task(bind=True)
+def cycle_referencing_objects(self, uniqueId, ids, requested):
+    """Cycles the first of `ids` in its own transaction (so it can be retried
+    on its own), then schedules the remaining ones."""
+    current, remaining = ids[0], ids[1:]
+    content = zeit.cms.interfaces.ICMSContent(current, None)
+    if content is None:
+        log.warning('Could not resolve %s, ignoring.', current)
+    elif _cycled_since(content, requested):
+        log.info('Skipping %s, it was already cycled after %s changed',
+                 current, uniqueId)
+    else:
         log.info(
-            'Cycling %s to update referenced metadata (caused by %s)',
-            related_object.uniqueId, context.uniqueId)
-        # the actual work is done by IBeforeCheckin-handlers
-        zeit.cms.checkout.helper.with_checked_out(
-            related_object, lambda x: True)
+            'Cycling %s to update referenced metadata (caused by %s), '
+            '%s remaining', current, uniqueId, len(remaining))
+        try:
+            # the actual work is done by IBeforeCheckin-handlers
+            zeit.cms.checkout.helper.with_checked_out(
+                content, lambda x: True)
+        except Exception:
+            retries = int(config().get('update-referencing-retries', 3))
+            if self.request.retries < retries:
+                raise self.retry(countdown=10 * 2 ** self.request.retries)
+            log.error('Giving up on cycling %s (caused by %s)',
+                      current, uniqueId, exc_info=True)
+            transaction.abort()
+    if remaining:
+        cycle_referencing_objects.delay(uniqueId, remaining, requested)
+
+
+def _cycled_since(content, requested):
+    modified = zeit.cms.workflow.interfaces.IModified(content, None)
+    last = getattr(modified, 'date_last_checkout', None)
+    return last is not None and last > pendulum.parse(requested)
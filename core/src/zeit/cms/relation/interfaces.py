@@ -14,6 +14,10 @@ class IRelations(zope.interface.Interface):
     def get_relations(obj):
         """return objects that reference `obj`."""
 
+    def get_relation_ids(obj):
+        """return uniqueIds of the objects that reference `obj`, without
+        loading them. May contain objects that no longer exist."""
+
     def add_index(element, multiple=False):
         """add a value index for given element."""
 
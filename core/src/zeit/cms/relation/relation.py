@@ -30,6 +30,14 @@ class Relations(persistent.Persistent):
         return (obj for obj in self._catalog.findRelations({index: token})
                 if obj is not None)
 
+    def get_relation_ids(self, obj):
+        index = 'referenced_by'
+        token = list(self._catalog.tokenizeValues([obj], index))[0]
+        if token is None:
+            return ()
+        # Relation tokens are uniqueIds, see _dump_content()
+        return self._catalog.findRelationTokens({index: token})
+
     def add_index(self, element, multiple=False):
         """add a value index for given element."""
         self._catalog.addValueIndex(
@@ -1,5 +1,6 @@
 from unittest import mock
 import transaction
+import zeit.cms.checkout.helper
 import zeit.cms.repository.interfaces
 import zeit.cms.testing
 import zeit.cms.related.interfaces
@@ -24,7 +25,59 @@ class CorehandlerTest(zeit.cms.testing.ZeitCmsTestCase):
         delay = 'z3c.celery.celery.TransactionAwareTask.delay'
         with mock.patch(delay) as delay:
             zeit.cms.relation.corehandlers.update_referencing_objects(
-                self.repository['parent'])
+                'http://xml.zeit.de/parent', '2019-01-01T00:00:00+00:00')
             transaction.commit()
+        self.assertEqual(1, len(delay.call_args_list))
+        self.assertEqual(
+            ('http://xml.zeit.de/parent', ['http://xml.zeit.de/reference'],
+             '2019-01-01T00:00:00+00:00'), delay.call_args[0])
 
+        with mock.patch(delay) as delay:
+            zeit.cms.relation.corehandlers.cycle_referencing_objects(
+                'http://xml.zeit.de/parent', ['http://xml.zeit.de/reference'],
+                '2019-01-01T00:00:00+00:00')
+            transaction.commit()
         self.assertEqual(0, len(delay.call_args_list))
+
+
+class CycleReferencingObjectsTest(zeit.cms.testing.ZeitCmsTestCase):
+
+    def setUp(self):
+        from zeit.cms.testcontenttype.testcontenttype import ExampleContentType
+        super().setUp()
+        self.repository['one'] = ExampleContentType()
+        self.repository['two'] = ExampleContentType()
+        self.cycle = zeit.cms.relation.corehandlers.cycle_referencing_objects
+
+    def test_distributes_referencing_objects_to_tasks(self):
+        relations = mock.Mock()
+        relations.get_relation_ids.return_value = ['c', 'a', 'e', 'b', 'd']
+        with mock.patch('zope.component.getUtility', return_value=relations):
+            with mock.patch.object(self.cycle, 'delay') as delay:
+                zeit.cms.relation.corehandlers.update_referencing_objects(
+                    'http://xml.zeit.de/target', 'now')
+        self.assertEqual([
+            mock.call('http://xml.zeit.de/target', ['a', 'e'], 'now'),
+            mock.call('http://xml.zeit.de/target', ['b'], 'now'),
+            mock.call('http://xml.zeit.de/target', ['c'], 'now'),
+            mock.call('http://xml.zeit.de/target', ['d'], 'now'),
+        ], delay.call_args_list)
+
+    def test_cycles_first_object_and_schedules_the_rest(self):
+        with mock.patch('zeit.cms.checkout.helper.with_checked_out') as cycle:
+            with mock.patch.object(self.cycle, 'delay') as delay:
+                self.cycle('http://xml.zeit.de/target', [
+                    'http://xml.zeit.de/one', 'http://xml.zeit.de/two'],
+                    '2019-01-01T00:00:00+00:00')
+        self.assertEqual(self.repository['one'], cycle.call_args[0][0])
+        delay.assert_called_with(
+            'http://xml.zeit.de/target', ['http://xml.zeit.de/two'],
+            '2019-01-01T00:00:00+00:00')
+
+    def test_skips_objects_that_were_cycled_after_the_change(self):
+        zeit.cms.checkout.helper.with_checked_out(
+            self.repository['one'], lambda x: True)
+        with mock.patch('zeit.cms.checkout.helper.with_checked_out') as cycle:
+            self.cycle('http://xml.zeit.de/target', [
+                'http://xml.zeit.de/one'], '2019-01-01T00:00:00+00:00')
+        self.assertFalse(cycle.called)
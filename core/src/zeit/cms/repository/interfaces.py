@@ -88,6 +88,14 @@ class IRepository(zope.interface.Interface):
 
         """
 
+    def prefetch(unique_ids):
+        """Tell the repository that the given unique_ids will be needed soon.
+
+        If the connector supports it, their data is loaded in bulk, instead of
+        one request per object when they are resolved one by one later on.
+
+        """
+
     def addContent(object, ignore_conflicts=False):
         """Add content to the repository.
 
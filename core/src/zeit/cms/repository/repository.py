@@ -304,6 +304,18 @@ class Repository(persistent.Persistent, Container):
             self.uncontained_content[unique_id] = content
         return content
 
+    def prefetch(self, unique_ids):
+        connector = self.connector
+        if not zeit.connector.interfaces.ICachingConnector.providedBy(
+                connector):
+            return
+        unique_ids = [self._get_normalized_unique_id(x) for x in unique_ids
+                      if isinstance(x, six.string_types)]
+        unique_ids = [x for x in unique_ids
+                      if x not in self.uncontained_content]
+        if unique_ids:
+            connector.prefetch(unique_ids)
+
     def addContent(self, content, ignore_conflicts=False):
         zope.event.notify(
             zeit.cms.repository.interfaces.BeforeObjectAddEvent(content))
@@ -2,10 +2,12 @@ from functools import total_ordering
 from gocept.cache.method import Memoize as memoize
 from io import BytesIO
 import BTrees
+import BTrees.Length
 import ZODB.POSException
 import ZODB.blob
 import collections.abc
 import gocept.lxml.objectify
+import itertools
 import logging
 import lxml.objectify
 import os
@@ -52,6 +54,19 @@ class SlottedStringRef(StringRef):
 INVALID_ETAG = object()
 
 
+def spooled_copy(data, buffer_size=10 * 1024):
+    """Copy file-like `data` without reading it into memory at once. Small
+    bodies stay in memory, large ones are spooled to disk."""
+    f = tempfile.SpooledTemporaryFile(
+        max_size=buffer_size, prefix='zeit.connector.cache.')
+    s = data.read(buffer_size)
+    while s:
+        f.write(s)
+        s = data.read(buffer_size)
+    f.seek(0)
+    return f
+
+
 class Body(persistent.Persistent):
 
     BUFFER_SIZE = 10 * 1024
@@ -123,19 +138,59 @@ class Body(persistent.Persistent):
 
 
 class AccessTimes(object):
+    """Keeps track of when cache entries were last accessed, so entries can
+    be evicted when they have not been used for a while, or when the cache
+    grows too large.
+
+    Access times are stored with a granularity of `UPDATE_INTERVAL`. Reads do
+    not write to the database directly, but are collected in memory and
+    flushed in batches (at most every `ACCESS_FLUSH_INTERVAL` seconds or
+    `ACCESS_FLUSH_SIZE` entries). Accesses that have not been flushed when the
+    object is ghosted are lost, which only means the entry might be evicted
+    somewhat earlier.
+    """
 
     UPDATE_INTERVAL = NotImplemented
+    ACCESS_FLUSH_SIZE = 100
+    ACCESS_FLUSH_INTERVAL = 60
+    EVICT_BATCH_SIZE = 100
 
     def __init__(self):
         self._last_access_time = BTrees.family64.OI.BTree()
         self._access_time_to_ids = BTrees.family32.IO.BTree()
+        self._entry_count = BTrees.Length.Length()
 
-    def _update_cache_access(self, key):
-        last_access_time = self._last_access_time.get(key, 0)
+    def _update_cache_access(self, key, flush=False):
         new_access_time = self._get_time_key(time.time())
+        if self._last_access_time.get(key) == new_access_time:
+            return
+        pending = getattr(self, '_v_pending_access', None)
+        if pending is None:
+            pending = self._v_pending_access = {}
+            self._v_pending_access_since = time.time()
+        pending[key] = new_access_time
+        if (flush or len(pending) >= self.ACCESS_FLUSH_SIZE or
+                time.time() - self._v_pending_access_since >
+                self.ACCESS_FLUSH_INTERVAL):
+            self.flush_access_times()
+
+    def flush_access_times(self):
+        pending = getattr(self, '_v_pending_access', None)
+        self._v_pending_access = None
+        if not pending:
+            return
+        for key, access_time in pending.items():
+            self._set_access_time(key, access_time)
+
+    def _set_access_time(self, key, new_access_time):
+        last_access_time = self._last_access_time.get(key)
+        if last_access_time == new_access_time:
+            return
 
         old_set = None
-        if last_access_time / 10e6 < 10e6:
+        if last_access_time is None:
+            self._entries.change(1)
+        elif last_access_time / 10e6 < 10e6:
             # Ignore old access times. This is to allow an update w/o downtime.
             old_set = self._access_time_to_ids.get(last_access_time)
 
@@ -145,68 +200,102 @@ class AccessTimes(object):
             new_set = self._access_time_to_ids[new_access_time] = (
                 BTrees.family32.OI.TreeSet())
 
-        if old_set != new_set:
-            if old_set is not None:
+        if old_set is not None:
+            try:
+                old_set.remove(key)
+            except KeyError:
+                pass
+        new_set.insert(key)
+        self._last_access_time[key] = new_access_time
+
+    def _remove_access_time(self, key):
+        pending = getattr(self, '_v_pending_access', None)
+        if pending:
+            pending.pop(key, None)
+        access_time = self._last_access_time.pop(key, None)
+        if access_time is None:
+            return
+        self._entries.change(-1)
+        ids = self._access_time_to_ids.get(access_time)
+        if ids is not None:
+            try:
+                ids.remove(key)
+            except KeyError:
+                pass
+
+    @property
+    def _entries(self):
+        entries = getattr(self, '_entry_count', None)
+        if entries is None:
+            # Legacy, created before the entries were counted.
+            entries = self._entry_count = BTrees.Length.Length(
+                len(self._last_access_time))
+        return entries
+
+    def evict(self, cache_timeout=None, max_entries=None, batch_size=None):
+        """Remove at most `batch_size` entries, oldest first, that have not
+        been accessed for `cache_timeout` seconds, or that exceed
+        `max_entries`. Returns the number of evicted entries.
+
+        Does not commit, so callers can control the transaction size.
+        """
+        if batch_size is None:
+            batch_size = self.EVICT_BATCH_SIZE
+        self.flush_access_times()
+        timeout = None
+        if cache_timeout is not None:
+            timeout = self._get_time_key(time.time() - cache_timeout)
+        excess = 0
+        if max_entries is not None:
+            excess = max(0, self._entries() - max_entries)
+
+        evicted = 0
+        while evicted < batch_size:
+            try:
+                access_time = self._access_time_to_ids.minKey()
+            except ValueError:
+                break  # empty
+            if timeout is not None and access_time <= timeout:
+                limit = batch_size
+            else:
+                limit = min(batch_size, excess)
+            if evicted >= limit:
+                break
+            ids = self._access_time_to_ids[access_time]
+            for key in list(itertools.islice(ids, limit - evicted)):
+                ids.remove(key)
+                if self._last_access_time.get(key, access_time) != (
+                        access_time):
+                    # Stale membership, the entry was accessed later on.
+                    continue
+                log.info('Evicting %s', key)
                 try:
-                    old_set.remove(key)
+                    self.remove(key)
                 except KeyError:
-                    pass
-
-            new_set.insert(key)
-            self._last_access_time[key] = new_access_time
-
-    def sweep(self, cache_timeout=(7 * 24 * 3600)):
-        start = 0
-        timeout = self._get_time_key(time.time() - cache_timeout)
+                    pass  # already gone
+                evicted += 1
+            if not ids:
+                del self._access_time_to_ids[access_time]
+        return evicted
+
+    def sweep(self, cache_timeout=(7 * 24 * 3600), max_entries=None):
+        """Evict old entries (and the oldest ones beyond `max_entries`) in
+        small batches, committing after each batch."""
+        retries = 0
         while True:
             try:
-                access_time = next(iter(self._access_time_to_ids.keys(
-                    min=start, max=timeout)))
-                id_set = []
-                # For reasons unknown we sometimes get "the bucket being
-                # iterated changed size" here, which according to
-                # http://mail.zope.org/pipermail/zodb-dev/2004-June/007452.html
-                # "can never happen". So we try to sweep all the IDs we can and
-                # leave the rest to rot, rather than get stuck on one broken
-                # access_time bucket and not be able to sweep anything after it
-                try:
-                    for id in self._access_time_to_ids[access_time]:
-                        id_set.append(id)
-                except RuntimeError:
-                    pass
-                try:
-                    i = 0
-                    retries = 0
-                    while i < len(id_set):
-                        id = id_set[i]
-                        i += 1
-                        log.info('Evicting %s', id)
-                        self._last_access_time.pop(id, None)
-                        try:
-                            self.remove(id)
-                        except KeyError:
-                            pass  # already gone
-                        if i % 100 == 0:
-                            try:
-                                log.info('Sub-commit')
-                                transaction.commit()
-                            except ZODB.POSException.ConflictError:
-                                if retries == 3:
-                                    raise RuntimeError('Too many retries')
-                                log.info('ConflictError, retrying')
-                                transaction.abort()
-                                retries += 1
-                                i -= 100
-                    self._access_time_to_ids.pop(access_time, None)
-                    start = access_time
-                except Exception:
-                    start = access_time + 1
-                    log.info('Abort %s', access_time, exc_info=True)
-                    transaction.abort()
-                else:
-                    log.info('Commit %s', access_time)
-                    transaction.commit()
-            except StopIteration:
+                evicted = self.evict(cache_timeout, max_entries)
+                transaction.commit()
+            except ZODB.POSException.ConflictError:
+                if retries == 3:
+                    raise
+                log.info('ConflictError, retrying', exc_info=True)
+                transaction.abort()
+                retries += 1
+                continue
+            retries = 0
+            log.info('Evicted %s entries', evicted)
+            if evicted < self.EVICT_BATCH_SIZE:
                 break
 
     def _get_time_key(self, time):
@@ -254,8 +343,7 @@ class ResourceCache(AccessTimes, persistent.Persistent):
         if current_etag is None:
             # When we have no etag, we must not store the data as we have no
             # means of invalidation then.
-            f = BytesIO(data.read())
-            return f
+            return spooled_copy(data)
 
         log.debug('Storing body of %s with etag %s' % (
             unique_id, current_etag))
@@ -266,11 +354,12 @@ class ResourceCache(AccessTimes, persistent.Persistent):
             self._data[key] = store = Body()
         store.update(data, current_etag)
 
-        self._update_cache_access(key)
+        self._update_cache_access(key, flush=True)
         return store.open()
 
     def remove(self, unique_id):
         key = get_storage_key(unique_id)
+        self._remove_access_time(key)
         self._data.pop(key, None)
 
 
@@ -321,7 +410,9 @@ class PersistentCache(AccessTimes, persistent.Persistent):
             self.remove(key)
 
     def remove(self, key):
-        del self._storage[get_storage_key(key)]
+        skey = get_storage_key(key)
+        self._remove_access_time(skey)
+        del self._storage[skey]
 
     def __setitem__(self, key, value):
         skey = get_storage_key(key)
@@ -331,7 +422,7 @@ class PersistentCache(AccessTimes, persistent.Persistent):
         else:
             value = self.CACHE_VALUE_CLASS(value)
             self._storage[skey] = value
-        self._update_cache_access(skey)
+        self._update_cache_access(skey, flush=True)
 
     def _is_deleted(self, value):
         return zeit.connector.interfaces.DeleteProperty in value
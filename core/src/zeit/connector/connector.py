@@ -1,9 +1,11 @@
 """Connect to the CMS backend."""
 
 from io import BytesIO
+import collections
 import datetime
 import gocept.cache.property
 import gocept.lxml.objectify
+import hashlib
 import logging
 import pytz
 import re
@@ -12,9 +14,12 @@ import six.moves.http_client
 import six.moves.urllib.parse
 import sys
 import threading
+import time
 import zeit.connector.cache
+import zeit.connector.dav.davbase
 import zeit.connector.dav.davconnection
 import zeit.connector.dav.davresource
+import zeit.connector.dav.pool
 import zeit.connector.interfaces
 import zeit.connector.resource
 import zeit.connector.search
@@ -71,6 +76,42 @@ def _abs2timeout(time):
     return max(d.days * 86400 + d.seconds + int(d.microseconds / 1000000.0), 1)
 
 
+BUFFER_SIZE = 64 * 1024
+
+
+def body_hash(data):
+    """Return a hash of the contents of the file-like `data`, reading it in
+    chunks so memory usage is bounded regardless of its size."""
+    if hasattr(data, 'seek'):
+        data.seek(0)
+    result = hashlib.sha1()
+    for chunk in iter(lambda: data.read(BUFFER_SIZE), b''):
+        result.update(chunk)
+    return result.hexdigest()
+
+
+class HashingReader(object):
+    """File-like wrapper that hashes the data while it is read (e.g. by
+    httplib when sending a request body)."""
+
+    def __init__(self, data):
+        self.data = data
+        self.hash = hashlib.sha1()
+
+    def read(self, size=-1):
+        chunk = self.data.read(size)
+        self.hash.update(chunk)
+        return chunk
+
+    def seek(self, offset, whence=0):
+        # Raises AttributeError for non-seekable data, i.e. cannot be resent.
+        self.data.seek(offset, whence)
+        self.hash = hashlib.sha1()
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
 class CannonicalId(six.text_type):
     """A canonical id."""
 
@@ -78,6 +119,52 @@ class CannonicalId(six.text_type):
         return '<CannonicalId %s>' % super(CannonicalId, self).__repr__()
 
 
+class CanonicalIdCache(object):
+    """Remembers the canonical id of resources that are not in the property
+    cache, and whether they exist at all, so we don't need a HEAD request to
+    find out each time.
+
+    Entries expire after `ttl` seconds, or `negative_ttl` for resources that
+    do not exist (which might be created by another process any time). At
+    most `size` entries are kept, the least recently used ones are dropped.
+    """
+
+    def __init__(self, size=10000, ttl=300, negative_ttl=10):
+        self.size = size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, id):
+        """Return (canonical_id, exists) or raise KeyError."""
+        key = id.rstrip('/')
+        with self._lock:
+            canonical_id, exists, expires = self._data[key]
+            if expires < time.time():
+                del self._data[key]
+                raise KeyError(id)
+            self._data.move_to_end(key)
+        return canonical_id, exists
+
+    def set(self, id, canonical_id, exists):
+        ttl = self.ttl if exists else self.negative_ttl
+        with self._lock:
+            self._data[id.rstrip('/')] = (
+                canonical_id, exists, time.time() + ttl)
+            self._data.move_to_end(id.rstrip('/'))
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, id):
+        with self._lock:
+            self._data.pop(id.rstrip('/'), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
 @zope.interface.implementer(zeit.connector.interfaces.ICachingConnector)
 class Connector(object):
     """Connect to the CMS backend.
@@ -86,12 +173,26 @@ class Connector(object):
 
     long_name = u'DAV connector'
 
-    def __init__(self, roots={}, prefix=u'http://xml.zeit.de/'):
+    def __init__(self, roots={}, prefix=u'http://xml.zeit.de/',
+                 pool_size=10, pool_idle_timeout=60, max_requests=None,
+                 prefetch_min_siblings=5, prefetch_min_fraction=0.1):
         # NOTE: roots['default'] should be defined
         # "extra" roots, a dict. ATM only xroots['search']
         self._roots = roots
         self._prefix = prefix
         self.connections = threading.local()
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.max_requests = max_requests
+        # prefetch() only issues a depth-1 PROPFIND on a parent collection if
+        # at least this many of the requested ids live in it, and, if we know
+        # the parent's children, they make up at least this fraction of them.
+        # Otherwise the ids are left to be resolved on demand, which is
+        # cheaper than transferring (and caching) a whole large folder.
+        self.prefetch_min_siblings = prefetch_min_siblings
+        self.prefetch_min_fraction = prefetch_min_fraction
+        self._pools = {}
+        self._pools_lock = threading.Lock()
 
     def get_connection(self, root='default'):
         """Try to get a cached connection suitable for url"""
@@ -103,25 +204,45 @@ class Connector(object):
         return connection
 
     def create_connection(self, root):
-        """Create a new connection."""
+        """Get a connection from the pool, or create a new one."""
+        return self.get_pool(root).get()
+
+    def get_pool(self, root='default'):
+        with self._pools_lock:
+            pool = self._pools.get(root)
+            if pool is None:
+                pool = self._pools[root] = (
+                    zeit.connector.dav.pool.ConnectionPool(
+                        lambda: self._connect(root),
+                        self.pool_size, self.pool_idle_timeout,
+                        self.max_requests))
+        return pool
+
+    def pool_statistics(self):
+        with self._pools_lock:
+            pools = list(self._pools.items())
+        return {root: pool.statistics() for root, pool in pools}
+
+    def _connect(self, root):
         logger.debug('New connection')
-        url = self._roots[root]
+        url = self._roots.get(root, self._roots['default'])
         (scheme, netloc) = six.moves.urllib.parse.urlsplit(url)[0:2]
         try:  # grmblmmblpython
             host, port = netloc.split(':', 1)
             port = int(port)
         except ValueError:
             host, port = netloc, None
-        # FIXME: DAVConnection should take schema as well. There is no HTTPS
-        # supported like this:
+        if scheme == 'https':
+            return zeit.connector.dav.davconnection.DAVSConnection(host, port)
         return zeit.connector.dav.davconnection.DAVConnection(host, port)
 
     def disconnect(self):
+        """Return the connections of the current thread to the pool."""
         connections = self.connections
-        try:
-            del connections.default
-        except AttributeError:
-            pass
+        for root in list(vars(connections)):
+            connection = getattr(connections, root)
+            delattr(connections, root)
+            self.get_pool(root).put(connection)
 
     def listCollection(self, id):
         """List the filenames of a collection identified by <id> (see[8]). """
@@ -224,6 +345,9 @@ class Connector(object):
         """Return the resource identified by `id`."""
         __traceback_info__ = (id, )
         id = self._get_cannonical_id(id)
+        if self._known_missing(id):
+            raise KeyError(
+                "The resource %r does not exist." % six.text_type(id))
         try:
             content_type = self._get_resource_properties(id).get(
                 ('getcontenttype', 'DAV:'))
@@ -264,6 +388,70 @@ class Connector(object):
             return False
         return True
 
+    def prefetch(self, ids, body=False):
+        """Warm the caches for many resources with as few requests as
+        possible.
+
+        Uncached ids are grouped by their parent collection, and each parent
+        is fetched with a single depth-1 PROPFIND, which yields the properties
+        of all its children at once.
+        """
+        ids = list(ids)  # Iterated twice, so generators are fine as well.
+        by_parent = collections.OrderedDict()
+        for id in ids:
+            if not id.startswith(self._prefix) or id == self._prefix:
+                continue
+            id = id.rstrip('/')
+            if (self.property_cache.get(id) is not None or
+                    self.property_cache.get(id + '/') is not None):
+                continue
+            parent = self._id_splitlast(id)[0]
+            by_parent.setdefault(parent, []).append(id)
+
+        for parent, children in by_parent.items():
+            if len(children) < self.prefetch_min_siblings:
+                continue
+            try:
+                siblings = len(self.child_name_cache[parent])
+            except KeyError:
+                pass
+            else:
+                if len(children) < self.prefetch_min_fraction * siblings:
+                    continue
+            __traceback_info__ = (parent,)
+            logger.debug('Prefetching %s children of %s' % (
+                len(children), parent))
+            davres = self._get_dav_resource(parent)
+            try:
+                davres.update(depth=1)
+            except (zeit.connector.dav.interfaces.DAVNotFoundError,
+                    zeit.connector.dav.interfaces.DAVRedirectError):
+                continue
+            self._update_property_cache(davres)
+            self._update_child_id_cache(davres)
+
+        if not body:
+            return
+        for id in ids:
+            try:
+                id = self._get_cannonical_id(id)
+                if not id.endswith('/'):
+                    self._get_resource_body(id)
+            except (ValueError,
+                    zeit.connector.dav.interfaces.DAVNotFoundError,
+                    zeit.connector.dav.interfaces.DAVBadRequestError):
+                continue
+
+    def get_many(self, ids, body=False):
+        self.prefetch(ids, body=body)
+        result = collections.OrderedDict()
+        for id in ids:
+            try:
+                result[id] = self[id]
+            except KeyError:
+                continue
+        return result
+
     def add(self, object, verify_etag=True):
         resource = zeit.connector.interfaces.IResource(object)
         id = self._get_cannonical_id(resource.id)
@@ -297,7 +485,7 @@ class Connector(object):
             if not (resolve_conflicts and
                     'httpd/unix-directory' not in (source.contentType,
                                                    target.contentType) and
-                    source.data.read() == self[new_id].data.read()):
+                    body_hash(source.data) == body_hash(target.data)):
                 raise exception(
                     old_id,
                     "Could not copy or move %s to %s, "
@@ -537,12 +725,11 @@ class Connector(object):
                                   datetime.timedelta(seconds=60))
         try:
             if not iscoll:  # We are a file resource:
-                if hasattr(resource.data, 'seek'):
-                    resource.data.seek(0)
-                # We should pass the data as IO object. This is not supported
-                # out of the box by httplib (which is used in DAV). We could
-                # override the send method though.
-                data = resource.data.read()
+                # Stream the body to the server instead of reading it into
+                # memory, httplib sends file-like bodies in chunks.
+                data = resource.data
+                if hasattr(data, 'seek'):
+                    data.seek(0)
                 etag = None
                 if verify_etag:
                     etag = resource.properties.get(('getetag', 'DAV:'))
@@ -553,14 +740,27 @@ class Connector(object):
                     zeit.connector.interfaces.UUID_PROPERTY)
                 if uuid:
                     headers['Zeit-DocID'] = uuid
+                if isinstance(data, six.binary_type):
+                    body = data
+                else:
+                    length = zeit.connector.dav.davbase.body_length(data)
+                    if length is not None:
+                        headers['Content-Length'] = str(length)
+                    body = HashingReader(data)
 
                 try:
-                    conn.put(self._id2loc(id), data,
+                    conn.put(self._id2loc(id), body,
                              mime_type=resource.contentType,
                              locktoken=locktoken, etag=etag,
                              extra_headers=headers)
                 except zeit.connector.dav.interfaces.PreconditionFailedError:
-                    if self[id].data.read() != data:
+                    if isinstance(body, six.binary_type):
+                        digest = hashlib.sha1(body).hexdigest()
+                    else:
+                        # The body has been sent completely before the
+                        # response was read, so the hash is complete.
+                        digest = body.hexdigest()
+                    if body_hash(self[id].data) != digest:
                         raise
 
             # Set the resource type from resource.type.
@@ -670,6 +870,27 @@ class Connector(object):
 
     def invalidate_cache(self, id):
         """invalidate cache (and refill)."""
+        self._refresh_cache([id])
+
+    def _refresh_cache(self, ids):
+        """Refill the caches for all `ids`. The properties of a parent
+        collection are refreshed only once, even if several of its children
+        are refreshed. Returns the number of refreshed parents."""
+        parents = []
+        for id in ids:
+            parent = self._refresh_resource(id)
+            if parent is not None and parent not in parents:
+                parents.append(parent)
+        # A collection refreshed itself has up-to-date properties already.
+        parents = [x for x in parents if x not in ids]
+        for parent in parents:
+            self._refresh_parent(parent)
+        return len(parents)
+
+    def _refresh_resource(self, id):
+        """Reload `id` and update the child ids of its parent. Returns the
+        parent if its properties need to be refreshed, too."""
+        self.canonical_id_cache.invalidate(id)
         try:
             # Loads properties from dav and stores when necessary.
             davres = self._get_dav_resource(id)
@@ -697,20 +918,23 @@ class Connector(object):
             # We don't know the parent's child ids. Be sure we don't know the
             # parent's properties eitehr
             self._remove_from_caches(parent, [self.property_cache])
+            return None
+        if exists and id not in children:
+            children.insert(six.text_type(id))
+        elif not exists and id in children:
+            children.remove(id)
+        return parent
+
+    def _refresh_parent(self, parent):
+        try:
+            davres = self._get_dav_resource(parent)
+            if davres._result is None:
+                davres.update(depth=0)
+        except zeit.connector.dav.interfaces.DAVNotFoundError:
+            # Apparently the parent dissapeared somehow.
+            self._invalidate_cache(parent)
         else:
-            if exists and id not in children:
-                children.insert(six.text_type(id))
-            elif not exists and id in children:
-                children.remove(id)
-            try:
-                davres = self._get_dav_resource(parent)
-                if davres._result is None:
-                    davres.update(depth=0)
-            except zeit.connector.dav.interfaces.DAVNotFoundError:
-                # Apparently the parent dissapeared somehow.
-                self._invalidate_cache(parent)
-            else:
-                self._update_property_cache(davres)
+            self._update_property_cache(davres)
 
     def _get_cannonical_id(self, id):
         """Add / for collections if not appended yet."""
@@ -724,13 +948,29 @@ class Connector(object):
             return CannonicalId(id + '/')
         if self.property_cache.get(id) is not None:
             return CannonicalId(id)
+        try:
+            return self.canonical_id_cache.get(id)[0]
+        except KeyError:
+            pass
         dav_resource = zeit.connector.dav.davresource.DAVResource(
             self._id2loc(id), conn=self.get_connection())
         response = dav_resource.head()
         response.read()
         if response.status == 301:
-            return CannonicalId(id + '/')
-        return CannonicalId(id)
+            result = CannonicalId(id + '/')
+        else:
+            result = CannonicalId(id)
+        if response.status in (200, 301, 404):
+            self.canonical_id_cache.set(id, result, response.status != 404)
+        return result
+
+    def _known_missing(self, id):
+        if self.property_cache.get(id) is not None:
+            return False
+        try:
+            return not self.canonical_id_cache.get(id)[1]
+        except KeyError:
+            return False
 
     @staticmethod
     def _id_splitlast(id):
@@ -753,6 +993,10 @@ class Connector(object):
     def child_name_cache(self):
         return zeit.connector.cache.ChildNameCache()
 
+    @zope.cachedescriptors.property.Lazy
+    def canonical_id_cache(self):
+        return CanonicalIdCache()
+
     @classmethod
     def factory(cls):
         import zope.app.appsetup.product
@@ -760,12 +1004,30 @@ class Connector(object):
             'zeit.connector')
         return cls({
             'default': config['document-store'],
-            'search': config['document-store-search']})
+            'search': config['document-store-search']},
+            **pool_settings(config))
 
 
 connector_factory = Connector.factory
 
 
+def pool_settings(config):
+    result = {}
+    if config.get('connection-pool-size'):
+        result['pool_size'] = int(config['connection-pool-size'])
+    if config.get('connection-pool-idle-timeout'):
+        result['pool_idle_timeout'] = int(
+            config['connection-pool-idle-timeout'])
+    if config.get('connection-max-requests'):
+        result['max_requests'] = int(config['connection-max-requests'])
+    if config.get('prefetch-min-siblings'):
+        result['prefetch_min_siblings'] = int(config['prefetch-min-siblings'])
+    if config.get('prefetch-min-fraction'):
+        result['prefetch_min_fraction'] = float(
+            config['prefetch-min-fraction'])
+    return result
+
+
 class TransactionBoundCachingConnector(Connector):
 
     long_name = u'(Transaction-bound) DAV connector'
@@ -779,6 +1041,9 @@ class TransactionBoundCachingConnector(Connector):
     child_name_cache = gocept.cache.property.TransactionBoundCache(
         '_v_child_name_cache', zeit.connector.cache.ChildNameCache)
 
+    canonical_id_cache = gocept.cache.property.TransactionBoundCache(
+        '_v_canonical_id_cache', CanonicalIdCache)
+
 
 transaction_bound_caching_connector_factory = \
     TransactionBoundCachingConnector.factory
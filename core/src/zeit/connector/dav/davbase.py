@@ -7,7 +7,6 @@ import re
 import six
 import six.moves.http_client
 import six.moves.urllib.parse
-import socket
 import sys
 
 # This is for debugging, *NOT TO BE USED IN PRODUCTION*
@@ -28,6 +27,31 @@ class BadAuthTypeError(Exception):
     pass
 
 
+def body_length(body):
+    """Return the number of bytes remaining in the file-like `body`, or None
+    if that cannot be determined (in which case httplib falls back to chunked
+    transfer encoding)."""
+    try:
+        position = body.tell()
+        body.seek(0, 2)
+        end = body.tell()
+        body.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
+
+def rewind(body):
+    """Prepare `body` for sending it again, return False if not possible."""
+    if body is None or isinstance(body, (six.binary_type, six.text_type)):
+        return True
+    try:
+        body.seek(0)
+    except (AttributeError, OSError, ValueError):
+        return False
+    return True
+
+
 class HTTPBasicAuthCon(object):
     """Connection which authenticates.
 
@@ -54,7 +78,8 @@ class HTTPBasicAuthCon(object):
         self.connect()
 
     def connect(self):
-        self._con = self.connect_class(self._host, self._port, self._strict)
+        self._con = self.connect_class(self._host, self._port)
+        self.requests = 0
         if DEBUG_CONNECTION:
             self._con.debuglevel = 1
 
@@ -136,10 +161,13 @@ class HTTPBasicAuthCon(object):
         headers['Connection'] = 'keep-alive'
         headers['User-Agent'] = USER_AGENT
         headers.update(self.additional_headers)
+        self.requests += 1
         try:
             self._con.request(method, path, body, headers)
         except six.moves.http_client.CannotSendRequest:
             # Yikes. The connection got into an inconsistent state! Reconnect.
+            if not rewind(body):
+                raise
             self.connect()
             # If that raises the error again, well let it raise.
             self._con.request(method, uri, body, headers)
@@ -201,6 +229,10 @@ class DAVBase(object):
             headers['Content-Type'] = content_type
         if content_enc:
             headers['Content-Encoding'] = content_enc
+        if hasattr(contents, 'read') and 'Content-Length' not in headers:
+            length = body_length(contents)
+            if length is not None:
+                headers['Content-Length'] = str(length)
         return self._request('PUT', url, contents, headers)
 
     def delete(self, url, extra_hdrs=None):
@@ -308,7 +340,10 @@ class DAVBase(object):
         try:
             resp = self.getresponse()
         except six.moves.http_client.BadStatusLine:
-            # Gnah. We may have waited too long.  Try one more time.
+            # Gnah. We may have waited too long.  Try one more time (unless
+            # the body was a stream that we cannot send again).
+            if not rewind(body):
+                raise
             self.connect()
             self.request(method, url, body, extra_hdrs)
             resp = self.getresponse()
@@ -330,14 +365,13 @@ class DAVConnection (HTTPBasicAuthCon, DAVBase):
         return
 
 
-if getattr(socket, 'ssl', None):
+if getattr(six.moves.http_client, 'HTTPSConnection', None):
     # only include DAVS if SSL support is compiled in
     class HTTPSBasicAuthCon(HTTPBasicAuthCon):
         connect_class = six.moves.http_client.HTTPSConnection
-        pass
 
     class DAVSConnection(HTTPSBasicAuthCon, DAVBase):
-        def __init__(self, host, port=None, strict=None):
+        def __init__(self, host, port=None, strict=None, referrer=None):
             HTTPSBasicAuthCon.__init__(self, host, port, strict)
             self._con._http_vsn_str = 'HTTP/1.1'
             self._con._http_vsn = 11
@@ -130,3 +130,9 @@ class DAVConnection(zeit.connector.dav.davbase.DAVConnection):
             raise six.moves.http_client.HTTPException(
                 response.status, response.reason, url, body, response)
         raise exception(response.status, response.reason, url, body, response)
+
+
+class DAVSConnection(DAVConnection):
+    """DAV Connection via HTTPS."""
+
+    connect_class = six.moves.http_client.HTTPSConnection
@@ -0,0 +1,121 @@
+import collections
+import logging
+import select
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool(object):
+    """Keeps idle DAVConnections around, so their keep-alive sockets can be
+    reused by other threads, instead of setting up a new TCP connection each
+    time.
+
+    The pool never blocks: if no idle connection is available, a new one is
+    created via `factory`. At most `max_size` idle connections are kept,
+    surplus connections are closed when they are returned. Connections that
+    have sent `max_requests` requests are closed instead of being reused,
+    so load balancers get a chance to redistribute them.
+    """
+
+    def __init__(self, factory, max_size=10, idle_timeout=60,
+                 max_requests=None):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self._idle = collections.deque()
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    def get(self):
+        """Return an idle connection, or a new one if there is none."""
+        while True:
+            with self._lock:
+                try:
+                    connection, released = self._idle.pop()
+                except IndexError:
+                    break
+            if self.check(connection, released):
+                self._count('reused')
+                return connection
+        self._count('created')
+        return self.factory()
+
+    def check(self, connection, released):
+        """Return whether `connection`, idle since `released`, can be used
+        again. Otherwise it is closed."""
+        if time.time() - released > self.idle_timeout:
+            self._discard(connection, 'expired')
+        elif self._is_stale(connection):
+            self._discard(connection, 'stale')
+        else:
+            return True
+        return False
+
+    def reusable(self, connection):
+        """Return whether `connection` may serve further requests after its
+        current user is done with it. Otherwise it is closed."""
+        response = connection._resp
+        if response is not None and not response.isclosed():
+            # The connection is in an inconsistent state, we cannot reuse it.
+            self._discard(connection, 'broken')
+        elif (self.max_requests and
+              getattr(connection, 'requests', 0) >= self.max_requests):
+            self._discard(connection, 'recycled')
+        else:
+            return True
+        return False
+
+    def put(self, connection):
+        """Return a connection to the pool."""
+        if not self.reusable(connection):
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.time()))
+                self._stats['released'] += 1
+                return
+        self._discard(connection, 'overflow')
+
+    def clear(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection, released in idle:
+            self._discard(connection, 'cleared')
+
+    def statistics(self):
+        with self._lock:
+            result = dict(self._stats)
+            result['idle'] = len(self._idle)
+        return result
+
+    @staticmethod
+    def _is_stale(connection):
+        # An idle keep-alive socket must not have anything to read. If it is
+        # readable, the server has either closed it (EOF) or sent garbage.
+        sock = connection._con.sock
+        if sock is None:
+            # Not connected (yet), httplib will connect on the next request.
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _discard(self, connection, reason):
+        logger.debug('Discarding %s connection %s', reason, connection)
+        self._count(reason)
+        try:
+            connection.close()
+        except Exception:
+            logger.debug('Error closing connection', exc_info=True)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
@@ -1,5 +1,6 @@
 # coding: utf8
 from io import BytesIO
+from unittest import mock
 import unittest
 import zeit.connector.dav.davbase
 import zeit.connector.dav.davconnection
@@ -119,3 +120,95 @@ class TestDAVResource(unittest.TestCase):
         from zeit.connector.dav.davresource import DAVResource
         res = DAVResource('http://example.com/parks_&amp;_recreation')
         self.assertEqual('/parks_&amp;_recreation', res.path)
+
+
+class BodyHelpersTest(unittest.TestCase):
+
+    def test_body_length_returns_remaining_bytes(self):
+        from zeit.connector.dav.davbase import body_length
+        body = BytesIO(b'foobar')
+        body.read(2)
+        self.assertEqual(4, body_length(body))
+        self.assertEqual(2, body.tell())
+
+    def test_body_length_is_none_for_non_seekable(self):
+        from zeit.connector.dav.davbase import body_length
+        self.assertEqual(None, body_length(iter([b'foo'])))
+
+    def test_rewind(self):
+        from zeit.connector.dav.davbase import rewind
+        body = BytesIO(b'foobar')
+        body.read()
+        self.assertTrue(rewind(body))
+        self.assertEqual(0, body.tell())
+        self.assertTrue(rewind(b'foo'))
+        self.assertTrue(rewind(None))
+        self.assertFalse(rewind(iter([b'foo'])))
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self._resp = None
+        self._con = mock.Mock(sock=None)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        from zeit.connector.dav.pool import ConnectionPool
+        self.pool = ConnectionPool(FakeConnection, max_size=2)
+
+    def test_returned_connection_is_reused(self):
+        conn = self.pool.get()
+        self.pool.put(conn)
+        self.assertIs(conn, self.pool.get())
+        self.assertEqual(
+            {'created': 1, 'released': 1, 'reused': 1, 'idle': 0},
+            self.pool.statistics())
+
+    def test_surplus_connections_are_closed(self):
+        conns = [self.pool.get() for i in range(3)]
+        for conn in conns:
+            self.pool.put(conn)
+        self.assertTrue(conns[2].closed)
+        self.assertEqual(2, self.pool.statistics()['idle'])
+
+    def test_expired_connections_are_not_reused(self):
+        conn = self.pool.get()
+        self.pool.put(conn)
+        self.pool.idle_timeout = -1
+        self.assertIsNot(conn, self.pool.get())
+        self.assertTrue(conn.closed)
+        self.assertEqual(1, self.pool.statistics()['expired'])
+
+    def test_connection_with_unread_response_is_not_reused(self):
+        conn = self.pool.get()
+        conn._resp = mock.Mock()
+        conn._resp.isclosed.return_value = False
+        self.pool.put(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(0, self.pool.statistics()['idle'])
+
+    def test_stale_connection_is_not_reused(self):
+        import socket
+        conn = self.pool.get()
+        conn._con.sock, server = socket.socketpair()
+        server.close()  # Makes client side readable (EOF)
+        self.pool.put(conn)
+        self.assertIsNot(conn, self.pool.get())
+        self.assertEqual(1, self.pool.statistics()['stale'])
+        conn._con.sock.close()
+
+    def test_connection_is_recycled_after_max_requests(self):
+        self.pool.max_requests = 2
+        conn = self.pool.get()
+        conn.requests = 2
+        self.pool.put(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(1, self.pool.statistics()['recycled'])
+        self.assertEqual(0, self.pool.statistics()['idle'])
@@ -200,6 +200,22 @@ class ICachingConnector(IConnector):
     def invalidate_cache(id):
         """Invalidate (and reload) the cache for the given id."""
 
+    def prefetch(ids, body=False):
+        """Load the properties of all given ids into the cache in bulk.
+
+        This is only a performance hint, ids that don't exist or are already
+        cached are ignored. If ``body`` is True, the bodies of all non
+        collection resources are cached, too.
+
+        """
+
+    def get_many(ids, body=False):
+        """Return an ordered dict of unique id -> IResource for all given ids.
+
+        Uses `prefetch` first, ids that don't exist are omitted.
+
+        """
+
 
 class IWebDAVReadProperties(zope.interface.common.mapping.IEnumerableMapping):
     """Mapping for WebDAV properties.
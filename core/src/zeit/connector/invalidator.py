@@ -1,10 +1,15 @@
 import BTrees
+import datetime
 import gocept.runner
 import logging
 import persistent
+import pytz
 import six
+import time
 import zeit.cms.cli
 import zeit.connector.interfaces
+import zeit.connector.search
+import zope.app.appsetup.product
 import zope.component
 import zope.event
 import zope.interface
@@ -23,9 +28,33 @@ class IInvalidator(zope.interface.Interface):
 
         """
 
+    def invalidate_changed(now=None):
+        """Invalidate the resources that were modified in the DAV since the
+        last call.
+
+        returns a dict with statistics about the run.
+
+        """
+
+
+LAST_MODIFIED = zeit.connector.search.SearchVar('getlastmodified', 'DAV:')
+
+
+def format_lastmodified(date):
+    """Formats `date` like the DAV server stores (and compares) the
+    DAV:getlastmodified property, i.e. RFC 1123."""
+    return date.astimezone(pytz.UTC).strftime('%a, %d %b %Y %H:%M:%S GMT')
+
 
 class Invalidator(persistent.Persistent):
 
+    # Only modifications after this point in time are considered by
+    # `invalidate_changed`.
+    high_water_mark = None
+    # Look back a little further than the high-water mark, so changes that
+    # were committed late (or clocks that are slightly off) are not missed.
+    OVERLAP = 60
+
     def __init__(self):
         self.working_set = BTrees.family32.OI.TreeSet()
         self.missed = BTrees.family32.OI.TreeSet()
@@ -88,6 +117,45 @@ class Invalidator(persistent.Persistent):
             except KeyError:
                 pass
 
+    def invalidate_changed(self, now=None):
+        if now is None:
+            now = datetime.datetime.now(pytz.UTC)
+        if self.high_water_mark is None:
+            log.info('No high-water mark yet, starting from %s', now)
+            self.high_water_mark = now
+            return {}
+        since = self.high_water_mark - datetime.timedelta(seconds=self.OVERLAP)
+        start = time.time()
+        changed = invalidated = 0
+        property_cache = self.property_cache
+        child_name_cache = self.connector.child_name_cache
+        for result in self.connector.search(
+                [LAST_MODIFIED],
+                LAST_MODIFIED.between(
+                    format_lastmodified(since), format_lastmodified(now))):
+            id = result[0]
+            changed += 1
+            parent = id.rstrip('/').rsplit('/', 1)[0] + '/'
+            if id not in property_cache and parent not in child_name_cache:
+                # We don't know anything about this resource, so there is
+                # nothing to invalidate.
+                continue
+            zope.event.notify(
+                zeit.connector.interfaces.ResourceInvaliatedEvent(id))
+            invalidated += 1
+        self.high_water_mark = now
+        duration = time.time() - start
+        stats = {
+            'changed': changed,
+            'invalidated': invalidated,
+            'duration': duration,
+            'rate': invalidated / duration if duration else 0,
+        }
+        log.info(
+            'Invalidated %(invalidated)s of %(changed)s changed resources '
+            'in %(duration).1fs (%(rate).1f/s)', stats)
+        return stats
+
     @property
     def connector(self):
         return zope.component.getUtility(
@@ -95,8 +163,9 @@ class Invalidator(persistent.Persistent):
 
     @property
     def property_cache(self):
-        return zope.component.getUtility(
-            zeit.connector.interfaces.IPropertyCache)
+        # Not necessarily the IPropertyCache utility, see zeit.connector.
+        # sqlitecache
+        return self.connector.property_cache
 
 
 @zeit.cms.cli.runner(ticks=0.05, once=False)
@@ -105,3 +174,37 @@ def invalidate_whole_cache():
     finished = invalidator()
     if finished:
         return gocept.runner.Exit
+
+
+@zeit.cms.cli.runner(ticks=60, once=False)
+def invalidate_changed():
+    """Incremental alternative to `invalidate_whole_cache`, does not find
+    resources that were deleted in the DAV, though."""
+    invalidator = zope.component.getUtility(IInvalidator)
+    invalidator.invalidate_changed()
+
+
+def sweep(connector, config):
+    """Evict old entries from the caches of `connector`, see
+    `zeit.connector.cache.AccessTimes`. Configured by the product config
+    settings `cache-timeout` (seconds) and `cache-max-entries` (per cache).
+    """
+    settings = {}
+    if config.get('cache-timeout'):
+        settings['cache_timeout'] = int(config['cache-timeout'])
+    if config.get('cache-max-entries'):
+        settings['max_entries'] = int(config['cache-max-entries'])
+    for name in ['body_cache', 'property_cache', 'child_name_cache']:
+        cache = getattr(connector, name, None)
+        if not hasattr(cache, 'sweep'):
+            continue
+        log.info('Sweeping %s', name)
+        cache.sweep(**settings)
+
+
+@zeit.cms.cli.runner()
+def sweep_caches():
+    config = zope.app.appsetup.product.getProductConfiguration(
+        'zeit.connector') or {}
+    sweep(zope.component.getUtility(
+        zeit.connector.interfaces.IConnector), config)
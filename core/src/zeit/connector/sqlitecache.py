@@ -0,0 +1,369 @@
+"""Connector caches stored in a local SQLite file instead of the ZODB.
+
+Updating these caches does not cause ZODB writes (and thus no ConflictErrors
+and no storage bloat). Changes are visible immediately to all threads and
+processes on the same host that share the cache directory, they are not bound
+to the Zope transaction -- just like the DAV changes themselves.
+"""
+
+import hashlib
+import logging
+import os
+import os.path
+import six
+import six.moves.cPickle as pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import zeit.connector.cache
+import zeit.connector.connector
+import zeit.connector.interfaces
+import zeit.connector.zopeconnector
+import zope.interface
+import zope.security.proxy
+
+
+log = logging.getLogger(__name__)
+
+
+class Database(object):
+    """Access to a SQLite file, with one connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # isolation_level=None means autocommit, every statement is its
+            # own transaction.
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None)
+            # Write-ahead logging allows concurrent readers and one writer.
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def execute(self, sql, *args):
+        return self.connection.execute(sql, args)
+
+
+class SQLiteCache(object):
+    """Base class, stores pickled values with access times."""
+
+    table = NotImplemented  # Set in subclass
+    UPDATE_INTERVAL = 24 * 3600
+
+    def __init__(self, database):
+        self.database = database
+        self.database.execute(
+            'CREATE TABLE IF NOT EXISTS %s ('
+            'key TEXT PRIMARY KEY, value BLOB, deleted INTEGER DEFAULT 0, '
+            'accessed INTEGER)' % self.table)
+        self.database.execute(
+            'CREATE INDEX IF NOT EXISTS %s_accessed ON %s (accessed)' % (
+                self.table, self.table))
+
+    def _get_time_key(self, time):
+        return int(time / self.UPDATE_INTERVAL)
+
+    def _update_cache_access(self, key, accessed):
+        # Only write when the access time actually changes, so most reads
+        # stay reads.
+        now = self._get_time_key(time.time())
+        if accessed is None or accessed < now:
+            self.database.execute(
+                'UPDATE %s SET accessed = ? WHERE key = ?' % self.table,
+                now, key)
+
+    def sweep(self, cache_timeout=(7 * 24 * 3600), max_entries=None):
+        """Evict entries that have not been accessed for `cache_timeout`
+        seconds, and the least recently accessed ones beyond `max_entries`.
+        """
+        timeout = self._get_time_key(time.time() - cache_timeout)
+        cursor = self.database.execute(
+            'DELETE FROM %s WHERE accessed <= ?' % self.table, timeout)
+        evicted = cursor.rowcount
+        if max_entries is not None:
+            cursor = self.database.execute(
+                'DELETE FROM %s WHERE key IN (SELECT key FROM %s '
+                'ORDER BY accessed DESC LIMIT -1 OFFSET ?)' % (
+                    self.table, self.table), max_entries)
+            evicted += cursor.rowcount
+        log.info('Evicted %s entries from %s', evicted, self.table)
+
+
+@zope.interface.implementer(zeit.connector.interfaces.IPersistentCache)
+class PersistentCache(SQLiteCache):
+
+    def __getitem__(self, key):
+        key = six.ensure_text(key)
+        row = self.database.execute(
+            'SELECT value, deleted, accessed FROM %s WHERE key = ?' % (
+                self.table), key).fetchone()
+        if row is None or row[1]:
+            raise KeyError(key)
+        self._update_cache_access(key, row[2])
+        return self._load(key, pickle.loads(row[0]))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        row = self.database.execute(
+            'SELECT deleted FROM %s WHERE key = ?' % self.table,
+            six.ensure_text(key)).fetchone()
+        return row is not None and not row[0]
+
+    def keys(self, include_deleted=False):
+        if include_deleted:
+            cursor = self.database.execute('SELECT key FROM %s' % self.table)
+        else:
+            cursor = self.database.execute(
+                'SELECT key FROM %s WHERE deleted = 0' % self.table)
+        return [row[0] for row in cursor]
+
+    def __delitem__(self, key):
+        cursor = self.database.execute(
+            'UPDATE %s SET deleted = 1 WHERE key = ?' % self.table,
+            six.ensure_text(key))
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def remove(self, key):
+        cursor = self.database.execute(
+            'DELETE FROM %s WHERE key = ?' % self.table, six.ensure_text(key))
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._store(six.ensure_text(key), self._dump(value))
+
+    def _store(self, key, value):
+        self.database.execute(
+            'INSERT OR REPLACE INTO %s (key, value, deleted, accessed) '
+            'VALUES (?, ?, 0, ?)' % self.table,
+            key, pickle.dumps(value, protocol=2),
+            self._get_time_key(time.time()))
+
+    def _load(self, key, value):
+        return value
+
+    def _dump(self, value):
+        return value
+
+
+@zope.interface.implementer(zeit.connector.interfaces.IPropertyCache)
+class PropertyCache(PersistentCache):
+    """Property cache."""
+
+    table = 'properties'
+
+    def _dump(self, value):
+        result = {}
+        for key, item in value.items():
+            key = zope.security.proxy.removeSecurityProxy(key)
+            if (key is not zeit.connector.interfaces.DeleteProperty and
+                    not isinstance(
+                        key, zeit.connector.cache.WebDAVPropertyKey)):
+                key = zeit.connector.cache.WebDAVPropertyKey(key)
+            result[key] = item
+        return result
+
+
+class ChildNames(object):
+    """Set of child ids that writes all changes through to the cache, since
+    the connector modifies them in place."""
+
+    def __init__(self, cache, key, names):
+        self._cache = cache
+        self._key = key
+        self._names = set(names)
+
+    def __iter__(self):
+        return iter(sorted(self._names))
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name):
+        self._names.add(name)
+        self._write()
+
+    # BTree sets have insert instead of add.
+    insert = add
+
+    def remove(self, name):
+        self._names.remove(name)
+        self._write()
+
+    def clear(self):
+        self._names.clear()
+        self._write()
+
+    def _write(self):
+        self._cache._store(self._key, sorted(self._names))
+
+    def __repr__(self):
+        return object.__repr__(self)
+
+
+@zope.interface.implementer(zeit.connector.interfaces.IChildNameCache)
+class ChildNameCache(PersistentCache):
+    """Cache for child names."""
+
+    table = 'childnames'
+
+    def _load(self, key, value):
+        return ChildNames(self, key, value)
+
+    def _dump(self, value):
+        return sorted(six.text_type(x) for x in value)
+
+
+@zope.interface.implementer(zeit.connector.interfaces.IResourceCache)
+class ResourceCache(SQLiteCache):
+    """Cache for resource data.
+
+    Only the etags are stored in SQLite, the bodies are stored as files in
+    `directory`. Each etag gets its own file, so readers never see a body
+    that does not match the etag they asked for.
+    """
+
+    table = 'body'
+
+    def __init__(self, database, directory):
+        super(ResourceCache, self).__init__(database)
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def getData(self, unique_id, properties):
+        key = six.ensure_text(unique_id)
+        current_etag = properties[('getetag', 'DAV:')]
+        row = self.database.execute(
+            'SELECT value, accessed FROM body WHERE key = ?', key).fetchone()
+        if row is None or row[0] != current_etag:
+            raise KeyError(u"Object %r is not cached." % unique_id)
+        try:
+            data = open(self._path(key, current_etag), 'rb')
+        except IOError:
+            raise KeyError(u"Object %r is not cached." % unique_id)
+        self._update_cache_access(key, row[1])
+        return data
+
+    def setData(self, unique_id, properties, data):
+        key = six.ensure_text(unique_id)
+        current_etag = properties.get(('getetag', 'DAV:'))
+        if current_etag is None:
+            # When we have no etag, we must not store the data as we have no
+            # means of invalidation then.
+            return zeit.connector.cache.spooled_copy(data)
+
+        log.debug('Storing body of %s with etag %s' % (
+            unique_id, current_etag))
+        path = self._path(key, current_etag)
+        if hasattr(data, 'seekable') and data.seekable():
+            data.seek(0)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(fd, 'wb') as target:
+            s = data.read(zeit.connector.cache.Body.BUFFER_SIZE)
+            while s:
+                target.write(s)
+                s = data.read(zeit.connector.cache.Body.BUFFER_SIZE)
+        os.replace(tmp, path)
+
+        row = self.database.execute(
+            'SELECT value FROM body WHERE key = ?', key).fetchone()
+        self.database.execute(
+            'INSERT OR REPLACE INTO body (key, value, accessed) '
+            'VALUES (?, ?, ?)',
+            key, current_etag, self._get_time_key(time.time()))
+        if row is not None and row[0] != current_etag:
+            self._remove_file(key, row[0])
+        return open(path, 'rb')
+
+    def remove(self, unique_id):
+        key = six.ensure_text(unique_id)
+        row = self.database.execute(
+            'SELECT value FROM body WHERE key = ?', key).fetchone()
+        if row is None:
+            return
+        self.database.execute('DELETE FROM body WHERE key = ?', key)
+        self._remove_file(key, row[0])
+
+    def sweep(self, cache_timeout=(7 * 24 * 3600), max_entries=None):
+        timeout = self._get_time_key(time.time() - cache_timeout)
+        rows = self.database.execute(
+            'SELECT key, value FROM body WHERE accessed <= ?',
+            timeout).fetchall()
+        self._evict(rows)
+        if max_entries is not None:
+            self._evict(self.database.execute(
+                'SELECT key, value FROM body ORDER BY accessed DESC '
+                'LIMIT -1 OFFSET ?', max_entries).fetchall())
+
+    def _evict(self, rows):
+        for key, etag in rows:
+            log.info('Evicting %s', key)
+            self.database.execute(
+                'DELETE FROM body WHERE key = ? AND value = ?', key, etag)
+            self._remove_file(key, etag)
+
+    def _path(self, key, etag):
+        name = hashlib.sha1(
+            (u'%s\0%s' % (key, etag)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def _remove_file(self, key, etag):
+        try:
+            os.remove(self._path(key, etag))
+        except OSError:
+            pass
+
+
+class Connector(zeit.connector.zopeconnector.ZopeConnector):
+    """ZopeConnector that uses the SQLite caches instead of the ZODB ones."""
+
+    def __init__(self, roots, cache_directory, **kw):
+        super(Connector, self).__init__(roots, **kw)
+        if not os.path.isdir(cache_directory):
+            os.makedirs(cache_directory)
+        database = Database(os.path.join(cache_directory, 'cache.sqlite'))
+        self._body_cache = ResourceCache(
+            database, os.path.join(cache_directory, 'bodies'))
+        self._property_cache = PropertyCache(database)
+        self._child_name_cache = ChildNameCache(database)
+
+    @property
+    def body_cache(self):
+        return self._body_cache
+
+    @property
+    def property_cache(self):
+        return self._property_cache
+
+    @property
+    def child_name_cache(self):
+        return self._child_name_cache
+
+
+def connector_factory():
+    import zope.app.appsetup.product
+    config = zope.app.appsetup.product.getProductConfiguration(
+        'zeit.connector')
+    return Connector({
+        'default': config['document-store'],
+        'search': config['document-store-search']},
+        cache_directory=config['cache-directory'],
+        **zeit.connector.connector.pool_settings(config))
@@ -4,7 +4,9 @@ import BTrees
 import ZODB
 import os
 import threading
+import time
 import transaction
+import unittest
 import zeit.cms.testing
 import zeit.connector.cache
 import zeit.connector.testing
@@ -85,3 +87,87 @@ class TestResourceCache(zeit.cms.testing.FunctionalTestCase):
         t2.start()
         t1.join()
         t2.join()
+
+
+class AccessTimesTest(unittest.TestCase):
+
+    def setUp(self):
+        super(AccessTimesTest, self).setUp()
+        self.cache = zeit.connector.cache.PropertyCache()
+        self.now = self.cache._get_time_key(time.time())
+
+    def set_access_time(self, key, days_ago):
+        self.cache._set_access_time(key, self.now - days_ago)
+
+    def test_reads_are_collected_until_flushed(self):
+        self.cache['id'] = {}
+        self.set_access_time(b'id', 1)
+        self.cache['id']
+        self.assertEqual(self.now - 1, self.cache._last_access_time[b'id'])
+        self.cache.flush_access_times()
+        self.assertEqual(self.now, self.cache._last_access_time[b'id'])
+        self.assertEqual([b'id'], list(
+            self.cache._access_time_to_ids[self.now]))
+        self.assertEqual([], list(
+            self.cache._access_time_to_ids[self.now - 1]))
+
+    def test_reads_are_flushed_when_buffer_is_full(self):
+        self.cache.ACCESS_FLUSH_SIZE = 2
+        for key in [b'one', b'two']:
+            self.cache[key] = {}
+            self.set_access_time(key, 1)
+        self.cache['one']
+        self.assertEqual(self.now - 1, self.cache._last_access_time[b'one'])
+        self.cache['two']
+        self.assertEqual(self.now, self.cache._last_access_time[b'one'])
+        self.assertEqual(self.now, self.cache._last_access_time[b'two'])
+
+    def test_counts_entries(self):
+        self.cache['one'] = {}
+        self.cache['two'] = {}
+        self.cache['one'] = {'foo': 'bar'}
+        self.assertEqual(2, self.cache._entries())
+        del self.cache._entry_count
+        self.assertEqual(2, self.cache._entries())
+
+    def test_remove_forgets_access_time(self):
+        self.cache['one'] = {}
+        self.cache['two'] = {}
+        self.cache.remove('one')
+        self.assertEqual(1, self.cache._entries())
+        self.assertNotIn(b'one', self.cache._last_access_time)
+        self.assertEqual([b'two'], list(
+            self.cache._access_time_to_ids[self.now]))
+
+    def test_evicts_entries_older_than_timeout(self):
+        self.cache['old'] = {}
+        self.cache['new'] = {}
+        self.set_access_time(b'old', 10)
+        self.assertEqual(1, self.cache.evict(cache_timeout=7 * 24 * 3600))
+        self.assertEqual([b'new'], list(self.cache.keys()))
+        self.assertEqual(1, self.cache._entries())
+
+    def test_evicts_oldest_entries_exceeding_max_entries(self):
+        for i, key in enumerate([b'a', b'b', b'c', b'd']):
+            self.cache[key] = {}
+            self.set_access_time(key, 4 - i)
+        self.assertEqual(2, self.cache.evict(max_entries=2))
+        self.assertEqual([b'c', b'd'], sorted(self.cache.keys()))
+        self.assertEqual(0, self.cache.evict(max_entries=2))
+
+    def test_evicts_at_most_batch_size_entries(self):
+        for key in [b'a', b'b', b'c']:
+            self.cache[key] = {}
+            self.set_access_time(key, 10)
+        self.assertEqual(2, self.cache.evict(
+            cache_timeout=7 * 24 * 3600, batch_size=2))
+        self.assertEqual(1, len(list(self.cache.keys())))
+
+    def test_sweep_evicts_in_batches(self):
+        self.cache.EVICT_BATCH_SIZE = 2
+        for key in [b'a', b'b', b'c', b'd', b'e']:
+            self.cache[key] = {}
+            self.set_access_time(key, 10)
+        self.cache['f'] = {}
+        self.cache.sweep()
+        self.assertEqual([b'f'], list(self.cache.keys()))
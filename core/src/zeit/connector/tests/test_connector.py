@@ -2,9 +2,11 @@
 from io import BytesIO
 from unittest import mock
 from zeit.connector.testing import copy_inherited_functions
+import time
 import transaction
 import unittest
 import zeit.connector.connector
+import zeit.connector.dav.davresource
 import zeit.connector.interfaces
 import zeit.connector.testing
 import zope.component
@@ -309,6 +311,179 @@ class TestConnectorCache(zeit.connector.testing.ConnectorTest):
                 'http://xml.zeit.de/%s/' % self.testfolder)))
 
 
+class TestStreaming(zeit.connector.testing.ConnectorTest):
+
+    def test_large_body_is_streamed_to_server(self):
+        import tempfile
+        body = tempfile.TemporaryFile()
+        body.write(b'x' * 1024 * 1024)
+        res = self.get_resource('large', '')
+        res.data = body
+        conn = self.connector.get_connection()
+        with mock.patch('zeit.connector.dav.davbase.DAVBase._request',
+                        wraps=conn._request) as request:
+            self.connector.add(res)
+        (method, url, sent, headers), _ = [
+            x for x in request.call_args_list if x[0][0] == 'PUT'][0]
+        self.assertIsInstance(sent, zeit.connector.connector.HashingReader)
+        self.assertEqual(str(1024 * 1024), headers['Content-Length'])
+        self.assertEqual(
+            zeit.connector.connector.body_hash(body),
+            zeit.connector.connector.body_hash(self.connector[res.id].data))
+
+
+class HashingReaderTest(unittest.TestCase):
+
+    def test_hashes_data_read_through_it(self):
+        reader = zeit.connector.connector.HashingReader(BytesIO(b'foobar'))
+        self.assertEqual(b'foo', reader.read(3))
+        self.assertEqual(b'bar', reader.read())
+        self.assertEqual(
+            zeit.connector.connector.body_hash(BytesIO(b'foobar')),
+            reader.hexdigest())
+
+    def test_seek_resets_hash(self):
+        reader = zeit.connector.connector.HashingReader(BytesIO(b'foobar'))
+        reader.read()
+        reader.seek(0)
+        reader.read()
+        self.assertEqual(
+            zeit.connector.connector.body_hash(BytesIO(b'foobar')),
+            reader.hexdigest())
+
+
+class TestPrefetch(zeit.connector.testing.ConnectorTest):
+
+    def setUp(self):
+        super(TestPrefetch, self).setUp()
+        self.ids = []
+        for name in ['one', 'two', 'three', 'four', 'five']:
+            res = self.get_resource(name, 'body')
+            self.connector.add(res)
+            self.ids.append(res.id)
+        self.uncache()
+
+    def uncache(self):
+        for id in self.ids:
+            self.connector.property_cache.remove(id)
+
+    def propfind(self):
+        return mock.patch(
+            'zeit.connector.dav.davconnection.DAVConnection.propfind',
+            wraps=self.connector.get_connection().propfind)
+
+    def test_prefetch_fills_property_cache_with_one_request_per_parent(self):
+        with self.propfind() as propfind:
+            self.connector.prefetch(self.ids)
+        self.assertEqual(1, propfind.call_count)
+        for id in self.ids:
+            self.assertEqual(
+                'testing', self.connector.property_cache[id][
+                    zeit.connector.interfaces.RESOURCE_TYPE_PROPERTY])
+
+    def test_prefetch_skips_parent_with_too_few_requested_ids(self):
+        with self.propfind() as propfind:
+            self.connector.prefetch(self.ids[:2])
+        self.assertEqual(0, propfind.call_count)
+
+    def test_prefetch_skips_parent_with_many_more_known_children(self):
+        for i in range(10):
+            self.connector.add(self.get_resource('other%s' % i, 'body'))
+        list(self.connector.listCollection(
+            'http://xml.zeit.de/%s/' % self.testfolder))
+        self.uncache()
+        self.connector.prefetch_min_fraction = 0.5
+        with self.propfind() as propfind:
+            self.connector.prefetch(self.ids)
+        self.assertEqual(0, propfind.call_count)
+
+    def test_prefetch_accepts_generator(self):
+        with mock.patch.object(
+                self.connector, '_get_resource_body') as get_body:
+            self.connector.prefetch((id for id in self.ids), body=True)
+        self.assertEqual(
+            self.ids, [x[0][0] for x in get_body.call_args_list])
+
+    def test_prefetch_ignores_nonexistent_and_invalid_ids(self):
+        self.connector.prefetch([
+            'http://xml.zeit.de/nonexistent/foo',
+            'http://xml.zeit.de/nonexistent/bar',
+            'http://example.com/foo'])
+
+    def test_get_many_returns_existing_resources_only(self):
+        missing = 'http://xml.zeit.de/%s/missing' % self.testfolder
+        result = self.connector.get_many(self.ids + [missing], body=True)
+        self.assertEqual(self.ids, list(result.keys()))
+        self.assertEqual(b'body', result[self.ids[0]].data.read())
+
+
+class TestCanonicalIdCache(zeit.connector.testing.ConnectorTest):
+
+    def head(self):
+        return mock.patch(
+            'zeit.connector.dav.davresource.DAVResource.head',
+            side_effect=zeit.connector.dav.davresource.DAVResource.head,
+            autospec=True)
+
+    def test_missing_resource_is_only_looked_up_once(self):
+        id = 'http://xml.zeit.de/%s/missing' % self.testfolder
+        with self.head() as head:
+            self.assertNotIn(id, self.connector)
+            self.assertNotIn(id, self.connector)
+        self.assertEqual(1, head.call_count)
+
+    def test_adding_resource_invalidates_negative_entry(self):
+        res = self.get_resource('foo', 'body')
+        self.assertNotIn(res.id, self.connector)
+        self.connector.add(res)
+        self.assertIn(res.id, self.connector)
+
+    def test_collection_id_is_cached(self):
+        id = 'http://xml.zeit.de/%s/folder' % self.testfolder
+        self.connector._add_collection(id)
+        with self.head() as head:
+            self.assertEqual(
+                id + '/', self.connector._get_cannonical_id(id))
+            self.assertEqual(
+                id + '/', self.connector._get_cannonical_id(id))
+        self.assertEqual(1, head.call_count)
+
+
+class CanonicalIdCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        super(CanonicalIdCacheTest, self).setUp()
+        self.cache = zeit.connector.connector.CanonicalIdCache(size=2)
+
+    def test_entries_expire(self):
+        self.cache.set('http://xml.zeit.de/foo', 'foo', True)
+        self.cache.set('http://xml.zeit.de/bar', 'bar', False)
+        self.assertEqual(
+            ('foo', True), self.cache.get('http://xml.zeit.de/foo'))
+        self.assertEqual(
+            ('bar', False), self.cache.get('http://xml.zeit.de/bar/'))
+        with mock.patch('time.time', return_value=time.time() + 20):
+            self.assertEqual(
+                ('foo', True), self.cache.get('http://xml.zeit.de/foo'))
+            with self.assertRaises(KeyError):
+                self.cache.get('http://xml.zeit.de/bar')
+
+    def test_least_recently_used_entries_are_dropped(self):
+        self.cache.set('a', 'a', True)
+        self.cache.set('b', 'b', True)
+        self.cache.get('a')
+        self.cache.set('c', 'c', True)
+        self.assertEqual(('a', True), self.cache.get('a'))
+        with self.assertRaises(KeyError):
+            self.cache.get('b')
+
+    def test_invalidate_removes_entry(self):
+        self.cache.set('a', 'a', True)
+        self.cache.invalidate('a/')
+        with self.assertRaises(KeyError):
+            self.cache.get('a')
+
+
 class TestMove(zeit.connector.testing.ConnectorTest):
 
     def test_move_own_locked_resource_should_work(self):
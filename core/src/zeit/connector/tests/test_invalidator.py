@@ -0,0 +1,113 @@
+from unittest import mock
+import datetime
+import pytz
+import unittest
+import zeit.connector.invalidator
+import zope.event
+
+
+class InvalidateChangedTest(unittest.TestCase):
+
+    def setUp(self):
+        super(InvalidateChangedTest, self).setUp()
+        self.invalidator = zeit.connector.invalidator.Invalidator()
+        self.connector = mock.Mock()
+        self.connector.property_cache = {}
+        self.connector.child_name_cache = {}
+        patcher = mock.patch.object(
+            zeit.connector.invalidator.Invalidator, 'connector',
+            self.connector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.events = []
+        zope.event.subscribers.append(self.events.append)
+        self.addCleanup(zope.event.subscribers.remove, self.events.append)
+        self.now = datetime.datetime(2019, 1, 1, 12, 0, tzinfo=pytz.UTC)
+
+    def test_first_run_only_sets_high_water_mark(self):
+        self.assertEqual({}, self.invalidator.invalidate_changed(self.now))
+        self.assertEqual(self.now, self.invalidator.high_water_mark)
+        self.assertFalse(self.connector.search.called)
+
+    def test_searches_changes_since_high_water_mark(self):
+        self.invalidator.high_water_mark = self.now
+        later = self.now + datetime.timedelta(minutes=5)
+        self.connector.search.return_value = []
+        self.invalidator.invalidate_changed(later)
+        attributes, expression = self.connector.search.call_args[0]
+        self.assertEqual(
+            '(:between "DAV:" "getlastmodified" '
+            '"Tue, 01 Jan 2019 11:59:00 GMT" "Tue, 01 Jan 2019 12:05:00 GMT")',
+            expression._render())
+        self.assertEqual(later, self.invalidator.high_water_mark)
+
+    def test_invalidates_only_cached_resources(self):
+        self.invalidator.high_water_mark = self.now
+        self.connector.property_cache['http://xml.zeit.de/cached'] = {}
+        self.connector.child_name_cache['http://xml.zeit.de/folder/'] = []
+        self.connector.search.return_value = [
+            ('http://xml.zeit.de/cached', None),
+            ('http://xml.zeit.de/folder/new', None),
+            ('http://xml.zeit.de/unknown/foo', None),
+        ]
+        stats = self.invalidator.invalidate_changed(
+            self.now + datetime.timedelta(minutes=5))
+        self.assertEqual(
+            ['http://xml.zeit.de/cached', 'http://xml.zeit.de/folder/new'],
+            [x.id for x in self.events])
+        self.assertEqual(3, stats['changed'])
+        self.assertEqual(2, stats['invalidated'])
+
+    def test_invalidates_resources_modified_inside_window(self):
+        modified = {
+            'http://xml.zeit.de/before': self.now - datetime.timedelta(
+                minutes=2),
+            'http://xml.zeit.de/overlap': self.now - datetime.timedelta(
+                seconds=30),
+            'http://xml.zeit.de/inside': self.now + datetime.timedelta(
+                minutes=3),
+            'http://xml.zeit.de/after': self.now + datetime.timedelta(
+                minutes=10),
+        }
+        for id in modified:
+            self.connector.property_cache[id] = {
+                ('getlastmodified', 'DAV:'):
+                zeit.connector.invalidator.format_lastmodified(modified[id])}
+
+        def search(attributes, expression):
+            # Like the DAV server, compare the property values as dates.
+            var, lower, upper = expression.operands
+            lower, upper = [
+                datetime.datetime.strptime(x, '%a, %d %b %Y %H:%M:%S GMT')
+                for x in (lower, upper)]
+            for id, properties in self.connector.property_cache.items():
+                value = datetime.datetime.strptime(
+                    properties[(var.name, var.namespace)],
+                    '%a, %d %b %Y %H:%M:%S GMT')
+                if lower <= value <= upper:
+                    yield (id, properties[(var.name, var.namespace)])
+        self.connector.search.side_effect = search
+
+        self.invalidator.high_water_mark = self.now
+        self.invalidator.invalidate_changed(
+            self.now + datetime.timedelta(minutes=5))
+        self.assertEqual(
+            ['http://xml.zeit.de/inside', 'http://xml.zeit.de/overlap'],
+            sorted(x.id for x in self.events))
+
+
+class SweepTest(unittest.TestCase):
+
+    def test_passes_configured_limits_to_all_caches(self):
+        connector = mock.Mock()
+        zeit.connector.invalidator.sweep(connector, {
+            'cache-timeout': '3600', 'cache-max-entries': '1000'})
+        for cache in [connector.body_cache, connector.property_cache,
+                      connector.child_name_cache]:
+            cache.sweep.assert_called_with(
+                cache_timeout=3600, max_entries=1000)
+
+    def test_uses_defaults_of_caches_if_not_configured(self):
+        connector = mock.Mock()
+        zeit.connector.invalidator.sweep(connector, {})
+        connector.body_cache.sweep.assert_called_with()
@@ -0,0 +1,148 @@
+from io import BytesIO
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import zeit.connector.cache
+import zeit.connector.sqlitecache
+
+
+class SQLiteCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        super(SQLiteCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.database = zeit.connector.sqlitecache.Database(
+            os.path.join(self.directory, 'cache.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(SQLiteCacheTest, self).tearDown()
+
+
+class PropertyCacheTest(SQLiteCacheTest):
+
+    def setUp(self):
+        super(PropertyCacheTest, self).setUp()
+        self.cache = zeit.connector.sqlitecache.PropertyCache(self.database)
+
+    def test_stores_properties(self):
+        self.cache[u'http://xml.zeit.de/föö'] = {('foo', 'bar'): 'baz'}
+        self.assertEqual(
+            {('foo', 'bar'): 'baz'}, self.cache[u'http://xml.zeit.de/föö'])
+        self.assertIn(u'http://xml.zeit.de/föö', self.cache)
+        self.assertEqual([u'http://xml.zeit.de/föö'], self.cache.keys())
+
+    def test_keys_are_webdav_property_keys(self):
+        self.cache['id'] = {('foo', 'bar'): 'baz'}
+        self.assertTrue(isinstance(
+            list(self.cache['id'].keys())[0],
+            zeit.connector.cache.WebDAVPropertyKey))
+
+    def test_delitem_marks_as_deleted(self):
+        self.cache['id'] = {('foo', 'bar'): 'baz'}
+        del self.cache['id']
+        self.assertNotIn('id', self.cache)
+        self.assertEqual(None, self.cache.get('id'))
+        self.assertEqual([], self.cache.keys())
+        self.assertEqual(['id'], self.cache.keys(include_deleted=True))
+        self.cache.remove('id')
+        self.assertEqual([], self.cache.keys(include_deleted=True))
+
+    def test_removing_missing_key_raises(self):
+        with self.assertRaises(KeyError):
+            del self.cache['id']
+        with self.assertRaises(KeyError):
+            self.cache.remove('id')
+
+    def test_sweep_removes_entries_not_accessed_recently(self):
+        self.cache['old'] = {}
+        self.cache['new'] = {}
+        old = self.cache._get_time_key(time.time() - 8 * 24 * 3600)
+        self.database.execute(
+            'UPDATE properties SET accessed = ? WHERE key = ?', old, 'old')
+        self.cache.sweep()
+        self.assertEqual(['new'], self.cache.keys(include_deleted=True))
+
+    def test_sweep_removes_least_recently_accessed_beyond_max_entries(self):
+        for i, key in enumerate(['a', 'b', 'c']):
+            self.cache[key] = {}
+            self.database.execute(
+                'UPDATE properties SET accessed = ? WHERE key = ?',
+                self.cache._get_time_key(time.time()) - i, key)
+        self.cache.sweep(max_entries=2)
+        self.assertEqual(['a', 'b'], sorted(self.cache.keys()))
+
+    def test_reading_refreshes_access_time(self):
+        self.cache['id'] = {}
+        old = self.cache._get_time_key(time.time() - 8 * 24 * 3600)
+        self.database.execute(
+            'UPDATE properties SET accessed = ? WHERE key = ?', old, 'id')
+        self.cache['id']
+        self.cache.sweep()
+        self.assertEqual(['id'], self.cache.keys())
+
+
+class ChildNameCacheTest(SQLiteCacheTest):
+
+    def setUp(self):
+        super(ChildNameCacheTest, self).setUp()
+        self.cache = zeit.connector.sqlitecache.ChildNameCache(self.database)
+
+    def test_changes_are_written_through(self):
+        self.cache['id'] = ['b', 'a']
+        children = self.cache['id']
+        self.assertEqual(['a', 'b'], list(children))
+        children.insert('c')
+        children.remove('a')
+        self.assertEqual(['b', 'c'], list(self.cache['id']))
+
+
+class ResourceCacheTest(SQLiteCacheTest):
+
+    def setUp(self):
+        super(ResourceCacheTest, self).setUp()
+        self.cache = zeit.connector.sqlitecache.ResourceCache(
+            self.database, os.path.join(self.directory, 'bodies'))
+        self.properties1 = {('getetag', 'DAV:'): 'etag1'}
+        self.properties2 = {('getetag', 'DAV:'): 'etag2'}
+
+    def test_returns_data_for_matching_etag_only(self):
+        self.assertEqual(b'data', self.cache.setData(
+            'id', self.properties1, BytesIO(b'data')).read())
+        self.assertEqual(
+            b'data', self.cache.getData('id', self.properties1).read())
+        with self.assertRaises(KeyError):
+            self.cache.getData('id', self.properties2)
+
+    def test_new_etag_replaces_old_body_file(self):
+        self.cache.setData('id', self.properties1, BytesIO(b'data1'))
+        self.cache.setData('id', self.properties2, BytesIO(b'data2'))
+        self.assertEqual(1, len(os.listdir(self.cache.directory)))
+        self.assertEqual(
+            b'data2', self.cache.getData('id', self.properties2).read())
+
+    def test_data_without_etag_is_not_stored(self):
+        self.assertEqual(b'data', self.cache.setData(
+            'id', {}, BytesIO(b'data')).read())
+        self.assertEqual([], os.listdir(self.cache.directory))
+
+    def test_remove_deletes_body_file(self):
+        self.cache.setData('id', self.properties1, BytesIO(b'data'))
+        self.cache.remove('id')
+        self.assertEqual([], os.listdir(self.cache.directory))
+        with self.assertRaises(KeyError):
+            self.cache.getData('id', self.properties1)
+
+    def test_sweep_removes_body_files_beyond_max_entries(self):
+        self.cache.setData('old', self.properties1, BytesIO(b'data'))
+        self.cache.setData('new', self.properties1, BytesIO(b'data'))
+        self.database.execute(
+            'UPDATE body SET accessed = accessed - 1 WHERE key = ?', 'old')
+        self.cache.sweep(max_entries=1)
+        self.assertEqual(1, len(os.listdir(self.cache.directory)))
+        with self.assertRaises(KeyError):
+            self.cache.getData('old', self.properties1)
+        self.assertEqual(
+            b'data', self.cache.getData('new', self.properties1).read())
@@ -1,4 +1,9 @@
+from unittest import mock
+import transaction
+import unittest
+import zeit.connector.connector
 import zeit.connector.testing
+import zeit.connector.zopeconnector
 
 
 class TestMoveRollback(zeit.connector.testing.ConnectorTest):
@@ -51,3 +56,120 @@ class TestMoveRollback(zeit.connector.testing.ConnectorTest):
             [name for name, unique_id in self.connector.listCollection(
                 'http://xml.zeit.de/%s' % self.testfolder)
              if name])
+
+
+class InvalidationQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.connector = zeit.connector.zopeconnector.ZopeConnector(
+            {'default': 'http://localhost/cms/'})
+        patcher = mock.patch.object(
+            zeit.connector.connector.Connector, '_refresh_cache',
+            return_value=0)
+        self.refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        transaction.abort()
+        super().tearDown()
+
+    def test_repeated_invalidations_are_refreshed_once_before_commit(self):
+        self.connector.queue_invalidation('http://xml.zeit.de/foo')
+        self.connector.queue_invalidation('http://xml.zeit.de/bar')
+        self.connector.queue_invalidation('http://xml.zeit.de/foo')
+        self.assertFalse(self.refresh.called)
+        transaction.commit()
+        self.refresh.assert_called_once_with(
+            ['http://xml.zeit.de/foo', 'http://xml.zeit.de/bar'])
+        stats = self.connector.invalidation_stats
+        self.assertEqual(2, stats['queued'])
+        self.assertEqual(1, stats['duplicates'])
+        self.assertEqual(2, stats['refreshed'])
+
+    def test_pending_invalidations_are_refreshed_before_next_read(self):
+        self.connector.queue_invalidation('http://xml.zeit.de/foo')
+        with mock.patch.object(
+                zeit.connector.connector.Connector, '__getitem__'):
+            self.connector['http://xml.zeit.de/foo']
+        self.refresh.assert_called_once_with(['http://xml.zeit.de/foo'])
+        transaction.commit()
+        self.assertEqual(1, self.refresh.call_count)
+
+    def test_pending_invalidations_are_refreshed_on_abort(self):
+        self.connector.queue_invalidation('http://xml.zeit.de/foo')
+        transaction.abort()
+        self.refresh.assert_called_once_with(['http://xml.zeit.de/foo'])
+
+    def test_abort_succeeds_even_if_refresh_fails(self):
+        self.connector.queue_invalidation('http://xml.zeit.de/foo')
+        datamanager = self.connector.get_datamanager()
+        self.refresh.side_effect = RuntimeError('provoked')
+        transaction.abort()
+        self.assertFalse(datamanager.invalidations)
+
+    def test_invalid_id_raises_right_away(self):
+        with self.assertRaises(ValueError):
+            self.connector.queue_invalidation('the quick brown fox')
+
+
+class RefreshCacheTest(unittest.TestCase):
+
+    def test_shared_parent_is_refreshed_only_once(self):
+        connector = zeit.connector.connector.Connector(
+            {'default': 'http://localhost/cms/'})
+        with mock.patch.object(
+                connector, '_refresh_resource',
+                side_effect=lambda x: connector._id_splitlast(x)[0]), \
+                mock.patch.object(connector, '_refresh_parent') as parent:
+            self.assertEqual(1, connector._refresh_cache([
+                'http://xml.zeit.de/folder/a',
+                'http://xml.zeit.de/folder/b',
+                'http://xml.zeit.de/folder/sub/',
+                'http://xml.zeit.de/folder/sub/c']))
+        parent.assert_called_once_with('http://xml.zeit.de/folder/')
+
+
+class ConnectionReuseTest(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.connector = zeit.connector.zopeconnector.ZopeConnector(
+            {'default': 'http://localhost/cms/'})
+
+    def tearDown(self):
+        transaction.abort()
+        super().tearDown()
+
+    def test_connection_is_kept_across_transactions(self):
+        connection = self.connector.get_connection()
+        datamanager = self.connector.get_datamanager()
+        transaction.commit()
+        self.assertIs(connection, self.connector.get_connection())
+        self.assertIsNot(datamanager, self.connector.get_datamanager())
+        self.assertEqual(
+            {'created': 1, 'idle': 0},
+            self.connector.pool_statistics()['default'])
+
+    def test_referer_header_is_reset_after_transaction(self):
+        connection = self.connector.get_connection()
+        connection.additional_headers['Referer'] = 'http://example.com'
+        transaction.commit()
+        self.assertNotIn(
+            'Referer', self.connector.get_connection().additional_headers)
+
+    def test_connection_is_returned_to_pool_on_abort(self):
+        connection = self.connector.get_connection()
+        transaction.abort()
+        self.assertEqual(
+            1, self.connector.pool_statistics()['default']['idle'])
+        self.assertIs(connection, self.connector.get_connection())
+
+    def test_connection_is_recycled_after_max_requests(self):
+        self.connector.max_requests = 2
+        connection = self.connector.get_connection()
+        connection.requests = 2
+        transaction.commit()
+        self.assertIsNot(connection, self.connector.get_connection())
+        self.assertEqual(
+            1, self.connector.pool_statistics()['default']['recycled'])
@@ -1,10 +1,13 @@
 import ZODB.POSException
+import collections
 import grokcore.component as grok
 import logging
+import time
 import transaction
 import transaction.interfaces
 import zeit.connector.connector
 import zeit.connector.interfaces
+import zope.cachedescriptors.property
 import zope.component
 import zope.event
 import zope.interface
@@ -20,15 +23,54 @@ class ZopeConnector(zeit.connector.connector.Connector):
     """Connector which integrates into zope.component
     and transaction machinery."""
 
-    def create_connection(self, root):
-        connection = super(self.__class__, self).create_connection(root)
-        dm = connection._connector_datamanager = DataManager(self)
+    # A thread keeps its connections across transactions, so keep-alive
+    # sockets stay warm; only the per-transaction state (DataManager,
+    # Referer header) is reset when a transaction ends, see release().
+
+    def get_connection(self, root='default'):
+        connection = super(ZopeConnector, self).get_connection(root)
+        if connection._connector_datamanager is not None:
+            return connection
+        released = connection._connector_released
+        if released is not None and not self.get_pool(root).check(
+                connection, released):
+            delattr(self.connections, root)
+            connection = super(ZopeConnector, self).get_connection(root)
+        dm = connection._connector_datamanager = DataManager(self, root)
         transaction.get().join(dm)
         url = self._get_calling_url()
         if url is not None:
             connection.additional_headers['Referer'] = url
         return connection
 
+    def create_connection(self, root):
+        connection = super(ZopeConnector, self).create_connection(root)
+        connection._connector_datamanager = None
+        connection._connector_released = None
+        return connection
+
+    def release(self, root, reset=False):
+        """End the transaction of the current thread's connection to `root`.
+
+        The connection is kept for the next transaction, unless `reset` is
+        given (after an error), then it is returned to the pool, which closes
+        it if it is in an inconsistent state. Connections that reached their
+        request limit are closed.
+        """
+        connection = getattr(self.connections, root, None)
+        if connection is None:
+            return
+        connection._connector_datamanager = None
+        connection.additional_headers.pop('Referer', None)
+        pool = self.get_pool(root)
+        if reset:
+            delattr(self.connections, root)
+            pool.put(connection)
+        elif pool.reusable(connection):
+            connection._connector_released = time.time()
+        else:
+            delattr(self.connections, root)
+
     def _get_calling_url(self):
         try:
             interaction = zope.security.management.getInteraction()
@@ -44,13 +86,13 @@ class ZopeConnector(zeit.connector.connector.Connector):
         return conn._connector_datamanager
 
     def lock(self, id, principal, until):
-        locktoken = super(self.__class__, self).lock(id, principal, until)
+        locktoken = super(ZopeConnector, self).lock(id, principal, until)
         datamanager = self.get_datamanager()
         datamanager.add_cleanup(self.unlock, id, locktoken, False)
         return locktoken
 
     def unlock(self, id, locktoken=None, invalidate=True):
-        locktoken = super(self.__class__, self).unlock(
+        locktoken = super(ZopeConnector, self).unlock(
             id, locktoken, invalidate)
         self.get_datamanager().remove_cleanup(
             self.unlock, id, locktoken, False)
@@ -81,6 +123,53 @@ class ZopeConnector(zeit.connector.connector.Connector):
         zope.event.notify(
             zeit.connector.interfaces.ResourceInvaliatedEvent(id))
 
+    # Invalidation events (e.g. add() sends up to four for the same id, via
+    # lock and unlock) are not refreshed right away, but queued on the
+    # DataManager. The queue is refreshed in one pass before commit, or
+    # before the next read, whichever comes first.
+
+    @zope.cachedescriptors.property.Lazy
+    def invalidation_stats(self):
+        return collections.Counter()
+
+    def queue_invalidation(self, id):
+        self._id2loc(id)  # Raise ValueError now, not only on refresh.
+        self.canonical_id_cache.invalidate(id)
+        if not self.get_datamanager().queue_invalidation(id):
+            self.invalidate_cache(id)
+
+    def flush_invalidations(self):
+        connection = getattr(self.connections, 'default', None)
+        datamanager = getattr(connection, '_connector_datamanager', None)
+        if datamanager is not None:
+            datamanager.flush_invalidations()
+
+    def _refresh_cache(self, ids):
+        parents = super(ZopeConnector, self)._refresh_cache(ids)
+        self.invalidation_stats['refreshed'] += len(ids)
+        self.invalidation_stats['parents'] += parents
+        return parents
+
+    def listCollection(self, id):
+        self.flush_invalidations()
+        return super(ZopeConnector, self).listCollection(id)
+
+    def __getitem__(self, id):
+        self.flush_invalidations()
+        return super(ZopeConnector, self).__getitem__(id)
+
+    def prefetch(self, ids, body=False):
+        self.flush_invalidations()
+        return super(ZopeConnector, self).prefetch(ids, body)
+
+    def _get_resource_properties(self, id):
+        self.flush_invalidations()
+        return super(ZopeConnector, self)._get_resource_properties(id)
+
+    def _get_resource_child_ids(self, id):
+        self.flush_invalidations()
+        return super(ZopeConnector, self)._get_resource_child_ids(id)
+
 
 def connectorFactory():
     """Factory for creating the connector with data from zope.conf."""
@@ -89,23 +178,30 @@ def connectorFactory():
         'zeit.connector')
     return ZopeConnector({
         'default': config['document-store'],
-        'search': config['document-store-search']})
+        'search': config['document-store-search']},
+        **zeit.connector.connector.pool_settings(config))
 
 
 @zope.interface.implementer(transaction.interfaces.IDataManager)
 class DataManager(object):
     """Takes care of the transaction process in Zope. """
 
-    def __init__(self, connector):
+    def __init__(self, connector, root='default'):
         self.connector = connector
+        self.root = root
         self.cleanup = []
+        self.invalidations = collections.OrderedDict()
+        self.finishing = False
+        self._hook_registered = False
 
     def abort(self, trans):
+        self.finishing = True
         self._cleanup()
-        self.connector.disconnect()
+        self._flush_after_abort()
+        self.connector.release(self.root, reset=True)
 
     def tpc_begin(self, trans):
-        pass
+        self.finishing = True
 
     def commit(self, trans):
         pass
@@ -114,11 +210,13 @@ class DataManager(object):
         pass
 
     def tpc_finish(self, trans):
-        self.connector.disconnect()
+        self.connector.release(self.root)
 
     def tpc_abort(self, trans):
+        self.finishing = True
         self._cleanup()
-        self.connector.disconnect()
+        self._flush_after_abort()
+        self.connector.release(self.root, reset=True)
 
     def sortKey(self):
         return str(id(self))
@@ -136,6 +234,44 @@ class DataManager(object):
         except ValueError:
             pass
 
+    def queue_invalidation(self, id):
+        """Queue `id` to be refreshed in the caches. Returns False if the
+        transaction is finishing already, so the caller has to refresh it
+        right away."""
+        if self.finishing:
+            return False
+        stats = self.connector.invalidation_stats
+        if id in self.invalidations:
+            stats['duplicates'] += 1
+            return True
+        stats['queued'] += 1
+        self.invalidations[id] = True
+        if not self._hook_registered:
+            # The caches are persistent, so they must be refreshed before
+            # the ZODB commits.
+            transaction.get().addBeforeCommitHook(self.flush_invalidations)
+            self._hook_registered = True
+        return True
+
+    def flush_invalidations(self):
+        # Refreshing may queue further ids (e.g. a redirect target).
+        while self.invalidations:
+            ids = list(self.invalidations)
+            self.invalidations.clear()
+            log.debug('Refreshing %s invalidated resources', len(ids))
+            self.connector._refresh_cache(ids)
+
+    def _flush_after_abort(self):
+        # DAV is not transactional, so writes that have happened stay even
+        # though the transaction is aborted, and the caches must learn about
+        # them (the SQLite ones even persist across aborts).
+        try:
+            self.flush_invalidations()
+        except Exception:
+            log.warning("Refreshing invalidated resources failed",
+                        exc_info=True)
+            self.invalidations.clear()
+
     def _cleanup(self):
         for method, args, kwargs in self.cleanup:
             log.info("Abort cleanup: %s(%s, %s)" % (method, args, kwargs))
@@ -160,8 +296,11 @@ class ConnectorSavepoint(object):
 def invalidate_cache(event):
     connector = zope.component.getUtility(
         zeit.connector.interfaces.IConnector)
+    # Only ZopeConnector can defer the refresh to the end of the transaction.
+    invalidate = getattr(
+        connector, 'queue_invalidation', connector.invalidate_cache)
     try:
-        connector.invalidate_cache(event.id)
+        invalidate(event.id)
     except ValueError:
         # The connector isn't responsible for the id, or the id is just plain
         # invalid. There is nothing to invalidate then anyway.
@@ -41,6 +41,15 @@ class EditableBody(zeit.content.article.edit.container.TypeOnTagContainer,
                 result.append(self._set_default_key(child))
         return result
 
+    def _get_child_nodes(self, xml_node):
+        result = []
+        for didx, division in enumerate(
+                xml_node.xpath('division[@type="page"]'), start=1):
+            if didx > 1:
+                result.append(division)
+            result.extend(division.iterchildren('*'))
+        return result
+
     def values(self):
         # We re-implement values() so it works without keys(), since those are
         # not present in the repository and anyway created on demand, which is
@@ -12,6 +12,15 @@ class TypeOnTagContainer(zeit.edit.container.Base):
     def _get_element_type(self, xml_node):
         return xml_node.tag
 
+    def _get_nodes(self, xml_node):
+        # Unlike _get_keys this is used for read-only access, so it must not
+        # write default keys. Nodes without a key are not indexed then.
+        return [(x.get('{http://namespaces.zeit.de/CMS/cp}__name__'), x)
+                for x in self._get_child_nodes(xml_node)]
+
+    def _get_child_nodes(self, xml_node):
+        return xml_node.iterchildren('*')
+
     def _set_default_key(self, xml_node):
         key = xml_node.get('{http://namespaces.zeit.de/CMS/cp}__name__')
         if not key:
@@ -3,12 +3,14 @@ from zeit.cms.checkout.interfaces import ICheckinManager
 from zeit.cms.checkout.interfaces import ICheckoutManager
 from zeit.content.article.edit.interfaces import IDivision
 import gocept.testing.mock
+import lxml.etree
 import lxml.objectify
 import six
 import unittest
 import zeit.cms.testing
 import zeit.content.article.article
 import zeit.content.article.edit.body
+import zeit.content.article.edit.interfaces
 import zeit.content.article.testing
 import zeit.edit.interfaces
 import zope.schema
@@ -141,6 +143,22 @@ class EditableBodyTest(zeit.content.article.testing.FunctionalTestCase):
         body = self.get_body('<division><p>foo</p><!-- comment --></division>')
         self.assertEqual(1, len(body.keys()))
 
+    def test_getitem_does_not_change_repository_content(self):
+        article = zeit.content.article.article.Article()
+        article.xml.body = lxml.objectify.XML("""
+            <body xmlns:cp="http://namespaces.zeit.de/CMS/cp">
+              <division type="page"><p cp:__name__="named">foo</p><p/>
+              </division>
+            </body>""")
+        self.repository['article'] = article
+        article = self.repository['article']
+        body = zeit.content.article.edit.interfaces.IEditableBody(article)
+        before = lxml.etree.tostring(article.xml)
+        self.assertEqual('named', body['named'].__name__)
+        with self.assertRaises(KeyError):
+            body['id-1']
+        self.assertEqual(before, lxml.etree.tostring(article.xml))
+
 
 class TestCleaner(unittest.TestCase):
 
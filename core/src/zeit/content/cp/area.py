@@ -55,6 +55,9 @@ class Region(zeit.content.cp.blocks.block.VisibleMixin,
     def _get_keys(self, xml):
         return [x.get('area') for x in xml.getchildren()]
 
+    def _get_nodes(self, xml):
+        return [(x.get('area'), x) for x in xml.getchildren()]
+
 
 class RegionFactory(zeit.edit.block.ElementFactory):
 
@@ -1,6 +1,9 @@
+from zeit.cms.content.cache import content_cache
 from zeit.content.cp.area import cached_on_content
 from zeit.content.cp.interfaces import IAutomaticTeaserBlock
+from zeit.content.cp.interfaces import IRenderedArea
 from zope.cachedescriptors.property import Lazy as cachedproperty
+import concurrent.futures
 import logging
 import zeit.cms.content.interfaces
 import zeit.cms.interfaces
@@ -86,6 +89,95 @@ class AutomaticArea(zeit.cms.content.xmlsupport.Persistent):
                 yield child
 
 
+def prefetch(cp, workers=4):
+    """Performs the queries of those automatic areas of `cp` that don't
+    depend on the result of other areas in advance, and all together: The
+    Elasticsearch queries with a single request, the TMS queries in parallel.
+    The areas then find their responses in the `content_cache` of `cp`.
+
+    With hide_dupes, an area must not repeat the teasers of automatic areas
+    above it, so its query can only be built after they have been rendered.
+    """
+    cache = content_cache(cp, 'prefetched_automatic_areas')
+    if cache:
+        return
+    cache['done'] = True
+
+    es_queries = []
+    tms_queries = {}
+    has_automatic_above = False
+    for area in cp.cached_areas:
+        if not area.automatic:
+            continue
+        independent = not (area.hide_dupes and has_automatic_above)
+        has_automatic_above = True
+        if not independent:
+            continue
+        try:
+            query = IRenderedArea(area)._content_query
+        except LookupError:
+            continue
+        if isinstance(query, zeit.contentquery.query.CPTMSContentQuery):
+            key = (query.topicpage, query.filter_id, query.start, query.order)
+            tms_queries.setdefault(key, query)
+        elif isinstance(
+                query, zeit.contentquery.query.ElasticsearchContentQuery):
+            try:
+                es_queries.append((query, query._build_query()))
+            except Exception:
+                continue  # Logged when the area performs the query itself
+
+    _prefetch_elasticsearch(cp, es_queries)
+    _prefetch_tms(cp, tms_queries, workers)
+
+
+def _prefetch_elasticsearch(cp, queries):
+    if len(queries) < 2:
+        return
+    cache = content_cache(cp, 'elasticsearch_queries')
+    es = zope.component.getUtility(zeit.retresco.interfaces.IElasticsearch)
+    try:
+        for include_payload in set(x.include_payload for x, _ in queries):
+            group = [x for x in queries if x[0].include_payload ==
+                     include_payload]
+            responses = es.msearch(
+                [(q, x.start, x.rows) for x, q in group],
+                include_payload=include_payload)
+            for (query, q), response in zip(group, responses):
+                if isinstance(response, Exception):
+                    continue  # The area will retry and handle the error.
+                cache[query.prefetch_key(q)] = response
+    except Exception:
+        log.warning('Error during elasticsearch msearch for %s',
+                    cp.uniqueId, exc_info=True)
+
+
+def _prefetch_tms(cp, queries, workers):
+    if len(queries) < 2:
+        return
+    cache = content_cache(cp, 'topic_queries')
+    tms = zope.component.getUtility(zeit.retresco.interfaces.ITMS)
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='prefetch-areas') as pool:
+        # Only the HTTP requests run in the threads, everything that accesses
+        # the areas happens here, see TMSContentQuery._fetch()
+        futures = {
+            key: pool.submit(
+                tms.get_topicpage_documents, id=key[0], filter=key[1],
+                order=key[3], start=key[2], rows=query._teaser_count + 5)
+            for key, query in queries.items()}
+        for key, future in futures.items():
+            try:
+                response = future.result()
+            except Exception:
+                continue  # The area will retry and handle the error.
+            # The area takes the response from the cache without calling
+            # _get_documents(), so its resources have to be prefetched here.
+            queries[key]._prefetch(response)
+            cache[key] = iter(response), key[2], response.hits
+
+
 def pop_filter(items, predicate=None):
     """Remove the first object from the list for which predicate returns True;
     no predicate means no filtering.
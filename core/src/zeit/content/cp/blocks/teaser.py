@@ -4,6 +4,7 @@ import grokcore.component as grok
 import lxml.objectify
 import zeit.cms.content.property
 import zeit.cms.interfaces
+import zeit.cms.repository.interfaces
 import zeit.cms.syndication.feed
 import zeit.cms.syndication.interfaces
 import zeit.content.cp.blocks.block
@@ -113,10 +114,19 @@ def cms_content_iter(context):
 @grok.adapter(zeit.content.cp.interfaces.ICenterPage)
 @grok.implementer(zeit.content.cp.interfaces.ITeaseredContent)
 def extract_teasers_from_cp(context):
-    for region in context.values():
-        for area in region.values():
-            for teaser in zeit.content.cp.interfaces.ITeaseredContent(area):
-                yield teaser
+    areas = [area for region in context.values() for area in region.values()]
+    repository = zope.component.queryUtility(
+        zeit.cms.repository.interfaces.IRepository)
+    if repository is not None:
+        # Resolve the referenced content in bulk instead of one by one.
+        repository.prefetch([
+            unique_id for area in areas
+            for block in area.filter_values(
+                zeit.content.cp.interfaces.ITeaserBlock)
+            for unique_id in block.keys()])
+    for area in areas:
+        for teaser in zeit.content.cp.interfaces.ITeaseredContent(area):
+            yield teaser
 
 
 @grok.adapter(zeit.content.cp.interfaces.IArea)
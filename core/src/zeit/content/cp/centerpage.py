@@ -19,6 +19,7 @@ import zeit.cms.content.reference
 import zeit.cms.interfaces
 import zeit.cms.type
 import zeit.cms.workflow.interfaces
+import zeit.content.cp.automatic
 import zeit.content.cp.interfaces
 import zeit.edit.body
 import zeit.edit.container
@@ -206,6 +207,15 @@ class CenterPage(zeit.cms.content.metadata.CommonMetadata):
                     areas.append(area)
         return self.cache[key]
 
+    def prefetch_automatic_areas(self):
+        """Performs the queries of the automatic areas in advance (once per
+        transaction), so they don't run one after the other while rendering.
+
+        Only worth it when all areas are rendered, so callers that do that
+        have to call this first.
+        """
+        zeit.content.cp.automatic.prefetch(self)
+
 
 class CenterPageType(zeit.cms.type.XMLContentTypeDeclaration):
 
@@ -230,6 +240,9 @@ class Body(zeit.edit.container.Base,
     def _get_element_type(self, xml_node):
         return 'region'
 
+    def _get_nodes(self, xml_node):
+        return [(x.get('area'), x) for x in xml_node.iterchildren('*')]
+
     def __getitem__(self, key):
         if key in ['lead', 'informatives']:
             # backwards compatiblity for tests
@@ -329,6 +342,7 @@ def rendered_xml(context):
     root.append(copy.copy(context.xml.head))
     body = lxml.objectify.E.body()
     root.append(body)
+    context.prefetch_automatic_areas()
     for region in context.body.values():
         body.append(zeit.content.cp.interfaces.IRenderedXML(region))
     return root
@@ -196,6 +196,35 @@ class AutomaticAreaElasticsearchTest(
                 dict(start=0, rows=1, include_payload=False)),
             self.elasticsearch.search.call_args)
 
+    def test_prefetches_content_of_results_from_repository(self):
+        self.area.elasticsearch_raw_query = '{"query": {}}'
+        result = zeit.cms.interfaces.Result(
+            [{'url': '/testcontent'}, {'url': '/cp'}])
+        result.hits = 2
+        self.elasticsearch.search.return_value = result
+        with mock.patch.object(self.repository, 'prefetch') as prefetch:
+            IRenderedArea(self.area).values()
+        prefetch.assert_called_with(
+            ['http://xml.zeit.de/testcontent', 'http://xml.zeit.de/cp'])
+
+    def test_builds_content_from_payload_if_configured(self):
+        self.area.elasticsearch_raw_query = '{"query": {}}'
+        result = zeit.cms.interfaces.Result([{
+            'url': '/testcontent', 'doc_type': 'testcontenttype'}])
+        result.hits = 1
+        self.elasticsearch.search.return_value = result
+        with mock.patch.object(
+                zeit.contentquery.query.ElasticsearchContentQuery,
+                'payload_content', True), \
+                mock.patch.object(self.repository, 'prefetch') as prefetch:
+            content = list(IRenderedArea(self.area).values()[0])[0]
+        self.assertFalse(prefetch.called)
+        self.assertTrue(
+            zeit.retresco.interfaces.ITMSContent.providedBy(content))
+        self.assertEqual('http://xml.zeit.de/testcontent', content.uniqueId)
+        self.assertTrue(
+            self.elasticsearch.search.call_args[1]['include_payload'])
+
     def test_builds_query_from_conditions(self):
         lead = self.repository['cp']['lead']
         lead.count = 1
@@ -459,6 +488,67 @@ class AutomaticAreaElasticsearchTest(
             query['sort'])
 
 
+class PrefetchTest(zeit.content.cp.testing.FunctionalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cp = zeit.content.cp.centerpage.CenterPage()
+        self.areas = []
+        for i in range(3):
+            area = self.cp['feature'].create_item('area')
+            area.count = 1
+            area.automatic = True
+            area.automatic_type = 'elasticsearch-query'
+            area.elasticsearch_raw_query = json.dumps(
+                {'query': {'match': {'title': 'area%s' % i}}})
+            area.hide_dupes = False
+            self.areas.append(area)
+        self.repository['cp'] = self.cp
+        self.elasticsearch = zope.component.getUtility(
+            zeit.retresco.interfaces.IElasticsearch)
+        result = zeit.cms.interfaces.Result([{'url': '/testcontent'}])
+        result.hits = 1
+        self.elasticsearch.msearch.side_effect = lambda searches, **kw: [
+            result for x in searches]
+
+    def test_performs_queries_of_all_areas_with_one_request(self):
+        self.cp.prefetch_automatic_areas()
+        for area in self.areas:
+            self.assertEqual(
+                'http://xml.zeit.de/testcontent',
+                list(IRenderedArea(area).values()[0])[0].uniqueId)
+        self.assertEqual(1, self.elasticsearch.msearch.call_count)
+        self.assertEqual(
+            3, len(self.elasticsearch.msearch.call_args[0][0]))
+        self.assertFalse(self.elasticsearch.search.called)
+
+    def test_areas_with_hide_dupes_below_automatic_areas_are_not_prefetched(
+            self):
+        self.areas[2].hide_dupes = True
+        self.elasticsearch.search.return_value = zeit.cms.interfaces.Result()
+        self.cp.prefetch_automatic_areas()
+        self.assertEqual(
+            2, len(self.elasticsearch.msearch.call_args[0][0]))
+
+    def test_failed_prefetch_falls_back_to_single_query(self):
+        self.elasticsearch.msearch.side_effect = RuntimeError('provoked')
+        self.elasticsearch.search.return_value = zeit.cms.interfaces.Result()
+        self.cp.prefetch_automatic_areas()
+        self.assertEqual([], IRenderedArea(self.areas[0]).values())
+        self.assertTrue(self.elasticsearch.search.called)
+
+    def test_rendering_single_area_does_not_query_other_areas(self):
+        self.elasticsearch.search.return_value = zeit.cms.interfaces.Result()
+        IRenderedArea(self.areas[0]).values()
+        self.assertFalse(self.elasticsearch.msearch.called)
+        self.assertEqual(1, self.elasticsearch.search.call_count)
+
+    def test_rendering_centerpage_prefetches_areas(self):
+        zeit.content.cp.interfaces.IRenderedXML(self.cp)
+        self.assertEqual(1, self.elasticsearch.msearch.call_count)
+        self.assertFalse(self.elasticsearch.search.called)
+
+
 class AutomaticAreaTopicpageTest(zeit.content.cp.testing.FunctionalTestCase):
 
     def setUp(self):
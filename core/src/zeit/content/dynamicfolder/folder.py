@@ -3,6 +3,8 @@ from io import BytesIO
 from zeit.cms.i18n import MessageFactory as _
 from zeit.cms.content.contentuuid import ContentUUID
 from zeit.content.dynamicfolder.interfaces import IVirtualContent
+import collections
+import collections.abc
 import copy
 import grokcore.component as grok
 import hashlib
@@ -12,6 +14,7 @@ import lxml.objectify
 import persistent
 import six
 import six.moves.urllib.parse
+import threading
 import uuid
 import zeit.cms.content.dav
 import zeit.cms.interfaces
@@ -22,6 +25,8 @@ import zeit.connector.resource
 import zeit.content.dynamicfolder.interfaces
 import zeit.workflow.dependency
 import zope.app.locking.interfaces
+import zope.cachedescriptors.property
+import zope.component
 import zope.container.contained
 import zope.interface
 import zope.security.proxy
@@ -95,7 +100,7 @@ class RepositoryDynamicFolder(
 
     def _create_virtual_content(self, key):
         body = self.content_template.render(
-            **self.virtual_content[key]).encode('utf-8')
+            **dict(self.virtual_content[key], __parent__=self)).encode('utf-8')
         properties = VirtualProperties.parse(body)
         resource = zeit.connector.resource.Resource(
             id=self._get_id_for_name(key),
@@ -136,17 +141,35 @@ class RepositoryDynamicFolder(
         if not self.config_file:
             return None
 
-        if not hasattr(self, '_v_config'):
-            config = lxml.objectify.fromstring(
-                zeit.connector.interfaces.IResource(
-                    self.config_file).data.read())
-            for include in config.xpath('//include'):
-                parent = include.getparent()
-                parent.remove(include)
-                for node in self._resolve_include(include):
-                    parent.append(node)
-            self._v_config = config
-        return self._v_config
+        if not hasattr(self, '_v_parsed_config'):
+            self._v_parsed_config = self._load_config()
+        return self._v_parsed_config.xml
+
+    def _load_config(self):
+        """Returns the ParsedConfig, from CONFIG_CACHE if neither the config
+        file nor its includes changed."""
+        config_etag = _etag(self.config_file.uniqueId)
+        key = (self.config_file.uniqueId, config_etag)
+        if config_etag:
+            try:
+                return CONFIG_CACHE.get(key)
+            except KeyError:
+                pass
+
+        config = lxml.objectify.fromstring(
+            zeit.connector.interfaces.IResource(
+                self.config_file).data.read())
+        includes = []
+        for include in config.xpath('//include'):
+            includes.append((include.get('href'), _etag(include.get('href'))))
+            parent = include.getparent()
+            parent.remove(include)
+            for node in self._resolve_include(include):
+                parent.append(node)
+        result = ParsedConfig(config, includes)
+        if config_etag and all(etag for _, etag in includes):
+            CONFIG_CACHE.set(key, result)
+        return result
 
     @staticmethod
     def _resolve_include(include):
@@ -160,29 +183,14 @@ class RepositoryDynamicFolder(
 
     @property
     def virtual_content(self):
-        """Read virtual content from XML files and return as dict."""
+        """Read virtual content from XML files and return as dict.
+
+        The dict is shared with other instances of this folder, so it must
+        not be changed.
+        """
         if self.config is None:
             return {}
-
-        if not hasattr(self, '_v_virtual_content'):
-            contents = {}
-            key_getter = self.config.body.get('key', 'text()')
-            for entry in self.config.body.getchildren():
-                key_match = entry.xpath(key_getter)
-                if not key_match:
-                    continue  # entry provides no key
-                key = six.moves.urllib.parse.unquote(key_match[0])
-                if isinstance(key, lxml.etree._ElementUnicodeResult):
-                    # Dear lxml, why?
-                    key = six.text_type(key)
-                else:
-                    key = six.ensure_text(key)
-                contents[key] = dict(entry.attrib)  # copy
-                contents[key]['text'] = entry.text
-                contents[key]['__parent__'] = self
-            self._v_virtual_content = contents
-
-        return self._v_virtual_content
+        return self._v_parsed_config.virtual_content
 
     @property
     def _local_unique_map(self):
@@ -193,14 +201,125 @@ class RepositoryDynamicFolder(
         The base implementation of the property has a side effect: It stores
         the data when retrieving the first time. Since we do not know whether
         the virtual content was already attached, we need to do it on every
-        call, i.e. we cannot reuse the storing mechanism.
+        call, i.e. we cannot reuse the storing mechanism. Thus we return a
+        view of both instead of copying them.
 
         """
-        contents = super(RepositoryDynamicFolder, self)._local_unique_map
-        result = self.virtual_content.copy()
-        result.update(contents)
+        return MergedMap(
+            super(RepositoryDynamicFolder, self)._local_unique_map,
+            self.virtual_content)
+
+
+class MergedMap(collections.abc.Mapping):
+    """Read-only view of the `contents` of a folder and its `virtual`
+    content, where the former take precedence."""
+
+    def __init__(self, contents, virtual):
+        self.contents = contents
+        self.virtual = virtual
+
+    def __getitem__(self, key):
+        try:
+            return self.contents[key]
+        except KeyError:
+            return self.virtual[key]
+
+    def __contains__(self, key):
+        return key in self.contents or key in self.virtual
+
+    def __iter__(self):
+        for key in self.contents:
+            yield key
+        for key in self.virtual:
+            if key not in self.contents:
+                yield key
+
+    def __len__(self):
+        # There are usually only few actual contents, but lots of virtual ones
+        return len(self.virtual) + sum(
+            1 for x in self.contents if x not in self.virtual)
+
+
+class ParsedConfig(object):
+    """The config of a dynamic folder with all includes resolved, and the
+    virtual content it defines."""
+
+    def __init__(self, xml, includes=()):
+        self.xml = xml
+        # (uniqueId, etag) of the included files
+        self.includes = includes
+
+    @zope.cachedescriptors.property.Lazy
+    def virtual_content(self):
+        contents = {}
+        key_getter = self.xml.body.get('key', 'text()')
+        for entry in self.xml.body.getchildren():
+            key_match = entry.xpath(key_getter)
+            if not key_match:
+                continue  # entry provides no key
+            key = six.moves.urllib.parse.unquote(key_match[0])
+            if isinstance(key, lxml.etree._ElementUnicodeResult):
+                # Dear lxml, why?
+                key = six.text_type(key)
+            else:
+                key = six.ensure_text(key)
+            contents[key] = dict(entry.attrib)  # copy
+            contents[key]['text'] = entry.text
+        return contents
+
+
+class ConfigCache(object):
+    """Process-wide cache of parsed dynamic folder configs and the virtual
+    content they define, so they are not re-read and re-parsed for every
+    folder instance (i.e. in every transaction).
+
+    Entries are keyed by uniqueId and etag of the config file, and are only
+    used while the etags of all included files are unchanged, too. At most
+    `size` entries are kept, the least recently used ones are dropped.
+    """
+
+    def __init__(self, size=20):
+        self.size = size
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the ParsedConfig or raise KeyError."""
+        with self._lock:
+            result = self._data[key]
+            self._data.move_to_end(key)
+        if any(_etag(id) != etag for id, etag in result.includes):
+            self.invalidate(key)
+            raise KeyError(key)
         return result
 
+    def set(self, key, parsed_config):
+        with self._lock:
+            self._data[key] = parsed_config
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+CONFIG_CACHE = ConfigCache()
+
+
+def _etag(unique_id):
+    connector = zope.component.getUtility(
+        zeit.connector.interfaces.IConnector)
+    try:
+        return connector[unique_id].properties.get(('getetag', 'DAV:'))
+    except KeyError:
+        return None
+
 
 @zope.interface.implementer(
     zeit.content.dynamicfolder.interfaces.ILocalDynamicFolder)
@@ -13,6 +13,7 @@ import zeit.cms.repository.folder
 import zeit.cms.testcontenttype.testcontenttype
 import zeit.cms.testing
 import zeit.content.cp.interfaces
+import zeit.content.dynamicfolder.folder
 import zeit.content.dynamicfolder.interfaces as DFinterfaces
 import zeit.content.dynamicfolder.materialize
 import zeit.content.dynamicfolder.testing
@@ -235,6 +236,35 @@ class TestDynamicFolder(
         self.assert_not_published(self.folder.config_file)
         self.assert_not_published(self.folder.content_template_file)
 
+    def test_parsed_config_is_shared_until_an_include_changes(self):
+        module = zeit.content.dynamicfolder.folder
+        module.CONFIG_CACHE.clear()
+        with mock.patch.object(
+                module, 'ParsedConfig', wraps=module.ParsedConfig) as parse:
+            self.assertIn('xanten', self.folder)
+            self.repository.uncontained_content = {}
+            self.assertIn('xanten', self.repository['dynamicfolder'])
+            self.assertEqual(1, parse.call_count)
+
+            self.repository['data']['tags.xml'] = PersistentUnknownResource(
+                data=u'<tags><tag type="Location" url_value="foo"/></tags>')
+            self.repository.uncontained_content = {}
+            self.assertEqual(
+                ['foo'], list(self.repository['dynamicfolder'].keys()))
+            self.assertEqual(2, parse.call_count)
+
+    def test_local_unique_map_prefers_actual_over_virtual_content(self):
+        self.folder['xanten'] = (
+            zeit.cms.testcontenttype.testcontenttype.ExampleContentType())
+        self.folder['foo'] = (
+            zeit.cms.testcontenttype.testcontenttype.ExampleContentType())
+        unique_map = self.folder._local_unique_map
+        self.assertEqual(6, len(unique_map))
+        self.assertEqual(
+            'http://xml.zeit.de/dynamicfolder/xanten', unique_map['xanten'])
+        self.assertEqual('Xinjiang', unique_map['xinjiang']['lexical_value'])
+        self.assertEqual(6, len(list(unique_map)))
+
     def test_does_not_break_on_erroneous_config(self):
         from zeit.content.dynamicfolder.folder import RepositoryDynamicFolder
         dynamic = RepositoryDynamicFolder()
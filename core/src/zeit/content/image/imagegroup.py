@@ -21,7 +21,9 @@ import zeit.cms.repository.repository
 import zeit.cms.type
 import zeit.connector.interfaces
 import zeit.content.image.interfaces
+import zeit.content.image.transform
 import zeit.content.image.variant
+import zope.component
 import zope.container.contained
 import zope.interface
 import zope.lifecycleevent.interfaces
@@ -144,13 +146,29 @@ class ImageGroupBase(object):
             if size is not None:
                 span.set_attributes({'width': size[0], 'height': size[1]})
 
-            # Be defensive about missing meta files, so source could not be
-            # recognized as an image (for zeit.web)
-            transform = zeit.content.image.interfaces.ITransform(source, None)
-            if transform is None:
-                return None
-
-            image = transform.create_variant_image(variant, size, fill, format)
+            cache = zope.component.queryUtility(
+                zeit.content.image.interfaces.IVariantCache)
+            key = None
+            if cache is not None:
+                key = cache.key(source, variant, size, fill, format)
+            data = cache.get(key) if key is not None else None
+            span.set_attributes({'cache_hit': data is not None})
+
+            if data is not None:
+                image = zeit.content.image.transform.create_temporary_image(
+                    source)
+                image.open('w').write(data)
+            else:
+                # Be defensive about missing meta files, so source could not
+                # be recognized as an image (for zeit.web)
+                transform = zeit.content.image.interfaces.ITransform(
+                    source, None)
+                if transform is None:
+                    return None
+                image = transform.create_variant_image(
+                    variant, size, fill, format)
+                if key is not None:
+                    cache.set(key, image.open().read())
             image.__name__ = url or variant.name
             image.__parent__ = self
             image.uniqueId = u'%s%s' % (self.uniqueId, image.__name__)
@@ -165,6 +165,26 @@ class ITransform(zope.interface.Interface):
         """
 
 
+class IVariantCache(zope.interface.Interface):
+    """Cache of rendered variant images (encoded image data)."""
+
+    def key(source, variant, size=None, fill=None, format=None):
+        """Returns the key for rendering `variant` from the IImage `source`,
+        or None if the result cannot be cached."""
+
+    def __contains__(key):
+        """Returns whether data is cached for the key."""
+
+    def get(key):
+        """Returns the cached data (bytes) or None."""
+
+    def set(key, data):
+        """Stores data (bytes)."""
+
+    def invalidate(unique_id):
+        """Removes all entries rendered from the image `unique_id`."""
+
+
 class IPersistentThumbnail(IImage):
     """Persistent thumbnail version of an image."""
 
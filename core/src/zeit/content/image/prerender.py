@@ -0,0 +1,206 @@
+"""Render the variants of an image group ahead of time into the
+IVariantCache, so the first requests after upload/publish don't have to."""
+
+from io import BytesIO
+from zeit.cms.repository.interfaces import ICollection
+import argparse
+import collections
+import concurrent.futures
+import grokcore.component as grok
+import logging
+import sys
+import time
+import zeit.cms.celery
+import zeit.cms.checkout.interfaces
+import zeit.cms.cli
+import zeit.cms.interfaces
+import zeit.content.image.interfaces
+import zeit.content.image.transform
+import zope.app.appsetup.product
+import zope.component
+import zope.lifecycleevent
+
+
+log = logging.getLogger(__name__)
+
+
+class ImageData:
+    """Holds the data of an IImage in memory, so it can be rendered in a
+    worker thread without access to the connector or ZODB."""
+
+    def __init__(self, image):
+        self.__name__ = image.__name__
+        self.format = image.format
+        data = image.open()
+        self.data = data.read()
+        data.close()
+
+    def open(self, mode='r'):
+        return BytesIO(self.data)
+
+
+def config():
+    return zope.app.appsetup.product.getProductConfiguration(
+        'zeit.content.image') or {}
+
+
+def variant_sizes(variant, common_sizes=()):
+    """Returns the sizes `create_variant_image` is usually called with for
+    the given variant: its max size (or None), its fallback size and those
+    of `common_sizes` that match the variant ratio."""
+    if variant.max_width < sys.maxsize > variant.max_height:
+        result = [[variant.max_width, variant.max_height]]
+    else:
+        result = [None]
+    if variant.fallback_size:
+        result.append([variant.fallback_width, variant.fallback_height])
+    if variant.ratio:
+        for width, height in common_sizes:
+            if abs(float(width) / height - variant.ratio) < 0.01:
+                result.append([width, height])
+    unique = []
+    for size in result:
+        if size not in unique:
+            unique.append(size)
+    return unique
+
+
+def parse_sizes(value):
+    result = []
+    for size in (value or '').split():
+        width, height = size.split('x')
+        result.append((int(width), int(height)))
+    return result
+
+
+def prerender(group, workers=4, common_sizes=()):
+    """Renders all variants of the IRepositoryImageGroup `group` that are not
+    cached yet. Returns a dict with the render time in seconds per variant.
+    """
+    cache = zope.component.queryUtility(
+        zeit.content.image.interfaces.IVariantCache)
+    if cache is None or not cache.enabled:
+        return {}
+    source = zeit.content.image.interfaces.IMasterImage(group, None)
+    if source is None:
+        return {}
+
+    jobs = []
+    for variant in zeit.content.image.interfaces.IVariants(group).values():
+        if variant.name in group:
+            continue  # The materialized image is served instead.
+        for size in variant_sizes(variant, common_sizes):
+            key = cache.key(source, variant, size)
+            if key is None:
+                return {}
+            if key not in cache:
+                jobs.append((variant, size, key))
+    if not jobs:
+        return {}
+
+    start = time.time()
+    data = ImageData(source)
+    report = collections.defaultdict(float)
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='prerender-variants') as pool:
+        futures = {pool.submit(_render, data, variant, size): (variant, key)
+                   for variant, size, key in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            variant, key = futures[future]
+            try:
+                rendered, duration = future.result()
+            except Exception:
+                log.warning('Could not render variant %s of %s',
+                            variant.id, group.uniqueId, exc_info=True)
+                continue
+            cache.set(key, rendered)
+            report[variant.id] += duration
+    log.info('Rendered %s variants of %s in %.2f seconds: %s',
+             len(jobs), group.uniqueId, time.time() - start,
+             ', '.join('%s=%.2f' % x for x in sorted(report.items())))
+    return dict(report)
+
+
+def _render(data, variant, size):
+    # PIL releases the GIL while decoding, resizing and encoding, so threads
+    # render in parallel.
+    start = time.time()
+    transform = zeit.content.image.transform.ImageTransform(data)
+    image = transform.create_variant_image(variant, size)
+    return image.open().read(), time.time() - start
+
+
+@zeit.cms.celery.task
+def prerender_variants(unique_id):
+    group = zeit.cms.interfaces.ICMSContent(unique_id, None)
+    if not zeit.content.image.interfaces.IRepositoryImageGroup.providedBy(
+            group):
+        log.warning('Not pre-rendering %s, it is no image group', unique_id)
+        return
+    conf = config()
+    prerender(group, workers=int(conf.get('prerender-workers', 4)),
+              common_sizes=parse_sizes(conf.get('prerender-sizes')))
+
+
+def enabled():
+    cache = zope.component.queryUtility(
+        zeit.content.image.interfaces.IVariantCache)
+    return cache is not None and cache.enabled
+
+
+@grok.subscribe(
+    zeit.content.image.interfaces.IImage,
+    zope.lifecycleevent.IObjectAddedEvent)
+def prerender_on_add(context, event):
+    group = context.__parent__
+    if not zeit.content.image.interfaces.IRepositoryImageGroup.providedBy(
+            group):
+        return
+    if group.master_image != context.__name__ or not enabled():
+        return
+    prerender_variants.delay(group.uniqueId)
+
+
+@grok.subscribe(
+    zeit.content.image.interfaces.IRepositoryImageGroup,
+    zeit.cms.checkout.interfaces.IAfterCheckinEvent)
+def prerender_on_checkin(context, event):
+    if event.publishing:
+        return
+    if enabled():
+        prerender_variants.delay(context.uniqueId)
+
+
+@zeit.cms.cli.runner()
+def prerender_existing():
+    parser = argparse.ArgumentParser(
+        description='Pre-render variants of image groups')
+    parser.add_argument(
+        'ids', nargs='+',
+        help='uniqueIds of image groups, or folders to search for them')
+    parser.add_argument(
+        '--workers', type=int, help='render threads per image group')
+    args = parser.parse_args()
+
+    conf = config()
+    workers = args.workers or int(conf.get('prerender-workers', 4))
+    common_sizes = parse_sizes(conf.get('prerender-sizes'))
+    total = collections.defaultdict(float)
+    count = collections.Counter()
+    queue = collections.deque(args.ids)
+    while queue:
+        content = queue.popleft()
+        if isinstance(content, str):
+            content = zeit.cms.interfaces.ICMSContent(content, None)
+        if zeit.content.image.interfaces.IRepositoryImageGroup.providedBy(
+                content):
+            for variant, duration in prerender(
+                    content, workers, common_sizes).items():
+                total[variant] += duration
+                count[variant] += 1
+        elif ICollection.providedBy(content):
+            queue.extend(content.values())
+    for variant in sorted(total):
+        log.info('%s: %s renders, %.3f seconds average', variant,
+                 count[variant], total[variant] / count[variant])
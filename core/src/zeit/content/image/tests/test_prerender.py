@@ -0,0 +1,81 @@
+from unittest import mock
+from zeit.content.image.testing import create_image_group_with_master_image
+import shutil
+import tempfile
+import zeit.cms.checkout.helper
+import zeit.cms.checkout.interfaces
+import zeit.content.image.interfaces
+import zeit.content.image.prerender
+import zeit.content.image.testing
+import zeit.content.image.transform
+import zeit.content.image.variantcache
+import zope.component
+
+
+class PrerenderTest(zeit.content.image.testing.FunctionalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.group = create_image_group_with_master_image()
+        self.directory = tempfile.mkdtemp()
+        self.cache = zeit.content.image.variantcache.VariantCache(
+            self.directory)
+        zope.component.getGlobalSiteManager().registerUtility(
+            self.cache, zeit.content.image.interfaces.IVariantCache)
+        self.variants = zeit.content.image.interfaces.IVariants(self.group)
+
+    def tearDown(self):
+        zope.component.getGlobalSiteManager().unregisterUtility(
+            self.cache, zeit.content.image.interfaces.IVariantCache)
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def test_variant_sizes_include_max_fallback_and_matching_common(self):
+        sizes = zeit.content.image.prerender.variant_sizes
+        self.assertEqual(
+            [[320, 180], [1600, 900], [640, 360]],
+            sizes(self.variants['small'], [(640, 360), (300, 300)]))
+        self.assertEqual(
+            [None, [300, 300]],
+            sizes(self.variants['square'], [(640, 360), (300, 300)]))
+
+    def test_renders_all_variants_into_cache(self):
+        report = zeit.content.image.prerender.prerender(self.group)
+        self.assertEqual(
+            ['default', 'large', 'small', 'square'], sorted(report))
+        self.assertEqual(6, self.cache.stats['stores'])
+        self.assertEqual({}, zeit.content.image.prerender.prerender(
+            self.group))
+
+        with mock.patch.object(
+                zeit.content.image.transform.ImageTransform,
+                'create_variant_image') as render:
+            image = self.group.create_variant_image(self.variants['square'])
+            self.assertFalse(render.called)
+        self.assertEqual('image/jpeg', image.mimeType)
+
+    def test_does_nothing_if_cache_is_disabled(self):
+        self.cache.directory = None
+        self.assertEqual(
+            {}, zeit.content.image.prerender.prerender(self.group))
+        self.cache.directory = self.directory
+
+    def test_checkin_of_group_schedules_prerendering(self):
+        with mock.patch.object(
+                zeit.content.image.prerender.prerender_variants,
+                'delay') as job:
+            with zeit.cms.checkout.helper.checked_out(self.group):
+                pass
+        job.assert_called_with('http://xml.zeit.de/group/')
+
+    def test_checkin_while_publishing_does_not_schedule_prerendering(self):
+        with mock.patch.object(
+                zeit.content.image.prerender.prerender_variants,
+                'delay') as job:
+            manager = zeit.cms.checkout.interfaces.ICheckoutManager(
+                self.group)
+            checked_out = manager.checkout()
+            manager = zeit.cms.checkout.interfaces.ICheckinManager(
+                checked_out)
+            manager.checkin(publishing=True)
+        self.assertFalse(job.called)
@@ -1,10 +1,13 @@
+from io import BytesIO
 from pprint import pformat
+from unittest import mock
 from zeit.content.image.variant import Variant
 import PIL.Image
 import PIL.ImageDraw
 import pkg_resources
 import zeit.content.image.interfaces
 import zeit.content.image.testing
+import zeit.content.image.transform
 
 
 class CreateVariantImageTest(zeit.content.image.testing.FunctionalTestCase):
@@ -232,3 +235,57 @@ class CreateVariantImageTest(zeit.content.image.testing.FunctionalTestCase):
             variant, size=(0, 0), fill_color='ffffff')
         self.assertEqual((8, 8), image.getImageSize())
 
+
+class ReducedDecodingTest(zeit.content.image.testing.FunctionalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        image = zeit.content.image.image.LocalImage()
+        PIL.Image.new('RGB', (1600, 1200), (255, 0, 0)).save(
+            image.open('w'), 'JPEG')
+        self.transform = zeit.content.image.interfaces.ITransform(image)
+
+    def test_downscaled_variant_of_jpeg_is_decoded_at_reduced_size(self):
+        variant = Variant(
+            id='square', focus_x=0.5, focus_y=0.5, zoom=1, aspect_ratio='1:1')
+        image = self.transform.create_variant_image(variant, size=(100, 100))
+        self.assertEqual((100, 100), image.getImageSize())
+        self.assertNotIn('image', self.transform.__dict__)
+        self.assertEqual((200, 150), self.transform._reduced_image(0.1).size)
+
+    def test_large_variant_is_decoded_at_full_size(self):
+        variant = Variant(
+            id='square', focus_x=0.5, focus_y=0.5, zoom=1, aspect_ratio='1:1')
+        image = self.transform.create_variant_image(variant, size=(800, 800))
+        self.assertEqual((800, 800), image.getImageSize())
+        self.assertIn('image', self.transform.__dict__)
+
+    def test_resize_uses_reduced_decoding(self):
+        image = self.transform.resize(width=200)
+        self.assertEqual((200, 150), image.getImageSize())
+        self.assertNotIn('image', self.transform.__dict__)
+
+    def test_opens_and_closes_source_only_once(self):
+        for format in ['JPEG', 'PNG']:
+            data = BytesIO()
+            PIL.Image.new('RGB', (1600, 1200), (255, 0, 0)).save(data, format)
+            files = []
+
+            def open(mode='r'):
+                files.append(BytesIO(data.getvalue()))
+                return files[-1]
+            context = mock.Mock(open=open, format=format)
+            transform = zeit.content.image.transform.ImageTransform(context)
+            image = transform.resize(width=200)
+            self.assertEqual((200, 150), image.getImageSize())
+            self.assertEqual(1, len(files))
+            self.assertTrue(files[0].closed)
+
+    def test_closes_source_even_if_it_is_never_decoded(self):
+        data = BytesIO()
+        PIL.Image.new('RGB', (16, 12), (255, 0, 0)).save(data, 'JPEG')
+        data.seek(0)
+        context = mock.Mock(open=lambda mode='r': data, format='JPEG')
+        transform = zeit.content.image.transform.ImageTransform(context)
+        self.assertEqual((16, 12), transform.size)
+        self.assertTrue(data.closed)
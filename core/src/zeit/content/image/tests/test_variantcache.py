@@ -0,0 +1,137 @@
+from unittest import mock
+from zeit.content.image.testing import create_image_group_with_master_image
+import os
+import shutil
+import tempfile
+import unittest
+import zeit.connector.interfaces
+import zeit.content.image.interfaces
+import zeit.content.image.testing
+import zeit.content.image.transform
+import zeit.content.image.variantcache
+import zope.component
+import zope.event
+
+
+class VariantCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.cache = zeit.content.image.variantcache.VariantCache(
+            self.directory, max_bytes=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def test_stores_and_counts_hits_and_misses(self):
+        self.assertEqual(None, self.cache.get(('id', 'etag1')))
+        self.cache.set(('id', 'etag1'), b'data')
+        self.assertEqual(b'data', self.cache.get(('id', 'etag1')))
+        self.assertEqual(None, self.cache.get(('id', 'etag2')))
+        self.assertEqual(1, self.cache.stats['hits'])
+        self.assertEqual(2, self.cache.stats['misses'])
+
+    def test_evicts_least_recently_used_entries_by_size(self):
+        self.cache.set(('a',), b'1234')
+        self.cache.set(('b',), b'1234')
+        self.cache.get(('a',))
+        self.cache.set(('c',), b'1234')
+        self.assertEqual(None, self.cache.get(('b',)))
+        self.assertEqual(b'1234', self.cache.get(('a',)))
+        self.assertEqual(8, self.cache.size)
+        self.assertEqual(1, self.cache.stats['evictions'])
+
+    def test_does_not_store_entries_larger_than_maximum(self):
+        self.cache.set(('a',), b'12345678901')
+        self.assertEqual(None, self.cache.get(('a',)))
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_invalidate_removes_all_entries_of_image(self):
+        self.cache.set(('id', 'etag', 'square'), b'1')
+        self.cache.set(('id', 'etag', 'cinema'), b'2')
+        self.cache.set(('other', 'etag', 'square'), b'3')
+        self.cache.invalidate('id')
+        self.assertEqual(None, self.cache.get(('id', 'etag', 'square')))
+        self.assertEqual(None, self.cache.get(('id', 'etag', 'cinema')))
+        self.assertEqual(b'3', self.cache.get(('other', 'etag', 'square')))
+        self.assertEqual(2, self.cache.stats['invalidations'])
+
+    def test_shares_entries_with_other_processes(self):
+        other = zeit.content.image.variantcache.VariantCache(
+            self.directory, max_bytes=10)
+        other.set(('a',), b'1234')
+        self.assertIn(('a',), self.cache)
+        self.assertEqual(b'1234', self.cache.get(('a',)))
+        other.invalidate('a')
+        self.assertNotIn(('a',), self.cache)
+
+    def test_size_cap_includes_entries_of_other_processes(self):
+        other = zeit.content.image.variantcache.VariantCache(
+            self.directory, max_bytes=10)
+        other.set(('a',), b'1234')
+        other.set(('b',), b'1234')
+        self.cache.set(('c',), b'1234')
+        self.assertEqual(None, self.cache.get(('a',)))
+        self.assertEqual(8, self.cache.size)
+
+    def test_cleanup_runs_after_storing_a_fraction_of_maximum(self):
+        cache = zeit.content.image.variantcache.VariantCache(
+            self.directory, max_bytes=100)
+        with mock.patch.object(cache, 'cleanup') as cleanup:
+            cache.set(('a',), b'123456789')
+            self.assertFalse(cleanup.called)
+            cache.set(('b',), b'1')
+            self.assertEqual(1, cleanup.call_count)
+            cache.set(('c',), b'1')
+            self.assertEqual(1, cleanup.call_count)
+
+    def test_disabled_without_directory(self):
+        cache = zeit.content.image.variantcache.VariantCache(None)
+        self.assertEqual(None, cache.key(mock.Mock(), mock.Mock()))
+
+
+class VariantCacheIntegrationTest(
+        zeit.content.image.testing.FunctionalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.cache = zeit.content.image.variantcache.VariantCache(
+            self.directory)
+        zope.component.getGlobalSiteManager().registerUtility(
+            self.cache, zeit.content.image.interfaces.IVariantCache)
+        self.group = create_image_group_with_master_image()
+        self.variant = zeit.content.image.interfaces.IVariants(
+            self.group)['square']
+
+    def tearDown(self):
+        zope.component.getGlobalSiteManager().unregisterUtility(
+            self.cache, zeit.content.image.interfaces.IVariantCache)
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def test_variant_is_rendered_only_once(self):
+        transform = zeit.content.image.transform.ImageTransform
+        with mock.patch.object(
+                transform, 'create_variant_image', autospec=True,
+                side_effect=transform.create_variant_image) as render:
+            first = self.group.create_variant_image(
+                self.variant, size=[20, 20])
+            second = self.group.create_variant_image(
+                self.variant, size=[20, 20])
+            self.assertEqual(1, render.call_count)
+            self.group.create_variant_image(self.variant, size=[30, 30])
+            self.assertEqual(2, render.call_count)
+        self.assertEqual(first.open().read(), second.open().read())
+        self.assertEqual(self.group, second.__parent__)
+        self.assertEqual(1, self.cache.stats['hits'])
+
+    def test_resource_invalidation_removes_variants(self):
+        self.group.create_variant_image(self.variant)
+        self.assertEqual(1, self.cache.stats['stores'])
+        zope.event.notify(zeit.connector.interfaces.ResourceInvalidatedEvent(
+            'http://xml.zeit.de/group/master-image.jpg'))
+        self.assertEqual(1, self.cache.stats['invalidations'])
+        self.assertEqual(0, self.cache.size)
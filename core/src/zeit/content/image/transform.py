@@ -1,3 +1,5 @@
+from io import BytesIO
+from math import ceil
 import PIL.Image
 import PIL.ImageColor
 import PIL.ImageEnhance
@@ -5,6 +7,7 @@ import zeit.cms.repository.folder
 import zeit.connector.interfaces
 import zeit.content.image.interfaces
 import zope.app.appsetup.product
+import zope.cachedescriptors.property
 import zope.component
 import zope.interface
 import zope.security.proxy
@@ -18,16 +21,67 @@ class ImageTransform(object):
 
     def __init__(self, context):
         self.context = context
+        self._data = self._read()
+        # Only reads the header. The pixel data is decoded on demand (see
+        # `image` and `_reduced_image()`).
+        image = self._open()
+        self.size = image.size
+        self._format = image.format
+
+    def _read(self):
+        """Returns the contents of our context. The file is closed right
+        away, so it is not left open if we never get to decode it."""
+        file = zope.security.proxy.removeSecurityProxy(self.context.open())
         try:
-            self.image = PIL.Image.open(
-                zope.security.proxy.removeSecurityProxy(context.open()))
-            self.image.load()
+            return file.read()
+        finally:
+            file.close()
+
+    def _open(self):
+        """Returns the (not yet decoded) PIL image of our context."""
+        try:
+            return PIL.Image.open(BytesIO(self._data))
         except IOError:
             raise zeit.content.image.interfaces.ImageProcessingError(
-                "Cannot transform image %s" % context.__name__)
+                "Cannot transform image %s" % self.context.__name__)
+
+    def _load(self, size=None):
+        """Decodes the image, at `size` or larger if given."""
+        # A PIL image can only be decoded once, so each call opens it anew.
+        image = self._open()
+        try:
+            if size is not None:
+                image.draft(image.mode, size)
+            image.load()
+        except IOError:
+            raise zeit.content.image.interfaces.ImageProcessingError(
+                "Cannot transform image %s" % self.context.__name__)
+        return image
+
+    @zope.cachedescriptors.property.Lazy
+    def image(self):
+        """The source image, decoded at full resolution."""
+        return self._load()
+
+    def _reduced_image(self, scale):
+        """Returns the source image decoded at `scale` of its size or larger.
+
+        JPEG can be decoded at 1/2, 1/4 or 1/8 of its size directly, which
+        saves most of the decoding time and memory when we are going to
+        scale down anyway. Other formats are decoded at full resolution.
+        """
+        if (scale > 0.5 or 'image' in self.__dict__ or
+                self._format != 'JPEG'):
+            return self.image
+        width, height = self.size
+        return self._load((
+            max(int(ceil(width * scale)), 1),
+            max(int(ceil(height * scale)), 1)))
 
     def thumbnail(self, width, height, filter=PIL.Image.ANTIALIAS):
-        image = self.image.copy()
+        image = self._reduced_image(
+            min(float(width) / self.size[0], float(height) / self.size[1]))
+        image = image.copy()
         image.thumbnail((width, height), filter)
         return self._construct_image(image)
 
@@ -35,7 +89,7 @@ class ImageTransform(object):
         if width is None and height is None:
             raise TypeError('Need at least one of width and height.')
 
-        orig_width, orig_height = self.image.size
+        orig_width, orig_height = self.size
 
         # width and height need to be int rather than float,
         # so we use // instead of / as division operator.
@@ -44,7 +98,9 @@ class ImageTransform(object):
         elif height is None:
             height = orig_height * width // orig_width
 
-        image = self.image.resize((int(width), int(height)), filter)
+        image = self._reduced_image(max(
+            float(width) / orig_width, float(height) / orig_height))
+        image = image.resize((int(width), int(height)), filter)
         return self._construct_image(image)
 
     def create_variant_image(
@@ -101,7 +157,7 @@ class ImageTransform(object):
         scale down.
 
         """
-        source_width, source_height = self.image.size
+        source_width, source_height = self.size
         if (source_width == 0 or source_height == 0):
             return self.image
         zoomed_width = source_width
@@ -126,17 +182,33 @@ class ImageTransform(object):
 
         x, y = self._determine_crop_position(
             variant, target_width, target_height)
-        image = self._crop(
-            self.image, x, y, x + target_width, y + target_height)
 
+        w = h = 0
         if size:
             w, h = size
+            w = min(w, self.MAXIMUM_IMAGE_SIZE)
+            h = min(h, self.MAXIMUM_IMAGE_SIZE)
+        if w > 0 and h > 0 and target_width > 0 and target_height > 0:
+            # Decode just large enough for the crop box to still cover the
+            # requested size, then crop and scale down the rest of the way.
+            source = self._reduced_image(max(
+                float(w) / target_width, float(h) / target_height))
+        else:
+            source = self.image
+        fx = float(source.size[0]) / source_width
+        fy = float(source.size[1]) / source_height
+        if fx == fy == 1:
+            image = self._crop(
+                source, x, y, x + target_width, y + target_height)
+        else:
+            image = self._crop(
+                source, int(round(x * fx)), int(round(y * fy)),
+                int(round((x + target_width) * fx)),
+                int(round((y + target_height) * fy)))
+
+        if size:
             if (w == 0 or h == 0):
                 return image
-            if w > self.MAXIMUM_IMAGE_SIZE:
-                w = self.MAXIMUM_IMAGE_SIZE
-            if h > self.MAXIMUM_IMAGE_SIZE:
-                h = self.MAXIMUM_IMAGE_SIZE
             image = image.resize((w, h), PIL.Image.ANTIALIAS)
 
         return image
@@ -154,7 +226,7 @@ class ImageTransform(object):
         return width, height
 
     def _determine_crop_position(self, variant, target_width, target_height):
-        width, height = self.image.size
+        width, height = self.size
         x = int(width * variant.focus_x - target_width * variant.focus_x)
         y = int(height * variant.focus_y - target_height * variant.focus_y)
         return x, y
@@ -176,7 +248,7 @@ class ImageTransform(object):
         return pil_image
 
     def _construct_image(self, pil_image, format=None):
-        image = zeit.content.image.image.TemporaryImage()
+        image = create_temporary_image(self.context)
         if not format:
             format = self.context.format
         # Yay consistency
@@ -186,14 +258,20 @@ class ImageTransform(object):
         options = zeit.content.image.interfaces.ENCODER_PARAMETERS.find(format)
 
         pil_image.save(image.open('w'), format, **options)
-        image.__parent__ = self.context
-        image_times = zope.dublincore.interfaces.IDCTimes(self.context, None)
-        if image_times and image_times.modified:
-            thumb_times = zope.dublincore.interfaces.IDCTimes(image)
-            thumb_times.modified = image_times.modified
         return image
 
 
+def create_temporary_image(source):
+    """Returns an empty TemporaryImage that was derived from `source`."""
+    image = zeit.content.image.image.TemporaryImage()
+    image.__parent__ = source
+    image_times = zope.dublincore.interfaces.IDCTimes(source, None)
+    if image_times and image_times.modified:
+        thumb_times = zope.dublincore.interfaces.IDCTimes(image)
+        thumb_times.modified = image_times.modified
+    return image
+
+
 @zope.component.adapter(zeit.content.image.interfaces.IImage)
 @zope.interface.implementer(zeit.content.image.interfaces.IPersistentThumbnail)
 def persistent_thumbnail_factory(context):
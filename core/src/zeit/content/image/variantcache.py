@@ -0,0 +1,206 @@
+"""On-disk cache of rendered variant images.
+
+Rendering a variant requires decoding the complete master image, so we keep
+the encoded results, keyed by everything that influences them: the source
+image (including its etag, so a changed image never hits stale entries), the
+variant settings, size, fill color and format.
+"""
+
+import collections
+import grokcore.component as grok
+import hashlib
+import logging
+import os
+import os.path
+import tempfile
+import threading
+import time
+import zeit.connector.interfaces
+import zeit.content.image.interfaces
+import zope.app.appsetup.product
+import zope.component
+import zope.interface
+
+
+log = logging.getLogger(__name__)
+
+
+@zope.interface.implementer(zeit.content.image.interfaces.IVariantCache)
+class VariantCache:
+    """Stores each entry as a file in `directory` and evicts the least
+    recently used ones once they take up more than `max_bytes`.
+
+    All state lives in the directory, so it can be shared by several
+    processes (e.g. a worker pre-renders, see zeit.content.image.prerender):
+    The entries of an image are kept in a subdirectory per image, so they
+    can be invalidated without knowing the rest of their keys. The
+    modification time of a file is its last access. The total size is
+    computed from the directory by `cleanup()`, which runs whenever this
+    process has stored another `CLEANUP_FRACTION` of `max_bytes`.
+    """
+
+    CLEANUP_FRACTION = 0.1
+
+    def __init__(self, directory, max_bytes=1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = collections.Counter()
+        self._stored = 0  # bytes since the last cleanup
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def key(self, source, variant, size=None, fill=None, format=None):
+        """Returns the cache key, or None if `source` cannot be cached
+        (e.g. a local image in a workingcopy has no etag)."""
+        if not self.enabled:
+            return None
+        properties = zeit.connector.interfaces.IWebDAVReadProperties(
+            source, None)
+        etag = properties.get(('getetag', 'DAV:')) if properties else None
+        if not etag or not getattr(source, 'uniqueId', None):
+            return None
+        return (
+            source.uniqueId, etag,
+            variant.id, variant.name, variant.is_default, variant.ratio,
+            variant.focus_x, variant.focus_y, variant.zoom,
+            variant.brightness, variant.contrast, variant.saturation,
+            variant.sharpness,
+            tuple(size) if size else None, fill, format)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Returns the cached image data (bytes) or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        self._touch(path)
+        return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self._touch(tmp)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)
+        self.stats['stores'] += 1
+        with self._lock:
+            self._stored += len(data)
+            cleanup = self._stored >= self.max_bytes * self.CLEANUP_FRACTION
+            if cleanup:
+                self._stored = 0
+        if cleanup:
+            self.cleanup()
+
+    def invalidate(self, unique_id):
+        """Removes all entries rendered from the image `unique_id`."""
+        if not self.enabled:
+            return
+        directory = os.path.join(self.directory, self._hash(unique_id))
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        # Keep the directory itself, another process might just be storing
+        # an entry in it.
+        removed = self._remove_files(x.path for x in entries)
+        self.stats['invalidations'] += removed
+
+    @property
+    def size(self):
+        return sum(size for _, _, size in self._files())
+
+    def cleanup(self):
+        """Removes the least recently used entries until all of them take
+        up at most `max_bytes`."""
+        files = sorted(self._files())
+        size = sum(x[2] for x in files)
+        evict = []
+        for _, path, file_size in files:
+            if size <= self.max_bytes:
+                break
+            evict.append(path)
+            size -= file_size
+        evicted = self._remove_files(evict)
+        if evicted:
+            log.info('Evicted %s variant cache entries from %s',
+                     evicted, self.directory)
+        self.stats['evictions'] += evicted
+
+    def _path(self, key):
+        # The first part of the key is the unique_id, so invalidate() does
+        # not need to know the other parts.
+        return os.path.join(
+            self.directory, self._hash(key[0]), self._hash(repr(key)))
+
+    @staticmethod
+    def _hash(value):
+        return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _touch(path):
+        # Set explicitly, since file systems may record modification times
+        # more coarsely than we need to tell accesses apart.
+        try:
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        except OSError:
+            pass
+
+    def _files(self):
+        """Yields (last access, path, size) of all entries."""
+        for directory in os.scandir(self.directory):
+            if not directory.is_dir():
+                continue
+            try:
+                entries = list(os.scandir(directory.path))
+            except OSError:
+                continue  # removed meanwhile
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # removed meanwhile
+                yield stat.st_mtime_ns, entry.path, stat.st_size
+
+    @staticmethod
+    def _remove_files(paths):
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+        return removed
+
+
+@zope.interface.implementer(zeit.content.image.interfaces.IVariantCache)
+def from_product_config():
+    config = zope.app.appsetup.product.getProductConfiguration(
+        'zeit.content.image') or {}
+    return VariantCache(
+        config.get('variant-cache-directory'),
+        int(config.get('variant-cache-max-bytes', 1024 ** 3)))
+
+
+@grok.subscribe(zeit.connector.interfaces.IResourceInvalidatedEvent)
+def invalidate_variants(event):
+    cache = zope.component.queryUtility(
+        zeit.content.image.interfaces.IVariantCache)
+    if cache is not None:
+        cache.invalidate(event.id)
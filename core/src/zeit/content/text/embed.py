@@ -27,13 +27,16 @@ class Embed(zeit.content.text.text.Text,
     @property
     def parameter_fields(self):
         try:
-            code = self.parameter_definition or '__return({})'
-            if '__return' not in code:
-                code = '__return(%s)' % code
+            source = self.parameter_definition or '__return({})'
+            if '__return' not in source:
+                source = '__return(%s)' % source
             # XXX Cases like `zope.schema.Choice(source=zeit.content.image
             # .interfaces.imageSource)` currently work only accidentally, since
             # everything we need apparently is imported elsewhere already.
-            code = compile(code, filename=self.uniqueId, mode='exec')
+            code = self._compiled(
+                source,
+                lambda: compile(source, filename=self.uniqueId, mode='exec'),
+                'parameter_definition')
             try:
                 fields = eval(code, self._globals(globals()))
             except zeit.content.text.python.Break:
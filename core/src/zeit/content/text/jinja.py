@@ -19,19 +19,16 @@ class JinjaTemplate(zeit.content.text.text.Text):
         zeit.cms.interfaces.DOCUMENT_SCHEMA_NS, 'title')
 
     def __call__(self, variables, **kw):
-        patch = None
         if kw.pop('output_format', None) == 'json':
-            # Kludgy way to make jinja autoescape work for JSON instead of HTML
-            # XXX This is not threadsafe! We should probably look into a more
-            # stable solution, like https://github.com/pallets/jinja/issues/503
             kw['autoescape'] = True
-            patch = mock.patch('jinja2.runtime.escape', new=json_escape)
-            patch.start()
-        template = Template(self.text, **kw)
-        result = template.render(variables)
-        if patch:
-            patch.stop()
-        return result
+            factory = JSONTemplate
+        else:
+            factory = Template
+        template = self._compiled(
+            self.text,
+            lambda: factory(self.text, **kw),
+            factory.__name__, tuple(sorted(kw.items())))
+        return template.render(variables)
 
 
 class JinjaTemplateType(zeit.content.text.text.TextType):
@@ -56,6 +53,22 @@ class Template(jinja2.Template):
             self.environment.handle_exception()
 
 
+class JSONTemplate(Template):
+    """Autoescapes variables for JSON instead of HTML.
+
+    The generated template code calls `escape` from its module namespace,
+    which is private to each template, so we can replace it there (instead
+    of patching jinja2.runtime globally while compiling, which is not
+    threadsafe). See https://github.com/pallets/jinja/issues/503
+    """
+
+    @classmethod
+    def _from_namespace(cls, environment, namespace, globals):
+        namespace['escape'] = json_escape
+        return super(JSONTemplate, cls)._from_namespace(
+            environment, namespace, globals)
+
+
 class MockDict(collections.defaultdict):
 
     def __init__(self):
@@ -32,7 +32,10 @@ class PythonScript(zeit.content.text.text.Text, EvalExecHelper):
 
     def __call__(self, **kw):
         self._v_result = None
-        code = compile(self.text, filename=self.uniqueId, mode='exec')
+        code = self._compiled(
+            self.text,
+            lambda: compile(self.text, filename=self.uniqueId, mode='exec'),
+            'exec')
         globs = self._globals(globals())
         globs['context'] = kw
         try:
@@ -1,8 +1,11 @@
+from unittest import mock
+import jinja2
 import json
 import sys
 import traceback
 import zeit.content.text.jinja
 import zeit.content.text.testing
+import zeit.content.text.text
 
 
 class PythonScriptTest(zeit.content.text.testing.FunctionalTestCase):
@@ -42,3 +45,27 @@ class PythonScriptTest(zeit.content.text.testing.FunctionalTestCase):
         result = tpl({'foo': 'with "quotes"'}, output_format='json')
         result = json.loads(result)
         self.assertEqual({'title': 'with "quotes"', 'undefined': ''}, result)
+
+    def test_json_escaping_does_not_affect_other_templates(self):
+        tpl = self.create('{{foo}}')
+        self.assertEqual(
+            r'with \"quotes\"',
+            tpl({'foo': 'with "quotes"'}, output_format='json'))
+        self.assertEqual(
+            'with &#34;quotes&#34;',
+            tpl({'foo': 'with "quotes"'}, autoescape=True))
+
+    def test_compiles_template_only_once(self):
+        zeit.content.text.text.COMPILE_CACHE.clear()
+        tpl = self.create('{{foo}}')
+        with mock.patch.object(
+                jinja2.Environment, 'compile', autospec=True,
+                side_effect=jinja2.Environment.compile) as compile:
+            self.assertEqual('bar', tpl({'foo': 'bar'}))
+            self.assertEqual('qux', tpl({'foo': 'qux'}))
+            self.assertEqual(1, compile.call_count)
+            tpl({'foo': 'bar'}, output_format='json')
+            self.assertEqual(2, compile.call_count)
+            tpl.text = '{{foo}}!'
+            self.assertEqual('bar!', tpl({'foo': 'bar'}))
+            self.assertEqual(3, compile.call_count)
@@ -1,4 +1,6 @@
+from unittest import mock
 import zeit.content.text.testing
+import zeit.content.text.text
 
 
 class PythonScriptTest(zeit.content.text.testing.FunctionalTestCase):
@@ -32,3 +34,13 @@ __return(2)""")
         py = self.create('raise RuntimeError()')
         with self.assertRaises(RuntimeError):
             py()
+
+    def test_compiles_script_only_once(self):
+        zeit.content.text.text.COMPILE_CACHE.clear()
+        py = self.create('__return(context["foo"])')
+        with mock.patch(
+                'zeit.content.text.python.compile', create=True,
+                side_effect=compile) as compiled:
+            self.assertEqual(1, py(foo=1))
+            self.assertEqual(2, py(foo=2))
+        self.assertEqual(1, compiled.call_count)
@@ -1,7 +1,10 @@
 from io import BytesIO
 from zeit.cms.i18n import MessageFactory as _
+import collections
+import hashlib
 import persistent
 import six
+import threading
 import zeit.cms.content.dav
 import zeit.cms.interfaces
 import zeit.cms.repository.repository
@@ -24,6 +27,52 @@ class Text(zeit.cms.repository.repository.ContentBase,
         ('mimeType', 'encoding'),
         use_default=True)
 
+    def _compiled(self, text, factory, *options):
+        """Returns `factory()`, which compiles `text` (usually our own),
+        cached by uniqueId, text and `options` (which must include everything
+        else the result depends on)."""
+        key = (self.uniqueId, hashlib.sha1(
+            six.ensure_binary(text or '')).hexdigest()) + options
+        return COMPILE_CACHE.get(key, factory)
+
+
+class CompileCache(object):
+    """Process-wide cache of compiled templates and scripts, so they are not
+    compiled again on every call.
+
+    At most `size` entries are kept, the least recently used ones are
+    dropped. Compile errors are not cached.
+    """
+
+    def __init__(self, size=500):
+        self.size = size
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+                return self._data[key]
+            except KeyError:
+                pass
+        # Compile outside of the lock, so other threads are not blocked.
+        # Concurrent misses for the same key might compile twice, which is
+        # harmless.
+        result = factory()
+        with self._lock:
+            self._data[key] = result
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+COMPILE_CACHE = CompileCache()
+
 
 class TextType(zeit.cms.type.TypeDeclaration):
 
@@ -8,6 +8,7 @@ import lxml
 import requests
 import zeit.cms.content.interfaces
 import zeit.cms.interfaces
+import zeit.cms.repository.interfaces
 import zeit.content.article.edit.interfaces
 import zeit.content.cp.blocks.rss
 import zeit.content.cp.blocks.teaser
@@ -40,6 +41,29 @@ class ContentQuery(grok.Adapter):
     def rows(self):
         return self.context.count
 
+    def _unique_id(self, doc):
+        return zeit.cms.interfaces.ID_NAMESPACE[:-1] + doc['url']
+
+    def _prefetch(self, docs):
+        """Loads the content of the given search results in bulk, so that
+        resolving them one by one afterwards needs no further requests."""
+        repository = zope.component.queryUtility(
+            zeit.cms.repository.interfaces.IRepository)
+        if repository is not None:
+            repository.prefetch(
+                [self._unique_id(x) for x in docs if x.get('url')])
+        return docs
+
+    @cachedproperty
+    def _existing_ids(self):
+        return frozenset(
+            x.uniqueId for x in self.context.existing_teasers
+            if getattr(x, 'uniqueId', None))
+
+    def _is_dupe(self, content):
+        """Is `content` one of the teasers that hide_dupes excludes?"""
+        return getattr(content, 'uniqueId', None) in self._existing_ids
+
 
 @grok.adapter(zeit.contentquery.interfaces.IContentQuery)
 @grok.implementer(zeit.cms.interfaces.ICMSContent)
@@ -53,9 +77,15 @@ class ElasticsearchContentQuery(ContentQuery):
     grok.name('elasticsearch-query')
 
     include_payload = False  # Extension point for zeit.web and its LazyProxy.
+    # Build zeit.retresco.content.Content objects from the payload of the
+    # search results, instead of resolving the content from the repository.
+    # These are read-only, but suffice for listing them.
+    payload_content = False
 
     def __init__(self, context):
         super().__init__(context)
+        if self.payload_content:
+            self.include_payload = True
         self.query = json.loads(self.context.elasticsearch_raw_query or '{}')
         self.order_default = self.context.elasticsearch_raw_order
 
@@ -97,6 +127,11 @@ class ElasticsearchContentQuery(ContentQuery):
                 self.query, self.context.uniqueId, exc_info=True)
             return result
 
+        response = self.prefetched.get(self.prefetch_key(query))
+        if response is not None:
+            self.total_hits = response.hits
+            return self._resolve_all(response)
+
         es = zope.component.getUtility(zeit.retresco.interfaces.IElasticsearch)
         try:
             response = es.search(
@@ -115,12 +150,32 @@ class ElasticsearchContentQuery(ContentQuery):
                 response = zeit.cms.interfaces.Result()
 
         self.total_hits = response.hits
+        return self._resolve_all(response)
+
+    def _resolve_all(self, response):
+        if not self.include_payload:
+            self._prefetch(response)
+        result = []
         for item in response:
             content = self._resolve(item)
             if content is not None:
                 result.append(content)
         return result
 
+    @property
+    def prefetched(self):
+        """Responses of queries that were performed in advance, together
+        with those of the other areas, see zeit.content.cp.automatic.prefetch
+        """
+        content = zeit.cms.interfaces.ICMSContent(self, None)
+        if not zeit.content.cp.interfaces.ICenterPage.providedBy(content):
+            return {}
+        return content_cache(content, 'elasticsearch_queries')
+
+    def prefetch_key(self, query):
+        return (json.dumps(query, sort_keys=True),
+                self.start, self.rows, self.include_payload)
+
     def _build_query(self):
         if self.context.is_complete_query:
             query = self.query
@@ -151,8 +206,9 @@ class ElasticsearchContentQuery(ContentQuery):
     ]
 
     def _resolve(self, doc):
-        return zeit.cms.interfaces.ICMSContent(
-            zeit.cms.interfaces.ID_NAMESPACE[:-1] + doc['url'], None)
+        if self.payload_content:
+            return zeit.retresco.interfaces.ITMSContent(doc)
+        return zeit.cms.interfaces.ICMSContent(self._unique_id(doc), None)
 
     @cachedproperty
     def hide_dupes_clause(self):
@@ -313,7 +369,7 @@ class TMSContentQuery(ContentQuery):
             content = self._resolve(item)
             if content is None:
                 continue
-            if self.hide_dupes and content in self.context.existing_teasers:
+            if self.hide_dupes and self._is_dupe(content):
                 dupes += 1
             else:
                 result.append(content)
@@ -334,11 +390,10 @@ class TMSContentQuery(ContentQuery):
                 return self._get_documents(start=0, rows=0)
             return iter([]), 0
         else:
-            return iter(response), response.hits
+            return iter(self._prefetch(response)), response.hits
 
     def _resolve(self, doc):
-        return zeit.cms.interfaces.ICMSContent(
-            zeit.cms.interfaces.ID_NAMESPACE[:-1] + doc['url'], None)
+        return zeit.cms.interfaces.ICMSContent(self._unique_id(doc), None)
 
     @property
     def hide_dupes(self):
@@ -403,8 +458,7 @@ class CenterpageContentQuery(ContentQuery):
         for content in teasered:
             if zeit.content.cp.blocks.rss.IRSSLink.providedBy(content):
                 continue
-            if (self.context.hide_dupes
-                    and content in self.context.existing_teasers):
+            if self.context.hide_dupes and self._is_dupe(content):
                 continue
             result.append(content)
             if len(result) >= self.rows:
@@ -493,7 +547,7 @@ class TMSRelatedApiQuery(TMSContentQuery):
                     self.context.uniqueId, exc_info=True)
             return iter([]), 0
         else:
-            return iter(response), response.hits
+            return iter(self._prefetch(response)), response.hits
 
 
 class ArticleTMSRelatedApiQuery(TMSRelatedApiQuery):
@@ -21,6 +21,9 @@ class Base(zeit.edit.block.Element,
            zope.container.contained.Contained,
            collections.abc.MutableMapping):
 
+    # (xml, {key: node}), see _get_node()
+    _v_node_index = None
+
     def __init__(self, context, xml):
         self.xml = xml
         # Set parent last so we don't trigger a write.
@@ -44,6 +47,21 @@ class Base(zeit.edit.block.Element,
     def _get_element_type(self, xml_node):
         raise NotImplementedError
 
+    def _get_nodes(self, xml_node):
+        """Returns (key, node) for each child, in order. The key is None
+        for children that have none (yet), since this must not change the
+        XML (unlike _get_keys, which may create missing keys).
+
+        This default implementation searches for each key separately,
+        subclasses should override it to collect all nodes in one pass.
+        """
+        result = []
+        for key in self._get_keys(xml_node):
+            node = self._find_item(xml_node, name=key)
+            if node:
+                result.append((key, node[0]))
+        return result
+
     # Default implementation
 
     def __getitem__(self, key):
@@ -57,9 +75,8 @@ class Base(zeit.edit.block.Element,
             except IndexError:
                 raise KeyError(key)
 
-        node = self._find_item(self.xml, name=key)
-        if node:
-            node = node[0]
+        node = self._get_node(key)
+        if node is not None:
             element = self._get_element_for_node(node)
             if element is None:
                 log.warning(
@@ -70,6 +87,47 @@ class Base(zeit.edit.block.Element,
             return zope.container.contained.contained(element, self, key)
         raise KeyError(key)
 
+    def _get_node(self, key):
+        """Looks up the XML node of `key` in an index that is built once per
+        container instance, instead of searching the XML on every access.
+
+        The XML might be changed without us noticing, e.g. through another
+        instance of this container, so a node we found must still belong to
+        us, and if we found none we fall back to searching.
+        """
+        node = self._node_index().get(key)
+        if node is not None and self._is_descendant(node):
+            return node
+        node = self._find_item(self.xml, name=key)
+        if node:
+            self._invalidate_node_index()
+            return node[0]
+        return None
+
+    def _node_index(self):
+        xml = zope.proxy.removeAllProxies(self.xml)
+        index = self._v_node_index
+        if index is None or index[0] is not xml:
+            nodes = {}
+            for key, node in self._get_nodes(xml):
+                if key is not None:
+                    # Like _find_item, prefer the first one of duplicates.
+                    nodes.setdefault(six.text_type(key), node)
+            index = self._v_node_index = (xml, nodes)
+        return index[1]
+
+    def _invalidate_node_index(self):
+        self._v_node_index = None
+
+    def _is_descendant(self, node):
+        xml = zope.proxy.removeAllProxies(self.xml)
+        parent = node.getparent()
+        while parent is not None:
+            if parent is xml:
+                return True
+            parent = parent.getparent()
+        return False
+
     def _get_element_for_node(self, node, element_type=None):
         if element_type is None:
             element_type = self._get_element_type(node)
@@ -91,6 +149,8 @@ class Base(zeit.edit.block.Element,
         return list(iter(self))
 
     def values(self):
+        # Start with a fresh index, it is then used for all lookups.
+        self._invalidate_node_index()
         return [self[x] for x in self]
 
     def slice(self, start, end):
@@ -130,6 +190,7 @@ class Base(zeit.edit.block.Element,
 
         keys.insert(position, item.__name__)
         self.updateOrder(keys, send_event=False)
+        self._invalidate_node_index()
         self._p_changed = True
 
         event = self._contained_event(item, is_new)
@@ -142,6 +203,7 @@ class Base(zeit.edit.block.Element,
     def add(self, item):
         is_new = item.__name__ is None
         self._add(item)
+        self._invalidate_node_index()
         self._p_changed = True
 
         event = self._contained_event(item, is_new)
@@ -205,6 +267,7 @@ class Base(zeit.edit.block.Element,
         for key in order:
             self._add(objs[key])
 
+        self._invalidate_node_index()
         self._p_changed = True
         if send_event:
             zope.event.notify(
@@ -232,6 +295,7 @@ class Base(zeit.edit.block.Element,
 
     def __delitem__(self, key):
         item = self._delete(key)
+        self._invalidate_node_index()
         self._p_changed = True
 
         # We cannot reuse zope.container.contained.uncontained, since it would
@@ -265,6 +329,11 @@ class TypeOnAttributeContainer(Base):
         return xml_node.get(
             '{http://namespaces.zeit.de/CMS/cp}type', '__invalid__')
 
+    def _get_nodes(self, xml_node):
+        return [
+            (x.get('{http://namespaces.zeit.de/CMS/cp}__name__'), x)
+            for x in xml_node.iterchildren('*')]
+
 
 @grok.implementer(zope.location.interfaces.ISublocations)
 class Sublocations(grok.Adapter):
@@ -118,3 +118,35 @@ class ContainerTest(zeit.edit.testing.FunctionalTestCase):
         self.assertEqual(block, self.container[0])
         with self.assertRaises(KeyError):
             self.container[1]
+
+    def test_lookup_does_not_search_xml_for_each_item(self):
+        blocks = [self.container.create_item('block') for i in range(3)]
+        container = zeit.edit.tests.fixture.Container(
+            self.context, self.container.xml)
+        with mock.patch.object(
+                zeit.edit.tests.fixture.Container, '_find_item') as find:
+            self.assertEqual(blocks, container.values())
+            self.assertEqual(blocks[2], container[blocks[2].__name__])
+            self.assertEqual(blocks[1], container[1])
+            self.assertEqual(blocks[1:], container.slice(
+                blocks[1].__name__, blocks[2].__name__))
+        self.assertFalse(find.called)
+
+    def test_lookup_notices_changes_through_other_instance(self):
+        first = self.container.create_item('block')
+        other = zeit.edit.tests.fixture.Container(
+            self.context, self.container.xml)
+        self.assertEqual(first, other[first.__name__])
+        del self.container[first.__name__]
+        second = self.container.create_item('block')
+        with self.assertRaises(KeyError):
+            other[first.__name__]
+        self.assertEqual(second, other[second.__name__])
+        self.assertEqual([second], other.values())
+
+    def test_updateOrder_changes_position_lookup(self):
+        blocks = [self.container.create_item('block') for i in range(3)]
+        self.assertEqual(blocks[0], self.container[0])
+        self.container.updateOrder([x.__name__ for x in reversed(blocks)])
+        self.assertEqual(blocks[2], self.container[0])
+        self.assertEqual(list(reversed(blocks)), self.container.values())
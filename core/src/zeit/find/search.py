@@ -21,6 +21,18 @@ class Elasticsearch(zeit.retresco.search.Elasticsearch):
         kw.setdefault('rows', 50)
         return super(Elasticsearch, self).search(query, **kw)
 
+    def msearch(self, searches, **kw):
+        searches = [(dict(query), start, rows)
+                    for query, start, rows in searches]
+        for query, _, _ in searches:
+            query.setdefault('_source', DEFAULT_FIELDS)
+        return super(Elasticsearch, self).msearch(searches, **kw)
+
+    def iter_search(self, query, **kw):
+        query = query.copy()
+        query.setdefault('_source', DEFAULT_FIELDS)
+        return super(Elasticsearch, self).iter_search(query, **kw)
+
 
 @implementer(ICMSSearch)
 def from_product_config():
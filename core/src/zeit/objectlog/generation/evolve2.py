@@ -0,0 +1,54 @@
+import BTrees
+import itertools
+import transaction
+import zeit.objectlog.objectlog
+import zope.component
+import zope.component.hooks
+import zope.generations.utility
+
+
+# Number of objects after which the index built so far is committed.
+CHUNK_SIZE = 1000
+
+
+def update(root):
+    # Build the time index, so clean() does not need to look at every object
+    site_manager = zope.component.getSiteManager()
+    log = site_manager['objectlog']
+    # Entries that are logged meanwhile are added to the index by log() now.
+    index = log._time_index = BTrees.family64.IO.BTree()
+    last = None
+    while True:
+        # Continue after the last key instead of keeping an iterator across
+        # commits, so objects that are added or removed meanwhile are fine.
+        if last is None:
+            remaining = log._object_log.keys()
+        else:
+            remaining = log._object_log.keys(min=last, excludemin=True)
+        chunk = list(itertools.islice(remaining, CHUNK_SIZE))
+        if not chunk:
+            break
+        for key in chunk:
+            object_log = log._object_log.get(key)
+            if object_log is None:
+                continue
+            buckets = set(time_key // zeit.objectlog.objectlog.BUCKET_SIZE
+                          for time_key in object_log)
+            for bucket in buckets:
+                keys = index.get(bucket)
+                if keys is None:
+                    keys = index[bucket] = BTrees.family64.OO.TreeSet()
+                keys.insert(key)
+        last = chunk[-1]
+        transaction.commit()
+        log._p_jar.cacheGC()
+
+
+def evolve(context):
+    site = zope.component.hooks.getSite()
+    try:
+        root = zope.generations.utility.getRootFolder(context)
+        zope.component.hooks.setSite(root)
+        update(root)
+    finally:
+        zope.component.hooks.setSite(site)
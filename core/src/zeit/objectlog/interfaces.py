@@ -12,12 +12,19 @@ class IObjectLog(zope.interface.Interface):
     def log(object, message, mapping=None, timestamp=None):
         """Log message for object."""
 
-    def get_log(object):
+    def get_log(object, start=None, limit=None):
         """Return log entries for `object`.
 
-        Oldest first.
+        Oldest first. `start` is the index of the first entry to return
+        (negative values count from the newest entry), `limit` the maximum
+        number of entries.
         """
 
+    def batch():
+        """Context manager that collects the log entries written inside it
+        and assigns their oids with a single savepoint at the end (or when
+        the log is read), instead of one savepoint per entry."""
+
 
 class ILogEntry(zope.interface.Interface):
     """One entry in the log."""
@@ -51,10 +58,10 @@ class ILog(zope.interface.Interface):
     def log(message, mapping=None, timestamp=None):
         """Log message for context."""
 
-    def get_log():
+    def get_log(start=None, limit=None):
         """Return log entries for context.
 
-        Oldest first.
+        Oldest first, see IObjectLog.get_log() for `start` and `limit`.
         """
 
     logs = zope.schema.Tuple(
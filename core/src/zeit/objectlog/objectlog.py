@@ -1,8 +1,10 @@
 import BTrees
+import contextlib
 import datetime
 import logging
 import persistent
 import pytz
+import threading
 import time
 import transaction
 import zeit.objectlog.interfaces
@@ -15,21 +17,49 @@ import zope.security.management
 logger = logging.getLogger(__name__)
 
 
+# Time keys are seconds * 10e6, the time index groups them by day.
+BUCKET_SIZE = int(10e6) * 3600 * 24
+
+
+class Batch(threading.local):
+
+    depth = 0
+    pending = False
+
+
 @zope.interface.implementer(zeit.objectlog.interfaces.IObjectLog)
 class ObjectLog(persistent.Persistent):
     """Object log."""
 
+    # Map a day bucket to the keys of the objects that have log entries on
+    # that day, so clean() only needs to look at expired buckets. Instances
+    # created before the index existed get it from generation 2.
+    _time_index = None
+
+    _batch = Batch()
+
     def __init__(self):
         # Map object to an object time line
         self._object_log = BTrees.family64.OO.BTree()
+        self._time_index = BTrees.family64.IO.BTree()
 
-    def get_log(self, object):
+    def get_log(self, object, start=None, limit=None):
         key = zope.app.keyreference.interfaces.IKeyReference(object, None)
         if key is None:
             return
-        object_log = self._object_log.get(key, [])
-        for key in object_log:
-            yield object_log[key]
+        object_log = self._object_log.get(key)
+        if object_log is None:
+            return
+        if self._batch.pending:
+            self._savepoint()
+        entries = object_log.values()
+        if start is not None or limit is not None:
+            start = start or 0
+            stop = None
+            if limit is not None and not (start < 0 <= start + limit):
+                stop = start + limit
+            entries = entries[start:stop]
+        yield from entries
 
     def log(self, object, message, mapping=None, timestamp=None):
         logger.debug("Logging: %s %s %s" % (object, message, mapping))
@@ -46,6 +76,30 @@ class ObjectLog(persistent.Persistent):
         while not object_log.insert(time_key, log_entry):
             time_key += 1
 
+        if self._time_index is not None:
+            bucket = time_key // BUCKET_SIZE
+            keys = self._time_index.get(bucket)
+            if keys is None:
+                keys = self._time_index[bucket] = BTrees.family64.OO.TreeSet()
+            keys.insert(obj_key)
+
+        if self._batch.depth:
+            self._batch.pending = True
+        else:
+            self._savepoint()
+
+    @contextlib.contextmanager
+    def batch(self):
+        self._batch.depth += 1
+        try:
+            yield
+        finally:
+            self._batch.depth -= 1
+        if not self._batch.depth and self._batch.pending:
+            self._savepoint()
+
+    def _savepoint(self):
+        self._batch.pending = False
         # Create savepoint to assign oid to log-entries. Required for
         # displaying in the same transaction.
         __traceback_info__ = (
@@ -64,15 +118,25 @@ class ObjectLog(persistent.Persistent):
     def clean(self, timedelta):
         reference_time = int(10e6 * (
             time.time() - timedelta.days * 3600 * 24 - timedelta.seconds))
-        remove = []
-        for key in self._object_log:
-            log = self._object_log[key]
+        if self._time_index is None:
+            keys = list(self._object_log)
+        else:
+            keys = set()
+            reference_bucket = reference_time // BUCKET_SIZE
+            for bucket in list(self._time_index.keys(max=reference_bucket)):
+                keys.update(self._time_index[bucket])
+                if bucket < reference_bucket:
+                    # The bucket is expired completely, while the current
+                    # one may still contain later entries of its objects.
+                    del self._time_index[bucket]
+        for key in keys:
+            log = self._object_log.get(key)
+            if log is None:
+                continue  # deleted in the meantime
             for time_key in list(log.keys(max=reference_time)):
                 del log[time_key]
             if not log:
-                remove.append(key)
-        for key in remove:
-            del self._object_log[key]
+                del self._object_log[key]
 
 
 @zope.interface.implementer(zeit.objectlog.interfaces.ILogEntry)
@@ -106,9 +170,9 @@ class Log(object):
         log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
         log.log(self.context, message, mapping, timestamp)
 
-    def get_log(self):
+    def get_log(self, start=None, limit=None):
         log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
-        return log.get_log(self.context)
+        return log.get_log(self.context, start, limit)
 
     @property
     def logs(self):
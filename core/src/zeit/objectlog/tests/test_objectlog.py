@@ -1,5 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from unittest import mock
+import pytz
 import transaction
+import zeit.objectlog.generation.evolve2
 import zeit.objectlog.interfaces
 import zeit.objectlog.testing
 import zope.component
@@ -29,3 +32,80 @@ class ObjectLog(zeit.objectlog.testing.FunctionalTestCase):
         log.delete(content2)
         self.assertEqual(0, len(list(log.get_log(content2))))
         self.assertEqual(1, len(list(log.get_log(self.content))))
+
+    def test_get_log_returns_slice_of_entries(self):
+        log = zeit.objectlog.interfaces.ILog(self.content)
+        for i in range(5):
+            log.log(str(i))
+        self.assertEqual(
+            ['1', '2'],
+            [x.message for x in log.get_log(start=1, limit=2)])
+        self.assertEqual(
+            ['3', '4'], [x.message for x in log.get_log(start=-2)])
+        self.assertEqual(
+            ['4'], [x.message for x in log.get_log(start=-1, limit=5)])
+        self.assertEqual(
+            ['0', '1', '2'], [x.message for x in log.get_log(limit=3)])
+
+    def test_batch_creates_single_savepoint(self):
+        log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
+        with mock.patch('transaction.savepoint') as savepoint:
+            with log.batch():
+                log.log(self.content, 'one')
+                log.log(self.content, 'two')
+                self.assertFalse(savepoint.called)
+            self.assertEqual(1, savepoint.call_count)
+
+    def test_get_log_inside_batch_assigns_oids(self):
+        log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
+        with log.batch():
+            log.log(self.content, 'one')
+            entries = list(log.get_log(self.content))
+            self.assertNotEqual(None, entries[0]._p_oid)
+
+    def test_clean_only_visits_expired_buckets(self):
+        content2 = zeit.objectlog.testing.Content()
+        self.getRootFolder()['content2'] = content2
+        transaction.commit()
+        log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
+        old = datetime.now(pytz.UTC) - timedelta(days=10)
+        log.log(self.content, 'old', timestamp=old)
+        log.log(self.content, 'new')
+        log.log(content2, 'new')
+        bucket = list(log._time_index.keys())[0]
+        log.clean(timedelta(days=5))
+        self.assertNotIn(bucket, log._time_index)
+        self.assertEqual(
+            ['new'], [x.message for x in log.get_log(self.content)])
+        self.assertEqual(
+            ['new'], [x.message for x in log.get_log(content2)])
+
+    def test_clean_without_time_index_scans_all_objects(self):
+        log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
+        log._time_index = None
+        log.log(self.content, 'old', timestamp=datetime(2012, 6, 12))
+        log.log(self.content, 'new')
+        log.clean(timedelta(days=5))
+        self.assertEqual(
+            ['new'], [x.message for x in log.get_log(self.content)])
+
+    def test_generation_builds_time_index_in_chunks(self):
+        content2 = zeit.objectlog.testing.Content()
+        self.getRootFolder()['content2'] = content2
+        transaction.commit()
+        log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
+        log._time_index = None
+        log.log(self.content, 'old', timestamp=datetime(2012, 6, 12))
+        log.log(content2, 'new')
+        transaction.commit()
+        with mock.patch.object(
+                zeit.objectlog.generation.evolve2, 'CHUNK_SIZE', 1), \
+                mock.patch('transaction.commit',
+                           side_effect=transaction.commit) as commit:
+            zeit.objectlog.generation.evolve2.update(self.getRootFolder())
+        self.assertEqual(2, commit.call_count)
+        self.assertEqual(2, len(log._time_index))
+        log.clean(timedelta(days=5))
+        self.assertEqual([], list(log.get_log(self.content)))
+        self.assertEqual(
+            ['new'], [x.message for x in log.get_log(content2)])
@@ -1,14 +1,17 @@
 from io import StringIO
 from zeit.cms.checkout.helper import checked_out
 import collections
+import concurrent.futures
 import gocept.runner
 import logging
 import lxml.builder
 import requests
+import requests.adapters
 import requests.exceptions
 import requests.sessions
-import signal
+import time
 import transaction
+import urllib3.util.retry
 import zeit.cms.cli
 import zeit.cms.content.interfaces
 import zeit.cms.interfaces
@@ -27,7 +30,8 @@ log = logging.getLogger(__name__)
 @zope.interface.implementer(zeit.retresco.interfaces.ITMS)
 class TMS:
 
-    def __init__(self, primary, secondary=None):
+    def __init__(self, primary, secondary=None, pool_size=10, retries=0,
+                 retry_backoff=0, async_secondary=False):
         self.primary = dict(primary)
         self.secondary = dict(secondary or {})
         for conn in self.primary, self.secondary:
@@ -38,6 +42,17 @@ class TMS:
         # Keep internal API stable for zeit.web
         self.url = self.primary['url']
 
+        self.pool_size = pool_size
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._sessions = {}
+        # A single thread, so writes reach the secondary in the same order
+        # as the primary.
+        self.secondary_executor = (
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='tms-secondary')
+            if async_secondary else None)
+
     def extract_keywords(self, content):
         __traceback_info__ = (content.uniqueId,)
 
@@ -174,6 +189,9 @@ class TMS:
 
     def get_article_data(self, content):
         uuid = zeit.cms.content.interfaces.IUUID(content).id
+        return self.get_article_data_id(uuid)
+
+    def get_article_data_id(self, uuid):
         try:
             return self._request('GET /content/%s' % uuid)
         except Exception:
@@ -276,11 +294,17 @@ class TMS:
             for key, value in overrides.items():
                 data[key] = value
 
+        return self.index_data(data)
+
+    def index_data(self, data):
         return self._request('PUT /content/%s' % data['doc_id'], json=data)
 
     def publish(self, content):
         __traceback_info__ = (content.uniqueId,)
         uuid = zeit.cms.content.interfaces.IUUID(content).id
+        return self.publish_id(uuid)
+
+    def publish_id(self, uuid):
         return self._request('POST /content/%s/publish' % uuid)
 
     def unpublish_id(self, uuid):
@@ -294,6 +318,9 @@ class TMS:
                 'Skip enrich for %s, it is missing required fields',
                 content.uniqueId)
             return {}
+        return self.enrich_data(data, intextlinks)
+
+    def enrich_data(self, data, intextlinks=True):
         params = {}
         if intextlinks:
             params['in-text-linked'] = ''
@@ -315,20 +342,47 @@ class TMS:
         result = self._request_one(tms=self.primary, request=request, **kw)
         verb, _, _ = request.partition(' ')
         if verb in {'POST', 'PUT', 'DELETE'} and self.secondary.get('url'):
-            self._request_one(tms=self.secondary, request=request, **kw)
+            if self.secondary_executor is not None:
+                self.secondary_executor.submit(
+                    self._request_secondary, request, **kw)
+            else:
+                self._request_one(tms=self.secondary, request=request, **kw)
         return result
 
+    def _request_secondary(self, request, **kw):
+        try:
+            self._request_one(tms=self.secondary, request=request, **kw)
+        except Exception:
+            log.warning('Secondary TMS request %s failed', request,
+                        exc_info=True)
+
+    def _session(self, tms):
+        """Returns the session for the given TMS, so connections are kept
+        alive and reused between requests."""
+        session = self._sessions.get(tms['url'])
+        if session is None:
+            session = TimeoutSession()
+            retry = urllib3.util.retry.Retry(
+                total=self.retries, backoff_factor=self.retry_backoff,
+                status_forcelist=(502, 503, 504), raise_on_status=False)
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=self.pool_size,
+                max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if tms.get('username'):
+                session.auth = (tms['username'], tms['password'])
+            session = self._sessions.setdefault(tms['url'], session)
+        return session
+
     def _request_one(self, tms, request, **kw):
         verb, path = request.split(' ', 1)
-        method = getattr(requests, verb.lower())
-        if tms.get('username'):
-            kw['auth'] = (tms['username'], tms['password'])
         try:
             url = tms['url'] + path
             if 'in-text-linked' in kw.get('params', {}).keys():
                 url = url + '?in-text-linked'
                 kw.pop('params')
-            response = method(url, **kw)
+            response = self._session(tms).request(verb, url, **kw)
             log.debug(dump_request(response))
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
@@ -359,7 +413,12 @@ def from_product_config():
         secondary=dict(
             url=config.get('secondary-base-url'),
             username=config.get('secondary-username'),
-            password=config.get('secondary-password')))
+            password=config.get('secondary-password')),
+        pool_size=int(config.get('connection-pool-size', 10)),
+        retries=int(config.get('retries', 0)),
+        retry_backoff=float(config.get('retry-backoff', 0)),
+        async_secondary=config.get('secondary-async', '').lower() in (
+            'true', 'yes', 'on', '1'))
 
 
 @zeit.cms.cli.runner(principal=gocept.runner.from_config(
@@ -458,43 +517,44 @@ def get_tagslist(response):
     return result
 
 
-def signal_timeout_request(self, method, url, **kw):
+class TimeoutSession(requests.Session):
     """The requests library does not allow to specify a duration within which
     a request has to return a response. You can only limit the time to
     wait for the connection to be established or the first byte to be sent.
 
-    We now utilize the SIGALRM signal to enforce a hard timeout and abort the
-    request even if the server is still sending its response.
+    This session enforces a hard timeout for the whole request (if timeout is
+    a single number, tuples keep the requests behaviour), by streaming the
+    response body and checking the deadline after each chunk. Unlike a
+    SIGALRM based approach this also works outside the main thread.
     """
 
-    class SignalTimeout(Exception):
-        pass
-
-    def handler(signum, frame):
-        raise SignalTimeout()
-
-    try:
-        # Handler registration fails if it's attempted in a worker thread
-        signal.signal(signal.SIGALRM, handler)
-        # Timeout tuples (connect, read) shall not invoke signal timeouts
-        sig_timeout = float(kw['timeout'])
-    except (KeyError, TypeError, ValueError):
-        sig_timeout = None
-    else:
-        signal.setitimer(signal.ITIMER_REAL, sig_timeout)
+    CHUNK_SIZE = 64 * 1024
 
-    try:
-        return original_session_request(self, method, url, **kw)
-    except SignalTimeout:
-        raise requests.exceptions.Timeout(
-            'Request attempt timed out after %s seconds' % sig_timeout)
-    finally:
-        if sig_timeout:
-            signal.setitimer(signal.ITIMER_REAL, 0)
-
-
-original_session_request = requests.sessions.Session.request
-requests.sessions.Session.request = signal_timeout_request
+    def request(self, method, url, **kw):
+        try:
+            timeout = float(kw['timeout'])
+        except (KeyError, TypeError, ValueError):
+            return super().request(method, url, **kw)
+        deadline = time.monotonic() + timeout
+        stream = kw.pop('stream', False)
+        response = super().request(method, url, stream=True, **kw)
+        self._check_deadline(response, deadline, timeout)
+        if not stream and response.raw is not None:
+            body = []
+            for chunk in response.iter_content(self.CHUNK_SIZE):
+                body.append(chunk)
+                self._check_deadline(response, deadline, timeout)
+            # Like requests.Response.content does it.
+            response._content = b''.join(body)
+            response._content_consumed = True
+        return response
+
+    @staticmethod
+    def _check_deadline(response, deadline, timeout):
+        if time.monotonic() > deadline:
+            response.close()
+            raise requests.exceptions.Timeout(
+                'Request attempt timed out after %s seconds' % timeout)
 
 
 def dump_request(response):
@@ -55,6 +55,23 @@ class ITMS(zope.interface.Interface):
     def delete_id(uuid):
         """Deletes the document with the given IUUID."""
 
+    # Variants that operate on already converted ITMSRepresentation data
+    # (or just the IUUID), so they can be called without access to the
+    # content object, e.g. from a worker thread during bulk reindex.
+
+    def index_data(data):
+        """Stores the given document (in TMS format)."""
+
+    def enrich_data(data, intextlinks=True):
+        """Performs TMS analysis of the given document (in TMS format)."""
+
+    def publish_id(uuid):
+        """Mark the document with the given IUUID as published in TMS."""
+
+    def get_article_data_id(uuid):
+        """Return the data stored in TMS for the given IUUID as a dict,
+        or an empty dict if there is none."""
+
     # vivi-internal
 
     def get_keywords(search_string):
@@ -223,6 +240,23 @@ class IElasticsearch(zope.interface.Interface):
         with the keys `url`, `doc_id` and `doc_type`.
         """
 
+    def msearch(searches, include_payload=False):
+        """Perform several searches with a single request.
+
+        searches ... list of (query, start, rows) tuples, see `search`.
+
+        Returns a list containing an `IResult` for each search (in the same
+        order), or the exception if that search failed.
+        """
+
+    def iter_search(query, batch_size=100, include_payload=False):
+        """Iterate over all results for `query`, without a limit on the
+        result window.
+
+        Results are fetched lazily, `batch_size` at a time, and are
+        dictionaries like those returned by `search`.
+        """
+
 
 class KPIFieldSource(zeit.cms.content.sources.CachedXMLBase,
                      collections.UserDict):
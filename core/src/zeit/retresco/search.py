@@ -2,6 +2,7 @@ import elasticsearch
 import elasticsearch.connection
 import elasticsearch.transport
 import json
+import logging
 import pkg_resources
 import requests.utils
 import zeit.cms.interfaces
@@ -10,6 +11,9 @@ import zope.dottedname.resolve
 import zope.interface
 
 
+log = logging.getLogger(__name__)
+
+
 class Connection(elasticsearch.connection.RequestsHttpConnection):
 
     def __init__(self, *args, **kw):
@@ -50,6 +54,47 @@ class Elasticsearch:
         `include_payload` flag.
         """
 
+        query = self._prepare_query(query, include_payload)
+        __traceback_info__ = (self.index, query)
+        response = self.client.search(
+            index=self.index, body=json.dumps(query),
+            from_=start, size=rows)
+        return self._result(response)
+
+    def msearch(self, searches, include_payload=False):
+        """Performs several searches with a single request. `searches` is a
+        list of (query, start, rows) tuples.
+
+        Returns a list with a result (like `search`) for each search, in the
+        same order; or the error, if that search failed.
+        """
+        body = []
+        for query, start, rows in searches:
+            query = self._prepare_query(query, include_payload)
+            query['from'] = start
+            query['size'] = rows
+            body.extend([{}, query])
+        __traceback_info__ = (self.index, body)
+        response = self.client.msearch(index=self.index, body=body)
+        result = []
+        for item in response['responses']:
+            if 'error' in item:
+                result.append(elasticsearch.TransportError(
+                    item.get('status', 'N/A'), str(item['error'])))
+            else:
+                result.append(self._result(item))
+        return result
+
+    def _result(self, response):
+        result = zeit.cms.interfaces.Result(
+            [x['_source'] for x in response['hits']['hits']])
+        if isinstance(response['hits']['total'], int):  # BBB ES-2.x
+            result.hits = response['hits']['total']
+        else:
+            result.hits = response['hits']['total']['value']
+        return result
+
+    def _prepare_query(self, query, include_payload):
         query = query.copy()
         if '_source' in query:
             if include_payload:
@@ -66,17 +111,69 @@ class Elasticsearch:
         if 'cloud.es.io' in self.client.transport.hosts[0]:
             query['track_total_hits'] = True
 
-        __traceback_info__ = (self.index, query)
-        response = self.client.search(
-            index=self.index, body=json.dumps(query),
-            from_=start, size=rows)
-        result = zeit.cms.interfaces.Result(
-            [x['_source'] for x in response['hits']['hits']])
-        if isinstance(response['hits']['total'], int):  # BBB ES-2.x
-            result.hits = response['hits']['total']
-        else:
-            result.hits = response['hits']['total']['value']
-        return result
+        return query
+
+    # Unique per document, so sorting by it makes the order stable.
+    TIEBREAKER = 'doc_id'
+
+    def iter_search(self, query, batch_size=100, include_payload=False,
+                    keep_alive='1m'):
+        """Yields all results for `query`, fetching `batch_size` at a time,
+        so memory usage is bounded and there is no limit on the result window
+        (unlike `search` with `start`).
+
+        Uses `search_after` on a point in time (if the server supports it,
+        else directly on the index), sorted by the `sort` of the query with
+        `TIEBREAKER` appended.
+        """
+        query = self._prepare_query(query, include_payload)
+        if 'track_total_hits' in query:
+            # We don't need the total, so don't make the server count it.
+            query['track_total_hits'] = False
+        sort = query.get('sort', [])
+        if not isinstance(sort, list):
+            sort = [sort]
+        query['sort'] = sort + [{self.TIEBREAKER: 'asc'}]
+
+        pit = self._open_point_in_time(keep_alive)
+        try:
+            while True:
+                __traceback_info__ = (self.index, query)
+                if pit is not None:
+                    query['pit'] = {'id': pit, 'keep_alive': keep_alive}
+                    response = self.client.search(
+                        body=json.dumps(query), size=batch_size)
+                    pit = response.get('pit_id', pit)
+                else:
+                    response = self.client.search(
+                        index=self.index, body=json.dumps(query),
+                        size=batch_size)
+                hits = response['hits']['hits']
+                for hit in hits:
+                    yield hit['_source']
+                if len(hits) < batch_size:
+                    break
+                query['search_after'] = hits[-1]['sort']
+        finally:
+            if pit is not None:
+                self._close_point_in_time(pit)
+
+    def _open_point_in_time(self, keep_alive):
+        try:
+            return self.client.open_point_in_time(
+                index=self.index, keep_alive=keep_alive)['id']
+        except (AttributeError, elasticsearch.TransportError):
+            # Point in time needs client and server version >= 7.10
+            log.debug('Could not open point in time, using index %s',
+                      self.index, exc_info=True)
+            return None
+
+    def _close_point_in_time(self, pit):
+        try:
+            self.client.close_point_in_time(body={'id': pit})
+        except elasticsearch.TransportError:
+            log.warning('Could not close point in time %s', pit,
+                        exc_info=True)
 
     def aggregate(self, query):
         """Returns aggregated data from payload aggregations. Consult Elastic
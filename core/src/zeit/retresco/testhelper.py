@@ -19,6 +19,8 @@ class ElasticsearchMockLayer(plone.testing.Layer):
         self['elasticsearch'] = mock.Mock()
         self['elasticsearch'].search.return_value = (
             zeit.cms.interfaces.Result())
+        # Nothing is prefetched, so tests can set up `search` as usual.
+        self['elasticsearch'].msearch.return_value = []
         zope.interface.alsoProvides(
             self['elasticsearch'], zeit.retresco.interfaces.IElasticsearch)
         zope.component.getSiteManager().registerUtility(self['elasticsearch'])
@@ -3,6 +3,7 @@ from unittest import mock
 from zeit.cms.checkout.helper import checked_out
 from zeit.cms.interfaces import Result
 from zeit.cms.workflow.interfaces import IPublishInfo
+import concurrent.futures
 import json
 import os
 import pytest
@@ -397,41 +398,95 @@ class SlowAdapter(requests.adapters.BaseAdapter):
         pass
 
 
-class SignalTimeoutTest(zeit.retresco.testing.FunctionalTestCase):
+class TimeoutSessionTest(zeit.retresco.testing.FunctionalTestCase):
 
     def setUp(self):
         super().setUp()
-        self.session = requests.Session()
+        self.session = zeit.retresco.connection.TimeoutSession()
         self.session.mount('slow://', SlowAdapter())
 
     @pytest.mark.slow
-    def test_signal_timeout_is_not_invoked_on_timeout_tuple(self):
+    def test_hard_timeout_is_not_applied_on_timeout_tuple(self):
         # If someone specifically set a connect and read timeout tuple,
         # we want to preserve requests' intended behaviour.
-        # SlowAdapter ignores touple timeouts, so lets see if our signal
-        # timeout patch leaves the slow request be slow.
+        # SlowAdapter ignores touple timeouts, so lets see if the session
+        # leaves the slow request be slow.
         resp = self.session.get(
             'slow://xml.zeit.de/index',
             headers={'X-Sleep': '0.2'}, timeout=(0.01, 0.01))
         self.assertTrue(isinstance(resp, requests.Response))
 
     @pytest.mark.slow
-    def test_signal_timeout_is_not_invoked_in_worker_thread(self):
-        # Registering signal handlers can only be done within a main thread.
-        # If it fails, we revert to requests original timeout mechanics.
-        # This test also utilizes SlowAdapter ignoring the timeout kwarg.
-        with mock.patch('signal.signal') as sig_func:
-            sig_func.side_effect = ValueError()
-            resp = self.session.get(
+    def test_hard_timeout_should_abort_slow_responses(self):
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.session.get(
                 'slow://xml.zeit.de/index',
                 headers={'X-Sleep': '0.1'}, timeout=0.01)
-            self.assertTrue(isinstance(resp, requests.Response))
 
     @pytest.mark.slow
-    def test_signal_timeout_should_abort_slow_responses(self):
-        # Finally, we want to see a timeout exception risen by our patched
-        # signal request function.
-        with self.assertRaises(requests.exceptions.Timeout):
-            self.session.get(
-                'slow://xml.zeit.de/index',
+    def test_hard_timeout_works_in_worker_thread(self):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(
+                self.session.get, 'slow://xml.zeit.de/index',
                 headers={'X-Sleep': '0.1'}, timeout=0.01)
+            with self.assertRaises(requests.exceptions.Timeout):
+                future.result()
+
+    def test_fast_responses_are_returned_with_content(self):
+        resp = self.session.get('slow://xml.zeit.de/index', timeout=1)
+        self.assertTrue(isinstance(resp, requests.Response))
+
+
+class TMSSessionTest(zeit.retresco.testing.FunctionalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tms = zeit.retresco.connection.TMS(
+            primary={'url': 'http://tms.example.com/api',
+                     'username': 'user', 'password': 'secret'},
+            secondary={'url': 'http://tms2.example.com/api'},
+            pool_size=3, retries=2, retry_backoff=0.5)
+
+    def test_session_is_reused_per_endpoint(self):
+        primary = self.tms._session(self.tms.primary)
+        self.assertIs(primary, self.tms._session(self.tms.primary))
+        self.assertIsNot(primary, self.tms._session(self.tms.secondary))
+        self.assertEqual(('user', 'secret'), primary.auth)
+        self.assertIsInstance(
+            primary, zeit.retresco.connection.TimeoutSession)
+
+    def test_session_adapter_is_configured(self):
+        adapter = self.tms._session(self.tms.primary).get_adapter(
+            'http://tms.example.com/api/foo')
+        self.assertEqual(3, adapter._pool_maxsize)
+        self.assertEqual(2, adapter.max_retries.total)
+        self.assertEqual(0.5, adapter.max_retries.backoff_factor)
+
+    def test_secondary_writes_are_sent_in_background_if_configured(self):
+        tms = zeit.retresco.connection.TMS(
+            primary={'url': 'http://tms.example.com/api'},
+            secondary={'url': 'http://tms2.example.com/api'},
+            async_secondary=True)
+        calls = []
+        with mock.patch.object(
+                tms, '_request_one',
+                side_effect=lambda tms, request, **kw: calls.append(
+                    tms['url'])):
+            tms._request('POST /content/foo', json={})
+            tms.secondary_executor.shutdown(wait=True)
+        self.assertEqual(
+            ['http://tms.example.com/api', 'http://tms2.example.com/api'],
+            calls)
+
+    def test_secondary_errors_in_background_are_not_raised(self):
+        tms = zeit.retresco.connection.TMS(
+            primary={'url': 'http://tms.example.com/api'},
+            secondary={'url': 'http://tms2.example.com/api'},
+            async_secondary=True)
+
+        def request(tms, request, **kw):
+            if 'tms2' in tms['url']:
+                raise zeit.retresco.interfaces.TechnicalError('fail')
+        with mock.patch.object(tms, '_request_one', side_effect=request):
+            tms._request('DELETE /content/foo')
+            tms.secondary_executor.shutdown(wait=True)
@@ -1,5 +1,7 @@
 from ..interfaces import IElasticsearch
+from unittest import mock
 from zeit.cms.interfaces import IResult
+import elasticsearch
 import json
 import unittest
 import zeit.retresco.testing
@@ -47,3 +49,63 @@ class TestElasticsearch(unittest.TestCase):
         query['_source'] = ['payload.teaser.title', 'url', 'rtr_keyword']
         with self.assertRaises(ValueError):
             self.elasticsearch.search(query, include_payload=True)
+
+    def hits(self, *ids):
+        return {'hits': {'hits': [
+            {'_source': {'doc_id': x}, 'sort': [x]} for x in ids]}}
+
+    def test_iter_search_pages_with_search_after_on_point_in_time(self):
+        client = self.elasticsearch.client
+        client.search.reset_mock()
+        client.search.side_effect = [
+            self.hits('a', 'b'), self.hits('c')]
+        with mock.patch.object(client, 'open_point_in_time',
+                               create=True) as open_pit, \
+                mock.patch.object(client, 'close_point_in_time',
+                                  create=True) as close_pit:
+            open_pit.return_value = {'id': 'pit1'}
+            result = list(self.elasticsearch.iter_search(
+                self.query, batch_size=2))
+        client.search.side_effect = None
+        self.assertEqual(['a', 'b', 'c'], [x['doc_id'] for x in result])
+        first, second = [
+            json.loads(x[1]['body']) for x in client.search.call_args_list]
+        self.assertEqual({'id': 'pit1', 'keep_alive': '1m'}, first['pit'])
+        self.assertEqual(
+            [{'title': 'asc'}, {'doc_id': 'asc'}], first['sort'])
+        self.assertNotIn('search_after', first)
+        self.assertEqual(['b'], second['search_after'])
+        close_pit.assert_called_with(body={'id': 'pit1'})
+
+    def test_iter_search_uses_index_without_point_in_time_support(self):
+        client = self.elasticsearch.client
+        client.search.reset_mock()
+        client.search.side_effect = [self.hits('a')]
+        with mock.patch.object(client, 'open_point_in_time',
+                               create=True) as open_pit:
+            open_pit.side_effect = elasticsearch.TransportError(
+                400, 'not supported')
+            result = list(self.elasticsearch.iter_search(
+                self.query, batch_size=2))
+        client.search.side_effect = None
+        self.assertEqual(['a'], [x['doc_id'] for x in result])
+        self.assertEqual(
+            self.elasticsearch.index, client.search.call_args[1]['index'])
+        self.assertNotIn('pit', json.loads(client.search.call_args[1]['body']))
+
+    def test_msearch_returns_result_or_error_per_search(self):
+        client = self.elasticsearch.client
+        result = self.hits('a', 'b')
+        result['hits']['total'] = {'value': 2}
+        with mock.patch.object(client, 'msearch') as msearch:
+            msearch.return_value = {'responses': [
+                result, {'error': {'type': 'provoked'}, 'status': 400}]}
+            first, second = self.elasticsearch.msearch([
+                (self.query, 0, 2), (self.query, 10, 5)])
+        self.assertEqual(['a', 'b'], [x['doc_id'] for x in first])
+        self.assertEqual(2, first.hits)
+        self.assertIsInstance(second, elasticsearch.TransportError)
+        body = msearch.call_args[1]['body']
+        self.assertEqual(4, len(body))
+        self.assertEqual(10, body[3]['from'])
+        self.assertEqual(5, body[3]['size'])
@@ -250,6 +250,100 @@ class IndexParallelTest(zeit.retresco.testing.FunctionalTestCase):
             self.index.call_args[1])
 
 
+class BulkIndexTest(zeit.retresco.testing.FunctionalTestCase):
+
+    def setUp(self):
+        super(BulkIndexTest, self).setUp()
+        self.tms = mock.Mock()
+        self.tms.get_article_data_id.return_value = {}
+        self.tms.enrich_data.return_value = {}
+        self.tms.generate_keyword_list.return_value = []
+        zope.component.getGlobalSiteManager().registerUtility(
+            self.tms, zeit.retresco.interfaces.ITMS)
+        self.repository['bulk'] = zeit.cms.repository.folder.Folder()
+        self.repository['bulk']['one'] = ExampleContentType()
+        self.repository['bulk']['two'] = ExampleContentType()
+        self.representation = mock.patch(
+            'zeit.retresco.interfaces.ITMSRepresentation',
+            new=lambda content: lambda: {'doc_id': content.uniqueId})
+        self.representation.start()
+
+    def tearDown(self):
+        self.representation.stop()
+        super(BulkIndexTest, self).tearDown()
+
+    def indexed(self):
+        return sorted(
+            x[0][0]['doc_id'] for x in self.tms.index_data.call_args_list)
+
+    def test_walks_folders_and_indexes_in_batches(self):
+        indexer = zeit.retresco.update.BulkIndexer(batch_size=2)
+        errors = indexer(zeit.retresco.update.walk(
+            ['http://xml.zeit.de/bulk/']))
+        self.assertEqual([], errors)
+        self.assertEqual([
+            'http://xml.zeit.de/bulk/',
+            'http://xml.zeit.de/bulk/one',
+            'http://xml.zeit.de/bulk/two'], self.indexed())
+        self.assertEqual(3, indexer.stats['indexed'])
+
+    def test_preserves_fields_and_passes_body_from_enrich(self):
+        self.tms.get_article_data_id.return_value = {
+            'kpi_1': 'kpi1', 'title': 'old'}
+        self.tms.enrich_data.return_value = {'body': 'mybody'}
+        zeit.retresco.update.BulkIndexer(enrich=True)(
+            [self.repository['bulk']['one']])
+        self.tms.index_data.assert_called_with({
+            'doc_id': 'http://xml.zeit.de/bulk/one',
+            'kpi_1': 'kpi1', 'body': 'mybody'})
+
+    def test_indexes_keywords_updated_from_enrich(self):
+        self.representation.stop()
+        keywords = {}
+
+        def update(self, tags, clear_disabled=True):
+            keywords[self.context.uniqueId] = tags
+        self.representation = mock.patch(
+            'zeit.retresco.interfaces.ITMSRepresentation',
+            new=lambda content: lambda: {
+                'doc_id': content.uniqueId,
+                'keywords': keywords.get(content.uniqueId, [])})
+        self.representation.start()
+        self.tms.enrich_data.return_value = {'body': 'mybody'}
+        self.tms.generate_keyword_list.return_value = ['Berlin']
+        with mock.patch('zeit.retresco.tagger.Tagger.update', new=update):
+            indexer = zeit.retresco.update.BulkIndexer(
+                enrich=True, update_keywords=True)
+            indexer([self.repository['bulk']['one']])
+        self.tms.index_data.assert_called_once_with({
+            'doc_id': 'http://xml.zeit.de/bulk/one',
+            'keywords': ['Berlin'], 'body': 'mybody'})
+        self.assertEqual(1, indexer.stats['indexed'])
+
+    def test_publishes_only_published_content(self):
+        with mock.patch('zeit.cms.workflow.interfaces.IPublishInfo') as pub:
+            pub().published = True
+            zeit.retresco.update.BulkIndexer(publish=True)(
+                [self.repository['bulk']['one']])
+        self.tms.publish_id.assert_called_with(
+            'http://xml.zeit.de/bulk/one')
+        self.tms.publish_id.reset_mock()
+        zeit.retresco.update.BulkIndexer(publish=True)(
+            [self.repository['bulk']['two']])
+        self.assertFalse(self.tms.publish_id.called)
+
+    def test_collects_errors_and_continues(self):
+        self.tms.index_data.side_effect = [
+            None, TechnicalError('internal', 500), None]
+        indexer = zeit.retresco.update.BulkIndexer(
+            batch_size=1, concurrency=1)
+        errors = indexer(zeit.retresco.update.walk(
+            ['http://xml.zeit.de/bulk/']))
+        self.assertEqual(1, len(errors))
+        self.assertEqual(1, len(indexer.failed))
+        self.assertEqual(2, indexer.stats['indexed'])
+
+
 class RetryTest(zeit.retresco.testing.FunctionalTestCase):
 
     layer = zeit.retresco.testing.CELERY_LAYER
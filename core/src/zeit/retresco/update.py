@@ -2,6 +2,8 @@ from zeit.cms.content.sources import FEATURE_TOGGLES
 from zeit.cms.repository.interfaces import ICollection, INonRecursiveCollection
 from zeit.retresco.interfaces import ISkipEnrich
 import argparse
+import collections
+import concurrent.futures
 import gocept.runner
 import grokcore.component as grok
 import logging
@@ -118,10 +120,10 @@ def index(content, enrich=False, update_keywords=False, publish=False):
     if update_keywords and not enrich:
         raise ValueError('enrich is required for update_keywords')
     conn = zope.component.getUtility(zeit.retresco.interfaces.ITMS)
-    stack = [content]
+    stack = collections.deque([content])
     errors = []
     while stack:
-        content = stack.pop(0)
+        content = stack.popleft()
         if (ICollection.providedBy(content) and
                 not INonRecursiveCollection.providedBy(content)):
             stack.extend(content.values())
@@ -233,6 +235,215 @@ def index_parallel(self, unique_id, enrich=False, publish=False):
                 log.info('Processed %s in %s', content.uniqueId, stop - start)
 
 
+def walk(ids):
+    """Yields the content objects for the given uniqueIds (or content
+    objects), descending into recursive collections, in the same order as
+    `index()` processes them."""
+    queue = collections.deque(ids)
+    while queue:
+        content = queue.popleft()
+        if isinstance(content, six.string_types):
+            unique_id = content
+            content = zeit.cms.interfaces.ICMSContent(unique_id, None)
+            if content is None:
+                log.warning('Could not resolve %s, skipped', unique_id)
+                continue
+        if (ICollection.providedBy(content) and
+                not INonRecursiveCollection.providedBy(content)):
+            queue.extend(content.values())
+        if should_skip(content):
+            continue
+        yield content
+
+
+Document = collections.namedtuple(
+    'Document',
+    ['content', 'uuid', 'data', 'enrich', 'publish', 'update_keywords'])
+
+
+class BulkIndexer:
+    """Pipeline to (re)index lots of content in TMS.
+
+    Content is resolved and converted with ITMSRepresentation in the calling
+    thread, since content objects are bound to its ZODB connection. The
+    converted documents are collected into batches of `batch_size`, which
+    are sent to TMS by a pool of `concurrency` threads (fetching the
+    PRESERVE_FIELDS, enrich, index, publish), while the next batch is being
+    converted. At most `max_pending` batches are in flight, so a fast
+    producer waits for TMS instead of piling up documents in memory.
+
+    With `update_keywords`, documents are only enriched at first. Like
+    index(), the keywords are then updated on the content (in the calling
+    thread), and the content is converted again and sent for indexing.
+    """
+
+    REPORT_INTERVAL = 1000
+
+    def __init__(self, enrich=False, update_keywords=False, publish=False,
+                 batch_size=100, concurrency=4, max_pending=None):
+        if update_keywords and not enrich:
+            raise ValueError('enrich is required for update_keywords')
+        self.tms = zope.component.getUtility(zeit.retresco.interfaces.ITMS)
+        self.enrich = enrich
+        self.update_keywords = update_keywords
+        self.publish = publish
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_pending = max_pending or 2 * concurrency
+        self.stats = collections.Counter()
+        self.failed = []
+
+    def __call__(self, contents):
+        """Indexes the given content objects, returns a list of errors."""
+        self.start = time.time()
+        self._next_report = self.REPORT_INTERVAL
+        self._reindex = []
+        errors = []
+        pending = set()
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.concurrency,
+                thread_name_prefix='tms-reindex') as pool:
+            for batch in self._batches(contents):
+                if len(pending) >= self.max_pending:
+                    done, pending = concurrent.futures.wait(
+                        pending,
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                    errors.extend(self._collect(done))
+                    pending.update(self._submit_reindex(pool))
+                pending.add(pool.submit(self._send, batch))
+            while pending:
+                done, pending = concurrent.futures.wait(pending)
+                errors.extend(self._collect(done))
+                pending.update(self._submit_reindex(pool))
+        self.report()
+        return errors
+
+    def _batches(self, contents):
+        batch = []
+        for content in contents:
+            document = self._convert(content)
+            if document is None:
+                continue
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _convert(self, content):
+        self.stats['converted'] += 1
+        data = self._represent(content)
+        if data is None:
+            return None
+        publish = (self.publish and zeit.cms.workflow.interfaces.IPublishInfo(
+            content).published)
+        enrich = self.enrich and not ISkipEnrich.providedBy(content)
+        return Document(content, data['doc_id'], data, enrich, publish,
+                        self.update_keywords and enrich)
+
+    def _represent(self, content):
+        try:
+            data = zeit.retresco.interfaces.ITMSRepresentation(content)()
+        except Exception:
+            log.warning('Error converting %s, giving up',
+                        content.uniqueId, exc_info=True)
+            self.stats['errors'] += 1
+            self.failed.append(content.uniqueId)
+            return None
+        if data is None:
+            log.info('Skip index for %s, it is missing required fields',
+                     content.uniqueId)
+            self.stats['skipped'] += 1
+            return None
+        return data
+
+    def _submit_reindex(self, pool):
+        documents, self._reindex = self._reindex, []
+        return set(
+            pool.submit(self._send, documents[i:i + self.batch_size])
+            for i in range(0, len(documents), self.batch_size))
+
+    def _send(self, batch):
+        """Runs in a worker thread, so it must not touch the content objects.
+        """
+        result = []
+        for document in batch:
+            try:
+                result.append((document, self._send_one(document), None))
+            except Exception as e:
+                result.append((document, None, e))
+        return result
+
+    def _send_one(self, document):
+        previous = self.tms.get_article_data_id(document.uuid)
+        data = {key: previous[key] for key in PRESERVE_FIELDS
+                if key in previous}
+        response = None
+        if document.enrich:
+            response = self.tms.enrich_data(document.data)
+            data['body'] = response.get('body')
+        document.data.update(data)
+        if document.update_keywords:
+            # Indexed after the keywords were updated, see _collect()
+            return response
+        self.tms.index_data(document.data)
+        if document.publish:
+            self.tms.publish_id(document.uuid)
+        return response
+
+    def _collect(self, futures):
+        errors = []
+        keywords_changed = False
+        for future in futures:
+            for document, response, error in future.result():
+                unique_id = document.content.uniqueId
+                if error is not None:
+                    log.warning('Error indexing %s, giving up', unique_id,
+                                exc_info=error)
+                    errors.append(error)
+                    self.failed.append(unique_id)
+                    self.stats['errors'] += 1
+                    continue
+                if document.update_keywords:
+                    tagger = zeit.retresco.tagger.Tagger(document.content)
+                    tagger.update(self.tms.generate_keyword_list(response),
+                                  clear_disabled=False)
+                    keywords_changed = True
+                    self._reconvert(document)
+                    continue
+                self.stats['indexed'] += 1
+                if document.publish:
+                    self.stats['published'] += 1
+        if keywords_changed:
+            transaction.commit()
+        if self.stats['indexed'] + self.stats['errors'] >= self._next_report:
+            self._next_report += self.REPORT_INTERVAL
+            self.report()
+        return errors
+
+    def _reconvert(self, document):
+        """Queues `document` to be indexed again with the current state of
+        its content (e.g. the updated keywords)."""
+        data = self._represent(document.content)
+        if data is None:
+            return
+        # Keep what was fetched from TMS (PRESERVE_FIELDS, enriched body).
+        data.update({key: document.data[key] for key in PRESERVE_FIELDS
+                     if key in document.data})
+        self._reindex.append(document._replace(
+            data=data, enrich=False, update_keywords=False))
+
+    def report(self):
+        duration = time.time() - self.start
+        log.info(
+            'Indexed %s, published %s, skipped %s, errors %s '
+            'in %.1f seconds (%.1f documents/s)',
+            self.stats['indexed'], self.stats['published'],
+            self.stats['skipped'], self.stats['errors'], duration,
+            self.stats['indexed'] / duration if duration else 0)
+
+
 @zeit.cms.cli.runner(principal=gocept.runner.from_config(
     'zeit.retresco', 'index-principal'))
 def reindex():
@@ -251,14 +462,38 @@ def reindex():
     parser.add_argument(
         '--publish', action='store_true',
         help='Perform TMS publish after indexing')
+    parser.add_argument(
+        '--bulk', action='store_true',
+        help='process directly, sending batches to TMS concurrently')
+    parser.add_argument(
+        '--batch-size', type=int, default=100,
+        help='documents per batch in bulk mode')
+    parser.add_argument(
+        '--concurrency', type=int, default=4,
+        help='concurrent batches in bulk mode')
+    parser.add_argument(
+        '--failed', metavar='FILE',
+        help='write uniqueIds that could not be indexed in bulk mode to FILE')
 
     args = parser.parse_args()
-    ids = args.ids
     if args.file:
         if len(args.ids) > 1:
             raise Exception("Only one file can be passed!")
         with open(args.ids[0], 'r') as f:
-            ids = f.read().splitlines()
+            ids = [line.strip() for line in f if line.strip()]
+    else:
+        ids = args.ids
+
+    if args.bulk:
+        indexer = BulkIndexer(
+            enrich=args.enrich, update_keywords=args.enrich,
+            publish=args.publish, batch_size=args.batch_size,
+            concurrency=args.concurrency)
+        indexer(walk(ids))
+        if args.failed:
+            with open(args.failed, 'w') as f:
+                f.write(''.join(x + '\n' for x in indexer.failed))
+        return
 
     for i, id in enumerate(ids):
         if args.parallel:
@@ -30,27 +30,24 @@ class ReportableContentSource(grok.GlobalUtility):
         age = datetime.date.today() - datetime.timedelta(days=int(age))
         age = age.isoformat()
 
-        i = 0
-        result = self._query(age, i)
-        while len(result) < result.hits:
-            i += 1
-            result.extend(self._query(age, i))
-
-        for row in result:
+        # Reporting takes a while per document, so read all results first,
+        # instead of holding the point in time of the search open meanwhile.
+        urls = [row['url'] for row in self._query(age)]
+        for url in urls:
             content = zeit.cms.interfaces.ICMSContent(
-                zeit.cms.interfaces.ID_NAMESPACE[:-1] + row['url'], None)
+                zeit.cms.interfaces.ID_NAMESPACE[:-1] + url, None)
             if content is not None:
                 yield content
 
-    def _query(self, age, page=0, rows=100):
+    def _query(self, age):
         elastic = zope.component.getUtility(zeit.find.interfaces.ICMSSearch)
-        return elastic.search({'query': {'bool': {'filter': [
+        return elastic.iter_search({'query': {'bool': {'filter': [
             {'exists': {'field': 'payload.vgwort.private_token'}},
             {'range': {'payload.document.date_first_released': {'lte': age}}},
         ], 'must_not': [
             {'exists': {'field': 'payload.vgwort.reported_on'}},
             {'exists': {'field': 'payload.vgwort.reported_error'}},
-        ]}}, '_source': ['url']}, start=page * rows, rows=rows)
+        ]}}, '_source': ['url']})
 
     def mark_done(self, content):
         info = zeit.vgwort.interfaces.IReportInfo(content)
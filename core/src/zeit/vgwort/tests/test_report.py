@@ -28,13 +28,23 @@ class ReportTest(zeit.vgwort.testing.TestCase):
         elastic = mock.Mock()
         zope.component.getGlobalSiteManager().registerUtility(
             elastic, zeit.find.interfaces.ICMSSearch)
-        elastic.search.return_value = zeit.cms.interfaces.Result(
-            [{'url': '/testcontent'}])
+        elastic.iter_search.return_value = iter([{'url': '/testcontent'}])
         source = zope.component.getUtility(
             zeit.vgwort.interfaces.IReportableContentSource)
         result = list(source)
         self.assertEqual([self.repository['testcontent']], result)
 
+    def test_source_reads_all_results_before_yielding_content(self):
+        elastic = mock.Mock()
+        zope.component.getGlobalSiteManager().registerUtility(
+            elastic, zeit.find.interfaces.ICMSSearch)
+        results = iter([{'url': '/testcontent'}, {'url': '/nonexistent'}])
+        elastic.iter_search.return_value = results
+        source = zope.component.getUtility(
+            zeit.vgwort.interfaces.IReportableContentSource)
+        next(iter(source))
+        self.assertEqual([], list(results))
+
     def test_successful_report_should_mark_content(self):
         now = datetime.datetime.now(pytz.UTC)
         time.sleep(0.25)
@@ -2,6 +2,10 @@ from datetime import datetime
 from zeit.cms.i18n import MessageFactory as _
 from zeit.cms.workflow.interfaces import CAN_PUBLISH_ERROR
 from zeit.cms.workflow.interfaces import PRIORITY_LOW
+import ZODB.interfaces
+import collections
+import concurrent.futures
+import contextlib
 import logging
 import os.path
 import pkg_resources
@@ -11,6 +15,7 @@ import subprocess
 import tempfile
 import threading
 import time
+import transaction
 import z3c.celery.celery
 import zeit.cms.celery
 import zeit.cms.checkout.interfaces
@@ -20,10 +25,14 @@ import zeit.cms.workflow.interfaces
 import zeit.connector.interfaces
 import zeit.objectlog.interfaces
 import zope.app.appsetup.product
+import zope.app.publication.zopepublication
+import zope.cachedescriptors.property
 import zope.component
+import zope.component.hooks
 import zope.event
 import zope.i18n
 import zope.interface
+import zope.security.management
 
 
 logger = logging.getLogger(__name__)
@@ -62,10 +71,12 @@ class Publish(object):
                            ' to publish were given')
             return
         ids = []
-        for obj in objects:
-            obj = zeit.cms.interfaces.ICMSContent(obj)
-            self.log(obj, _('Collective Publication'))
-            ids.append(obj.uniqueId)
+        log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
+        with log.batch():
+            for obj in objects:
+                obj = zeit.cms.interfaces.ICMSContent(obj)
+                self.log(obj, _('Collective Publication'))
+                ids.append(obj.uniqueId)
         return self._execute_task(
             MULTI_PUBLISH_TASK, ids, priority, background, **kw)
 
@@ -77,10 +88,12 @@ class Publish(object):
                            ' to retract were given')
             return
         ids = []
-        for obj in objects:
-            obj = zeit.cms.interfaces.ICMSContent(obj)
-            self.log(obj, _('Collective Retraction'))
-            ids.append(obj.uniqueId)
+        log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
+        with log.batch():
+            for obj in objects:
+                obj = zeit.cms.interfaces.ICMSContent(obj)
+                self.log(obj, _('Collective Retraction'))
+                ids.append(obj.uniqueId)
         return self._execute_task(
             MULTI_RETRACT_TASK, ids, priority, background, **kw)
 
@@ -128,6 +141,7 @@ class PublishRetractTask(object):
         timer.start(u'Job %s started: %s (%s)' % info)
         logger.info("Running job %s for %s", self.jobid, ids_str)
 
+        self.repository.prefetch(ids)
         objs = []
         for uniqueId in ids:
             try:
@@ -184,8 +198,9 @@ class PublishRetractTask(object):
 
     def _log_messages(self, objs_and_messages):
         log = zope.component.getUtility(zeit.objectlog.interfaces.IObjectLog)
-        for obj, message in objs_and_messages:
-            log.log(obj, message)
+        with log.batch():
+            for obj, message in objs_and_messages:
+                log.log(obj, message)
 
     def cycle(self, obj):
         """checkout/checkin obj to sync data as necessary.
@@ -217,48 +232,153 @@ class PublishRetractTask(object):
         timer.mark('Cycled %s' % obj.uniqueId)
         return obj
 
-    def recurse(self, method, obj, *args):
-        """Apply method recursively on obj."""
+    @zope.cachedescriptors.property.Lazy
+    def graph(self):
         config = zope.app.appsetup.product.getProductConfiguration(
             'zeit.workflow')
-        DEPENDENCY_PUBLISH_LIMIT = int(config['dependency-publish-limit'])
-        stack = [obj]
-        seen = set()
-        result_obj = None
-        while stack:
-            current_obj = stack.pop(0)
-            if current_obj.uniqueId in seen:
-                continue
-            seen.add(current_obj.uniqueId)
-            logger.debug('%s %s' % (method, current_obj.uniqueId))
-            new_obj = method(current_obj, *args)
-            timer.mark('Called %s on %s' % (method.__name__,
-                                            current_obj.uniqueId))
-            if len(seen) > DEPENDENCY_PUBLISH_LIMIT:
-                # "strictly greater" comparison since the starting object
-                # should not count towards the limit
-                break
+        return DependencyGraph(
+            self.mode, int(config['dependency-publish-limit']))
 
-            # Dive into folders
-            if zeit.cms.repository.interfaces.ICollection.providedBy(new_obj):
-                stack.extend(new_obj.values())
-                timer.mark('Recursed into %s' % (new_obj.uniqueId,))
-
-            # Dive into dependent objects
-            deps = zeit.workflow.interfaces.IPublicationDependencies(new_obj)
-            if self.mode == MODE_PUBLISH:
-                stack.extend(deps.get_dependencies())
-            elif self.mode == MODE_RETRACT:
-                stack.extend(deps.get_retract_dependencies())
-            else:
-                raise ValueError('Task mode must be %r or %r, not %r' % (
-                    MODE_PUBLISH, MODE_RETRACT, self.mode))
-            timer.mark('Got dependencies for %s' % (new_obj.uniqueId,))
+    # Phases that do the same for an object regardless of the object of the
+    # job (`master`) it is a dependency of, so they run once per object.
+    shared_phases = frozenset(['lock', 'unlock', 'get_unique_id'])
+
+    def recurse(self, method, obj, *args):
+        """Apply method on obj and its dependencies.
+
+        For `shared_phases`, objects that were already handled successfully
+        by this method in the current job (e.g. as a dependency of another
+        object) are skipped. Other phases are applied once per `obj`.
+        """
+        graph = self.graph
+        graph.add(obj)
+        # Worker threads have their own ZODB connection, so they must not use
+        # the objects of the graph, but look them up themselves.
+        in_worker = getattr(self._worker, 'active', False)
+        result = obj if in_worker else graph.objects[obj.uniqueId]
+        phase = method.__name__
+        if phase not in self.shared_phases:
+            phase = (phase, obj.uniqueId)
+        for uniqueId in graph.order[obj.uniqueId]:
+            with graph.running(phase, uniqueId) as done:
+                if done:
+                    continue
+                if uniqueId == obj.uniqueId:
+                    current_obj = obj
+                elif in_worker:
+                    current_obj = self.repository.getContent(uniqueId)
+                else:
+                    current_obj = graph.objects[uniqueId]
+                logger.debug('%s %s' % (method, uniqueId))
+                new_obj = method(current_obj, *args)
+            if not in_worker:
+                graph.objects[uniqueId] = new_obj
+            if uniqueId == obj.uniqueId:
+                result = new_obj
+            timer.mark('Called %s on %s' % (method.__name__, uniqueId))
+        return result
+
+    # Number of objects whose phases are run in parallel, see map_objects().
+    concurrency = 1
+
+    @zope.cachedescriptors.property.Lazy
+    def _worker(self):
+        return threading.local()
 
-            if result_obj is None:
-                result_obj = new_obj
+    def map_objects(self, func, objs):
+        """Call func(obj) for each of objs, returns a list of
+        (obj, result, exception) tuples.
+
+        With `concurrency` > 1 the calls happen in a thread pool, each in its
+        own ZODB connection and transaction. The result is then `obj` itself,
+        since objects of other connections must not be used here.
+
+        The transactions of the workers are aborted, only the main one is
+        committed (or aborted, like MultiPublishTask does). Their connector
+        cleanup (e.g. unlocking after an error) is handed over to the main
+        transaction, so it is performed if a later phase fails.
+        """
+        if self.concurrency <= 1 or len(objs) <= 1:
+            results = []
+            for obj in objs:
+                try:
+                    results.append((obj, func(obj), None))
+                except Exception as e:
+                    results.append((obj, None, e))
+            return results
 
-        return result_obj
+        for obj in objs:
+            self.graph.add(obj)
+        self._worker  # Create in the main thread
+        principal = zope.security.management.getInteraction(
+        ).participations[0].principal
+        cleanup = self._connector_cleanup()
+        before = list(cleanup)
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency) as pool:
+            futures = [
+                pool.submit(self._call_in_worker, func, obj.uniqueId,
+                            principal, before)
+                for obj in objs]
+        results = []
+        for obj, future in zip(objs, futures):
+            error, after = future.result()
+            for entry in after:
+                if entry not in before:
+                    cleanup.append(entry)
+            for entry in before:
+                if entry not in after and entry in cleanup:
+                    cleanup.remove(entry)
+            results.append((obj, obj if error is None else None, error))
+        timer.mark('Called %s on %s objects with %s workers' % (
+            func.__name__, len(objs), self.concurrency))
+        return results
+
+    def _call_in_worker(self, func, uniqueId, principal, cleanup):
+        """Returns the exception raised by func (or None) and the connector
+        cleanup the worker transaction ended with."""
+        timer.start(u'Worker %s started: %s' % (func.__name__, uniqueId))
+        db = zope.component.getUtility(ZODB.interfaces.IDatabase)
+        connection = db.open()
+        zope.component.hooks.setSite(connection.root()[
+            zope.app.publication.zopepublication.ZopePublication.root_name])
+        z3c.celery.celery.login_principal(principal)
+        self._worker.active = True
+        own_cleanup = self._connector_cleanup()
+        own_cleanup[:] = cleanup
+        error = None
+        try:
+            # Changes of the other workers and the main thread to the DAV
+            # cache are not committed, so we have to look at the DAV server.
+            for id in self.graph.order[uniqueId]:
+                zope.event.notify(
+                    zeit.connector.interfaces.ResourceInvalidatedEvent(id))
+            func(self.repository.getContent(uniqueId))
+        except Exception as e:
+            logger.warning('Error in %s for %s', func.__name__, uniqueId,
+                           exc_info=True)
+            error = e
+        finally:
+            cleanup = list(own_cleanup)
+            # The main transaction performs the cleanup, not our abort.
+            own_cleanup[:] = []
+            transaction.abort()
+            self._worker.active = False
+            zope.security.management.endInteraction()
+            zope.component.hooks.setSite(None)
+            connection.close()
+            timings = six.text_type(timer)
+            timer_logger.debug('Timings:\n%s' % timings)
+        return error, cleanup
+
+    def _connector_cleanup(self):
+        """Returns the list of cleanup actions the connector performs when
+        the current transaction is aborted."""
+        connector = zope.component.getUtility(
+            zeit.connector.interfaces.IConnector)
+        if not hasattr(connector, 'get_datamanager'):
+            # Only ZopeConnector takes part in transactions.
+            return []
+        return connector.get_datamanager().cleanup
 
     def get_all_paths(self, obj):
         unique_ids = []
@@ -380,6 +500,7 @@ class PublishTask(PublishRetractTask):
     def _run(self, objs):
         logger.info('Publishing %s' % ', '.join(obj.uniqueId for obj in objs))
         errors = []
+        publishable = []
         published = []
         for obj in objs:
             info = zeit.cms.workflow.interfaces.IPublishInfo(obj)
@@ -389,13 +510,14 @@ class PublishTask(PublishRetractTask):
                     obj,
                     _("Could not publish because conditions not satisifed."))
                 continue
-            try:
-                obj = self.recurse(self.lock, obj, obj)
-                obj = self.recurse(self.before_publish, obj, obj)
-            except Exception as e:
-                errors.append((obj, e))
+            publishable.append(obj)
+
+        for obj, result, error in self.map_objects(
+                self.prepare_publish, publishable):
+            if error is not None:
+                errors.append((obj, error))
             else:
-                published.append(obj)
+                published.append(result)
 
         paths = []
         for obj in published:
@@ -404,18 +526,24 @@ class PublishTask(PublishRetractTask):
         if paths:
             self.call_script('publish', paths)
 
-        for obj in published:
-            try:
-                self.recurse(self.after_publish, obj, obj)
-                obj = self.recurse(self.unlock, obj, obj)
-            except Exception as e:
-                errors.append((obj, e))
+        for obj, result, error in self.map_objects(
+                self.finish_publish, published):
+            if error is not None:
+                errors.append((obj, error))
 
         if errors:
             raise MultiPublishError(errors)
 
         return "Published."
 
+    def prepare_publish(self, obj):
+        obj = self.recurse(self.lock, obj, obj)
+        return self.recurse(self.before_publish, obj, obj)
+
+    def finish_publish(self, obj):
+        self.recurse(self.after_publish, obj, obj)
+        return self.recurse(self.unlock, obj, obj)
+
     def before_publish(self, obj, master):
         """Do everything necessary before the actual publish."""
 
@@ -523,6 +651,12 @@ def RETRACT_TASK(self, ids):
 class MultiPublishTask(PublishTask):
     """Publish multiple objects"""
 
+    @property
+    def concurrency(self):
+        config = zope.app.appsetup.product.getProductConfiguration(
+            'zeit.workflow')
+        return int(config.get('multi-publish-concurrency', 1))
+
     def _run(self, objs):
         self._to_log = []
         result = super(MultiPublishTask, self)._run(objs)
@@ -567,6 +701,89 @@ def MULTI_RETRACT_TASK(self, ids):
     return MultiRetractTask(self.request.id).run(ids)
 
 
+class DependencyGraph(object):
+    """The objects that are published (or retracted) together with the
+    objects of a job: the contents of folders and their
+    IPublicationDependencies, recursively.
+
+    The graph is computed once per job, and shared by all of its phases
+    (lock, before_publish, ...). Dependencies are kept in breadth-first
+    order, i.e. an object always comes before its dependencies.
+    """
+
+    def __init__(self, mode, limit):
+        self.mode = mode
+        self.limit = limit
+        # uniqueId of each object passed to add() -> uniqueIds of it and its
+        # dependencies.
+        self.order = {}
+        # uniqueId -> the current version of the object, phases replace it
+        # with their result (e.g. the checked in object after a cycle).
+        self.objects = {}
+        # Phase -> uniqueIds that were already processed successfully.
+        self.done = {}
+        self.lock = threading.Lock()
+        self._running = {}
+        self._dependencies = {}
+
+    def add(self, obj):
+        if obj.uniqueId in self.order:
+            return
+        order = []
+        seen = set()
+        queue = collections.deque([obj])
+        while queue:
+            current_obj = queue.popleft()
+            if current_obj.uniqueId in seen:
+                continue
+            seen.add(current_obj.uniqueId)
+            order.append(current_obj.uniqueId)
+            self.objects.setdefault(current_obj.uniqueId, current_obj)
+            if len(seen) > self.limit:
+                # "strictly greater" comparison since the starting object
+                # should not count towards the limit
+                break
+            queue.extend(self.get_dependencies(current_obj))
+        self.order[obj.uniqueId] = order
+        timer.mark('Computed %s dependencies for %s (%s objects total)' % (
+            len(order) - 1, obj.uniqueId, len(self.objects)))
+
+    @contextlib.contextmanager
+    def running(self, phase, uniqueId):
+        """Yields whether `phase` was already applied to `uniqueId`. If not,
+        it counts as applied if the caller does not raise. Other threads have
+        to wait until the caller is done with the object."""
+        with self.lock:
+            lock = self._running.setdefault(uniqueId, threading.Lock())
+        with lock:
+            with self.lock:
+                done = self.done.setdefault(phase, set())
+                applied = uniqueId in done
+            yield applied
+            if not applied:
+                with self.lock:
+                    done.add(uniqueId)
+
+    def get_dependencies(self, obj):
+        try:
+            return self._dependencies[obj.uniqueId]
+        except KeyError:
+            pass
+        result = []
+        if zeit.cms.repository.interfaces.ICollection.providedBy(obj):
+            result.extend(obj.values())
+        deps = zeit.workflow.interfaces.IPublicationDependencies(obj)
+        if self.mode == MODE_PUBLISH:
+            result.extend(deps.get_dependencies())
+        elif self.mode == MODE_RETRACT:
+            result.extend(deps.get_retract_dependencies())
+        else:
+            raise ValueError('Task mode must be %r or %r, not %r' % (
+                MODE_PUBLISH, MODE_RETRACT, self.mode))
+        self._dependencies[obj.uniqueId] = result
+        return result
+
+
 class Timer(threading.local):
 
     def start(self, message):
@@ -7,18 +7,22 @@ from zeit.cms.related.interfaces import IRelatedContent
 from zeit.cms.testcontenttype.testcontenttype import ExampleContentType
 from zeit.cms.workflow.interfaces import IPublishInfo, IPublish
 import gocept.testing.mock
+import ZODB.interfaces
 import logging
 import os
 import pytz
 import shutil
+import threading
 import time
 import transaction
 import zeit.cms.related.interfaces
 import zeit.cms.testing
+import zeit.cms.workflow.interfaces
 import zeit.objectlog.interfaces
 import zeit.workflow.publish
 import zeit.workflow.testing
 import zope.app.appsetup.product
+import zope.app.locking.interfaces
 import zope.component
 import zope.i18n
 
@@ -135,6 +139,69 @@ class PublicationDependencies(zeit.workflow.testing.FunctionalTestCase):
             2, len([x for x in self.related
                     if IPublishInfo(x).date_last_published > BEFORE_PUBLISH]))
 
+    def test_dependencies_are_computed_once_per_job(self):
+        content = self.repository['testcontent']
+        with checked_out(content) as co:
+            IRelatedContent(co).related = (self.related[0],)
+        with mock.patch.object(
+                RelatedDependency, 'get_dependencies', autospec=True,
+                side_effect=RelatedDependency.get_dependencies) as deps:
+            self.publish(self.repository['testcontent'])
+        self.assertEqual(
+            ['http://xml.zeit.de/testcontent', 'http://xml.zeit.de/t0'],
+            [x[0][0].context.uniqueId for x in deps.call_args_list])
+
+    def test_shared_dependencies_are_published_once_per_job(self):
+        for item in self.related[1:]:
+            with checked_out(item) as co:
+                IRelatedContent(co).related = (self.related[0],)
+        for item in self.related:
+            IPublishInfo(item).urgent = True
+        with mock.patch(
+                'zeit.workflow.publish.PublishTask.call_script') as script:
+            IPublish(self.repository).publish_multiple(
+                self.related[1:], background=False)
+            script.assert_called_with(
+                'publish', ['work/t1', 'work/t0', 'work/t2'])
+
+    def test_shared_dependencies_get_events_for_each_master(self):
+        for item in self.related[1:]:
+            with checked_out(item) as co:
+                IRelatedContent(co).related = (self.related[0],)
+        for item in self.related:
+            IPublishInfo(item).urgent = True
+        events = []
+
+        def handler(event):
+            events.append((event.object.uniqueId, event.master.uniqueId))
+        registry = zope.component.getGlobalSiteManager()
+        registry.registerHandler(
+            handler, (zeit.cms.workflow.interfaces.IBeforePublishEvent,))
+        self.addCleanup(
+            registry.unregisterHandler, handler,
+            (zeit.cms.workflow.interfaces.IBeforePublishEvent,))
+        with mock.patch('zeit.workflow.publish.PublishTask.call_script'):
+            IPublish(self.repository).publish_multiple(
+                self.related[1:3], background=False)
+        self.assertEqual([
+            ('http://xml.zeit.de/t1', 'http://xml.zeit.de/t1'),
+            ('http://xml.zeit.de/t0', 'http://xml.zeit.de/t1'),
+            ('http://xml.zeit.de/t2', 'http://xml.zeit.de/t2'),
+            ('http://xml.zeit.de/t0', 'http://xml.zeit.de/t2'),
+        ], events)
+
+    def test_phase_counts_as_done_only_if_it_succeeds(self):
+        graph = zeit.workflow.publish.DependencyGraph(
+            zeit.workflow.publish.MODE_PUBLISH, 10)
+        with self.assertRaises(RuntimeError):
+            with graph.running('lock', 'foo') as done:
+                self.assertFalse(done)
+                raise RuntimeError('provoked')
+        with graph.running('lock', 'foo') as done:
+            self.assertFalse(done)
+        with graph.running('lock', 'foo') as done:
+            self.assertTrue(done)
+
 
 class SynchronousPublishTest(zeit.workflow.testing.FunctionalTestCase):
 
@@ -359,6 +426,123 @@ class MultiPublishRetractTest(zeit.workflow.testing.FunctionalTestCase):
         self.assertFalse(IPublishInfo(c1).published)
         self.assertFalse(IPublishInfo(c2).published)
 
+    def test_runs_phases_in_worker_threads_if_configured(self):
+        c1 = zeit.cms.interfaces.ICMSContent(
+            'http://xml.zeit.de/online/2007/01/Somalia')
+        c2 = zeit.cms.interfaces.ICMSContent(
+            'http://xml.zeit.de/online/2007/01/eta-zapatero')
+        IPublishInfo(c1).urgent = True
+        IPublishInfo(c2).urgent = True
+        task = zeit.workflow.publish.MultiPublishTask
+        calls = []
+
+        def worker(self, func, uniqueId, principal, cleanup):
+            calls.append((func.__name__, uniqueId))
+            if uniqueId == c2.uniqueId:
+                return RuntimeError('provoked'), cleanup
+            return None, cleanup
+        with mock.patch.object(task, 'concurrency', 2), \
+                mock.patch.object(task, '_call_in_worker', worker), \
+                mock.patch.object(task, 'call_script') as script:
+            with self.assertRaises(RuntimeError):
+                IPublish(self.repository).publish_multiple(
+                    [c1, c2], background=False)
+        self.assertEqual([
+            ('finish_publish', c1.uniqueId),
+            ('prepare_publish', c1.uniqueId),
+            ('prepare_publish', c2.uniqueId),
+        ], sorted(calls))
+        script.assert_called_with('publish', ['work/online/2007/01/Somalia'])
+
+    def use_worker_threads(self):
+        # The workers open their own connection to the test database.
+        registry = zope.component.getGlobalSiteManager()
+        registry.registerUtility(
+            self.layer['zodbDB'], ZODB.interfaces.IDatabase)
+        self.addCleanup(
+            registry.unregisterUtility,
+            self.layer['zodbDB'], ZODB.interfaces.IDatabase)
+        patch = mock.patch.object(
+            zeit.workflow.publish.MultiPublishTask, 'concurrency', 2)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_publishes_multiple_objects_in_worker_threads(self):
+        self.use_worker_threads()
+        c1 = zeit.cms.interfaces.ICMSContent(
+            'http://xml.zeit.de/online/2007/01/Somalia')
+        c2 = zeit.cms.interfaces.ICMSContent(
+            'http://xml.zeit.de/online/2007/01/eta-zapatero')
+        IPublishInfo(c1).urgent = True
+        IPublishInfo(c2).urgent = True
+        threads = []
+
+        def before_publish(context, event):
+            threads.append(threading.current_thread())
+        registry = zope.component.getGlobalSiteManager()
+        registry.registerHandler(before_publish, (
+            ICMSContent, zeit.cms.workflow.interfaces.IBeforePublishEvent))
+        self.addCleanup(registry.unregisterHandler, before_publish, (
+            ICMSContent, zeit.cms.workflow.interfaces.IBeforePublishEvent))
+
+        with mock.patch.object(
+                zeit.workflow.publish.MultiPublishTask,
+                'call_script') as script:
+            IPublish(self.repository).publish_multiple(
+                [c1, c2], background=False)
+        script.assert_called_once_with(
+            'publish', ['work/online/2007/01/Somalia',
+                        'work/online/2007/01/eta-zapatero'])
+        self.assertEqual(2, len(threads))
+        self.assertNotIn(threading.current_thread(), threads)
+        for content in [c1, c2]:
+            self.assertTrue(IPublishInfo(content).published)
+            self.assertFalse(
+                zope.app.locking.interfaces.ILockable(content).locked())
+
+    def test_cleanup_of_workers_is_handed_to_main_transaction(self):
+        self.use_worker_threads()
+        c1 = zeit.cms.interfaces.ICMSContent(
+            'http://xml.zeit.de/online/2007/01/Somalia')
+        c2 = zeit.cms.interfaces.ICMSContent(
+            'http://xml.zeit.de/online/2007/01/eta-zapatero')
+        IPublishInfo(c1).urgent = True
+        IPublishInfo(c2).urgent = True
+        task = zeit.workflow.publish.MultiPublishTask
+        # Simulates the abort cleanup that ZopeConnector registers for locks.
+        cleanups = {}
+
+        def connector_cleanup(self):
+            return cleanups.setdefault(threading.current_thread(), [])
+
+        original_lock = task.lock
+        original_unlock = task.unlock
+
+        def lock(obj, master=None):
+            connector_cleanup(None).append(('unlock', obj.uniqueId))
+            return original_lock(obj, master)
+
+        def unlock(obj, master=None):
+            connector_cleanup(None).remove(('unlock', obj.uniqueId))
+            return original_unlock(obj, master)
+
+        main = connector_cleanup(None)
+        with mock.patch.object(
+                task, '_connector_cleanup', connector_cleanup), \
+                mock.patch.object(task, 'lock', staticmethod(lock)), \
+                mock.patch.object(task, 'unlock', staticmethod(unlock)), \
+                mock.patch.object(task, 'call_script') as script:
+            IPublish(self.repository).publish_multiple(
+                [c1, c2], background=False)
+            self.assertEqual([], main)
+
+            script.side_effect = RuntimeError('provoked')
+            with self.assertRaises(Exception):
+                IPublish(self.repository).publish_multiple(
+                    [c1, c2], background=False)
+        self.assertEqual(
+            [('unlock', c1.uniqueId), ('unlock', c2.uniqueId)], sorted(main))
+
     def test_accepts_uniqueId_as_well_as_ICMSContent(self):
         with mock.patch('zeit.workflow.publish.MultiPublishTask.run') as run:
             IPublish(self.repository).publish_multiple([